@@ -0,0 +1,551 @@
+#!/usr/bin/env python3
+"""
+HALE Async Oracle
+asyncio-native variant of HaleOracle for processes that keep many deliveries
+in flight (the bridge relayer, batch jobs).
+
+Configuration, prompts, instruction encoding and verdict handling are shared
+with HaleOracle; only the network calls differ: Gemini through the SDK's async
+client, Solana through solana-py's AsyncClient and Arc through AsyncWeb3.
+Nothing here blocks the event loop except the sandbox run, which is moved to
+a worker thread.
+
+Usage:
+    async with AsyncHaleOracle(gemini_api_key, arc_rpc_url) as oracle:
+        result = await oracle.process_delivery(contract_data, seller_address)
+"""
+
+import os
+import time
+import uuid
+import asyncio
+import hashlib
+from typing import Dict, Any, Optional, List
+
+# USE_NEW_API is read through the module: it is only set once Gemini loads
+import hale_oracle_backend
+from hale_oracle_backend import HaleOracle, log, arc_log, solana_log
+from hale_capability_cache import get_capability_cache
+from hale_preflight import SimulatedRevert, asimulate, preflight_enabled
+from hale_compute_budget import compute_budget_enabled
+from hale_blob_store import content_hash as delivery_hash, hydrate as hydrate_delivery
+from hale_journal import DeliveryInProgress, check_replay
+from hale_metrics import (
+    STAGE_LATENCY,
+    DELIVERY_LATENCY,
+    RPC_ERRORS,
+    SETTLEMENTS,
+    QUEUE_DEPTH,
+    CACHE_HITS
+)
+from hale_logging import set_correlation_id, reset_correlation_id
+
+
+class AsyncHaleOracle(HaleOracle):
+    """HaleOracle whose delivery pipeline methods are coroutines."""
+
+    def __init__(self, gemini_api_key: str, arc_rpc_url: Optional[str] = None):
+        super().__init__(gemini_api_key, arc_rpc_url)
+        # Created lazily, like the sync clients
+        self._async_solana_client = None
+        self._async_web3 = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+        return False
+
+    @property
+    def async_solana_client(self):
+        """AsyncClient-shaped view of the shared Solana RPC pool, created on first use."""
+        if self._async_solana_client is None:
+            self._async_solana_client = self.solana_client.aio
+        return self._async_solana_client
+
+    @property
+    def async_web3(self):
+        """AsyncWeb3 over the shared Arc RPC pool, created on first use (None without an RPC URL)."""
+        if self._async_web3 is None and self.arc_rpc_url:
+            try:
+                from web3 import AsyncWeb3
+                from hale_rpc_pool import AsyncArcPoolProvider, get_arc_pool
+                self._async_web3 = AsyncWeb3(AsyncArcPoolProvider(get_arc_pool(self.arc_rpc_url)))
+            except Exception as e:
+                arc_log.warning("Error initializing AsyncWeb3", error=str(e))
+        return self._async_web3
+
+    def warm_up(self) -> Dict[str, float]:
+        """Create the Gemini and async chain clients ahead of the first delivery."""
+        self._ensure_gemini()
+        self.async_web3
+        self.async_solana_client
+        return dict(self.init_timings)
+
+    async def aclose(self):
+        """Release the async chain clients (the underlying pools are process-wide and stay open)."""
+        self._async_solana_client = None
+        self._async_web3 = None
+
+    # --- GEMINI ---
+
+    async def verify_delivery(self, contract_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Verify a delivery against contract terms using Gemini.
+
+        Args:
+            contract_data: Dictionary containing transaction_id, Contract_Terms,
+                          Acceptance_Criteria, and Delivery_Content
+
+        Returns:
+            Dictionary containing verdict, confidence_score, release_funds, etc.
+        """
+        log.info("Analyzing delivery", transaction_id=contract_data.get('transaction_id', 'unknown'))
+
+        user_prompt = self.format_verification_request(contract_data)
+
+        if self._use_mock():
+            await asyncio.sleep(self.mock_latency) # Simulate network delay
+            return self._mock_verdict()
+
+        response_text = None
+        try:
+            log.debug("Sending delivery to Gemini")
+            self._refresh_model()
+
+            gemini_started = time.perf_counter()
+            with STAGE_LATENCY.time(stage='gemini_call'):
+                if hale_oracle_backend.USE_NEW_API:
+                    response = await self.client.aio.models.generate_content(
+                        model=self.model_name,
+                        contents=user_prompt,
+                        config={'system_instruction': self.system_prompt}
+                    )
+                else:
+                    response = await self.model.generate_content_async(user_prompt)
+                response_text = response.text.strip()
+            get_capability_cache().record_latency('new' if hale_oracle_backend.USE_NEW_API else 'legacy',
+                                                  self.model_name, time.perf_counter() - gemini_started)
+
+            verdict = self._parse_verdict(response_text)
+            # Sandbox run and review queue writes block, so they go to a worker thread
+            return await asyncio.to_thread(self._review_verdict, contract_data, verdict)
+
+        except Exception as e:
+            if self._is_quota_error(e):
+                await asyncio.sleep(1)
+            return self._fallback_verdict(contract_data, e, response_text)
+
+    # --- ARC SETTLEMENT ---
+
+    async def trigger_smart_contract(self, verdict: Dict[str, Any], seller_address: str,
+                                     transaction_id: str, contract_address: Optional[str] = None) -> bool:
+        """
+        Trigger the smart contract to release or refund funds based on verdict.
+
+        Args:
+            verdict: The verdict dictionary from verify_delivery
+            seller_address: The seller's wallet address
+            transaction_id: The ID of the transaction being verified
+            contract_address: Optional smart contract address
+
+        Returns:
+            True (or the tx hash when not waiting for receipts) if successful, False otherwise
+        """
+        if verdict.get('verdict') == 'FAIL':
+            arc_log.info("Verdict FAIL: processing refund to buyer")
+            return await self._refund_funds(seller_address, verdict, contract_address, transaction_id)
+
+        if not verdict.get('release_funds', False):
+            arc_log.info("No automated action taken", verdict=verdict.get('verdict'))
+            return True # Not a failure, just no action needed yet
+
+        w3 = self.async_web3
+        if not w3:
+            arc_log.warning("No blockchain connection configured (async_web3 is None)")
+            return False
+
+        if not self.signers.arc:
+            arc_log.error("No ORACLE_PRIVATE_KEY found in environment")
+            return False
+
+        contract_address = self._resolve_escrow_address(contract_address)
+        if not contract_address:
+            return False
+
+        arc_log.info("Triggering Escrow.release", seller=seller_address, transaction_id=transaction_id, contract=contract_address)
+        contract = w3.eth.contract(address=contract_address, abi=self.escrow_abi)
+        # ArcFuseEscrow expects release(address seller, bytes32 transactionId) – hash string to bytes32
+        call = contract.functions.release(w3.to_checksum_address(seller_address), w3.keccak(text=transaction_id))
+        return await self._send_settlement('release', call, receipt_timeout=30, transaction_id=transaction_id)
+
+    async def _refund_funds(self, seller_address: str, verdict: Dict[str, Any],
+                            contract_address: Optional[str] = None,
+                            transaction_id: Optional[str] = None) -> bool:
+        """Refund funds back to buyer when verification fails."""
+        w3 = self.async_web3
+        if not w3:
+            arc_log.warning("No blockchain connection configured")
+            return False
+
+        if not self.signers.arc:
+            arc_log.error("No ORACLE_PRIVATE_KEY found in environment")
+            return False
+
+        contract_address = self._resolve_escrow_address(contract_address)
+        if not contract_address:
+            return False
+
+        arc_log.info("Triggering ArcFuseEscrow.refund", seller=seller_address, contract=contract_address)
+        contract = w3.eth.contract(address=contract_address, abi=self.escrow_abi)
+        call = contract.functions.refund(seller_address, self._refund_reason(verdict))
+        return await self._send_settlement('refund', call, receipt_timeout=60, transaction_id=transaction_id,
+                                           shard_key=transaction_id or seller_address)
+
+    async def _read_escrow_oracle(self, escrow: str) -> str:
+        return await self.async_web3.eth.contract(address=escrow, abi=self.escrow_abi).functions.oracle().call()
+
+    async def _send_settlement(self, action: str, call, receipt_timeout: int,
+                               transaction_id: Optional[str] = None, shard_key: Optional[str] = None):
+        """Build, simulate, sign, send and (unless serverless) confirm an escrow call."""
+        w3 = self.async_web3
+        signer = None
+        try:
+            with STAGE_LATENCY.time(stage='arc_build'):
+                fees, signer = await asyncio.gather(
+                    self.fee_estimator.afee_params(),
+                    self.signers.aarc_for(shard_key or transaction_id or call.address, call.address,
+                                          self._read_escrow_oracle)
+                )
+                sender = signer.address
+                # A second pass only after a simulation that ran out of gas (see HaleOracle._check_simulation)
+                for can_retry in (True, False):
+                    try:
+                        gas = await self.fee_estimator.agas_limit(
+                            call.address, action, lambda: call.estimate_gas({'from': sender}))
+                    except Exception as e:
+                        self._estimate_failed(call, e)
+                    # Gas and fees are set, so build_transaction makes no RPC calls for them
+                    tx = await call.build_transaction({
+                        'from': sender,
+                        'gas': gas,
+                        **fees
+                    })
+                    if not preflight_enabled() or not self._check_simulation(
+                            call, await asimulate(w3, tx, self.escrow_abi, action), can_retry):
+                        break
+                # Taken last so a doomed transaction never holds a nonce (see HaleOracle._build_settlement_tx)
+                tx['nonce'] = await signer.anext_nonce(lambda: w3.eth.get_transaction_count(sender, 'pending'))
+
+            with STAGE_LATENCY.time(stage='arc_sign'):
+                signed_tx = w3.eth.account.sign_transaction(tx, signer.private_key)
+                raw_tx = self._raw_transaction(signed_tx)
+            await self._ajournal_prepared(transaction_id, action, raw_tx)
+
+            with STAGE_LATENCY.time(stage='arc_send'):
+                tx_hash = await w3.eth.send_raw_transaction(raw_tx)
+            arc_log.info("Transaction submitted", action=action, tx_hash=w3.to_hex(tx_hash))
+
+            if os.getenv('VERCEL') == '1' or os.getenv('SKIP_TX_WAIT') == '1':
+                arc_log.info("Serverless detected; returning hash without waiting for receipt")
+                SETTLEMENTS.inc(action=action, outcome='submitted')
+                return w3.to_hex(tx_hash)
+
+            with STAGE_LATENCY.time(stage='arc_receipt_wait'):
+                receipt = await w3.eth.wait_for_transaction_receipt(tx_hash, timeout=receipt_timeout)
+            if receipt['status'] == 1:
+                arc_log.info("Transaction confirmed", action=action, block=receipt['blockNumber'])
+                SETTLEMENTS.inc(action=action, outcome='confirmed')
+                return True
+            arc_log.error("Transaction failed on-chain", action=action, tx_hash=w3.to_hex(tx_hash))
+            self.fee_estimator.invalidate(call.address, action)
+            SETTLEMENTS.inc(action=action, outcome='reverted')
+            return False
+
+        except SimulatedRevert as e:
+            arc_log.error("Not sending settlement: simulation reverted", action=action, reason=str(e))
+            SETTLEMENTS.inc(action=action, outcome='simulated_revert')
+            return False
+        except Exception as e:
+            if signer is not None:
+                signer.resync()
+            arc_log.error("Transaction error", action=action, error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation=action)
+            SETTLEMENTS.inc(action=action, outcome='error')
+            return False
+
+    async def _ajournal_prepared(self, transaction_id: Optional[str], action: str, raw_tx: bytes):
+        """Durably record a signed settlement before it is broadcast (journaled deliveries only)."""
+        journal = self.journal
+        if journal and transaction_id and journal.state(transaction_id):
+            await journal.arecord(transaction_id, 'arc_prepared', action=action,
+                                  arc_tx_hash=self._tx_hash_hex(raw_tx), arc_raw_tx='0x' + bytes(raw_tx).hex())
+
+    async def _resume_settlement(self, state: Dict[str, Any]):
+        """
+        Finish a settlement signed before a restart; None when it must be signed
+        again (see HaleOracle._resume_settlement).
+        """
+        w3 = self.async_web3
+        tx_hash = state['arc_tx_hash']
+        arc_log.info("Resuming journaled settlement", action=state.get('action'), tx_hash=tx_hash)
+        try:
+            try:
+                receipt = await w3.eth.get_transaction_receipt(tx_hash)
+            except Exception:
+                receipt = None
+            if receipt is None and state.get('arc_raw_tx'):
+                sender, _ = self._raw_sender_nonce(state['arc_raw_tx'])
+                nonce_count = await w3.eth.get_transaction_count(sender, 'latest')
+                # Checked again after the count: it may have been mined in between
+                try:
+                    receipt = await w3.eth.get_transaction_receipt(tx_hash)
+                except Exception:
+                    receipt = None
+                if receipt is None and self._superseded(state, nonce_count):
+                    return None
+            if receipt is None and state.get('arc_raw_tx'):
+                try:
+                    await w3.eth.send_raw_transaction(state['arc_raw_tx'])
+                except Exception as e:
+                    # 'already known' / 'nonce too low' mean it is (or was) in the pool
+                    arc_log.debug("Re-broadcast not accepted", error=str(e))
+            if receipt is None:
+                if os.getenv('VERCEL') == '1' or os.getenv('SKIP_TX_WAIT') == '1':
+                    return tx_hash
+                receipt = await w3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            return receipt['status'] == 1
+        except Exception as e:
+            arc_log.error("Could not resume journaled settlement", tx_hash=tx_hash, error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation='resume_settlement')
+            return False
+
+    # --- SOLANA ATTESTATION ---
+
+    async def _acompute_budget_instructions(self, kind: str, ix) -> list:
+        """_compute_budget_instructions for event loops."""
+        if not compute_budget_enabled():
+            return []
+        tuner = self.compute_budget
+
+        async def simulate():
+            # A raw request (see HaleOracle._simulate_units), off the event loop like the fee sample
+            return await asyncio.to_thread(self._simulate_units, ix, kind)
+
+        units, price = await asyncio.gather(tuner.aunit_limit(kind, simulate), tuner.aunit_price())
+        return tuner.instructions(units, price)
+
+    async def initialize_solana_attestation(self, transaction_id: str) -> Optional[str]:
+        """Initialize an attestation draft on Solana and wait for confirmation."""
+        if not self.solana_keypair:
+            return None
+
+        solana_log.info("Initializing attestation", transaction_id=transaction_id)
+        started = time.perf_counter()
+        try:
+            ix = self._build_initialize_instruction(transaction_id)
+            client = self.async_solana_client
+            budget = await self._acompute_budget_instructions('initialize_attestation', ix)
+            blockhash = (await client.get_latest_blockhash()).value
+            txn = self._build_solana_transaction(ix, blockhash.blockhash, budget)
+            tx_sig = (await client.send_transaction(txn)).value
+
+            solana_log.debug("Init transaction sent; waiting for confirmation", signature=str(tx_sig))
+            # Batched with every other in-flight signature (hale_solana_confirmer)
+            await self.solana_confirmer.await_confirmation(tx_sig, bytes(txn), blockhash.last_valid_block_height)
+
+            solana_log.info("Attestation initialized", signature=str(tx_sig))
+            return str(tx_sig)
+        except Exception as e:
+            solana_log.error("Attestation init failed", error=str(e))
+            RPC_ERRORS.inc(chain='solana', operation='initialize_attestation')
+            return "MOCK_SOL_INIT_" + hashlib.md5(transaction_id.encode()).hexdigest()[:8]
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage='solana_init')
+
+    async def seal_solana_attestation(self, transaction_id: str, is_valid: bool,
+                                      verdict: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """Finalize the attestation on Solana with the rest of its report window (see HaleOracle)."""
+        if not self.solana_keypair:
+            return None
+
+        solana_log.info("Sealing attestation", transaction_id=transaction_id, is_valid=is_valid)
+        started = time.perf_counter()
+        try:
+            tx_sig = await asyncio.wrap_future(
+                self.report_anchor.submit(transaction_id, verdict or {'is_valid': is_valid}, is_valid))
+            solana_log.info("Attestation sealed", signature=tx_sig)
+            return tx_sig
+        except Exception as e:
+            solana_log.error("Attestation seal failed", error=str(e))
+            RPC_ERRORS.inc(chain='solana', operation='audit_attestation')
+            return "MOCK_SOL_SEAL_" + hashlib.md5(transaction_id.encode()).hexdigest()[:8]
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage='solana_seal')
+
+    # --- PIPELINE ---
+
+    async def process_delivery(self, contract_data: Dict[str, Any],
+                               seller_address: str,
+                               contract_address: Optional[str] = None,
+                               body_hash: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Complete workflow: verify delivery and trigger smart contract.
+
+        Independent steps overlap: the Solana draft is initialized while Gemini
+        verifies, and the seal is sent while the escrow settles. Each step is
+        journaled (hale_journal), so a replay resumes where it stopped.
+
+        Args:
+            contract_data: Dictionary containing transaction_id, Contract_Terms,
+                          Acceptance_Criteria, and Delivery_Content
+            seller_address: The seller's wallet address
+            contract_address: Optional specific contract address to trigger
+            body_hash: Blob store hash of a body the oracle stored itself
+                          (see HaleOracle.process_delivery)
+
+        Returns:
+            Complete result dictionary with verdict and transaction status
+        """
+        # Never read a body by a caller-named hash: it could be another seller's delivery
+        contract_data = {k: v for k, v in contract_data.items() if k != 'delivery_hash'}
+        if body_hash and 'Delivery_Content' not in contract_data:
+            contract_data = await asyncio.to_thread(hydrate_delivery, {**contract_data, 'delivery_hash': body_hash})
+        transaction_id = contract_data.get('transaction_id') or f"tx_{uuid.uuid4().hex}"
+        content_digest = delivery_hash(contract_data.get('Delivery_Content', ''))
+        correlation_token = set_correlation_id(transaction_id)
+        QUEUE_DEPTH.inc(queue='in_flight_deliveries')
+        started = time.perf_counter()
+        # Deliveries with a caller-supplied id are journaled and resumable
+        journal = self.journal if contract_data.get('transaction_id') else None
+        claimed = False
+        try:
+            if journal:
+                # One run per transaction_id at a time; a concurrent retry gets DeliveryInProgress
+                journal.claim(transaction_id)
+                claimed = True
+            state = journal.state(transaction_id) if journal else None
+            if state:
+                # Only the same seller re-sending the same delivery may replay it
+                check_replay(state, seller_address, content_digest)
+            if state and 'result' in state:
+                log.info("Delivery already completed; returning journaled result")
+                CACHE_HITS.inc(cache='settlement_journal')
+                return state['result']
+            state = state or {}
+            if journal and not state:
+                state['contract_data'] = await asyncio.to_thread(self.blobs.externalize, contract_data)
+                await journal.arecord(transaction_id, 'received', contract_data=state['contract_data'],
+                                      seller_address=seller_address, contract_address=contract_address,
+                                      delivery_hash=content_digest)
+
+            async def init():
+                if 'solana_init_tx' in state:
+                    return state['solana_init_tx']
+                signature = await self.initialize_solana_attestation(transaction_id)
+                if journal:
+                    await journal.arecord(transaction_id, 'solana_init', solana_init_tx=signature)
+                return signature
+
+            target_contract = contract_address or contract_data.get('escrow_address')
+
+            async def verify():
+                if state.get('verdict') is not None:
+                    return state['verdict']
+                result = await self.verify_delivery(contract_data)
+                if journal:
+                    await journal.arecord(transaction_id, 'verdict', verdict=result)
+                if result.get('review_id'):
+                    await asyncio.to_thread(self.review_queue.set_parties, result['review_id'],
+                                            seller_address, target_contract)
+                return result
+
+            async def seal(is_valid):
+                if 'solana_seal_tx' in state:
+                    return state['solana_seal_tx']
+                signature = await self.seal_solana_attestation(transaction_id, is_valid, verdict)
+                if journal:
+                    await journal.arecord(transaction_id, 'solana_seal', solana_seal_tx=signature)
+                return signature
+
+            # Step 0 + 1: Anchor to Solana while Gemini verifies
+            solana_init_tx, verdict = await asyncio.gather(init(), verify())
+
+            is_valid = verdict.get('verdict') == 'PASS'
+
+            # Step 1.5 + 2: Seal on Solana while the escrow settles
+            settles = verdict.get('release_funds', False) or verdict.get('verdict') == 'FAIL'
+
+            async def trigger():
+                return await self.trigger_smart_contract(
+                    verdict,
+                    seller_address,
+                    transaction_id=contract_data.get('transaction_id', 'unknown'),
+                    contract_address=target_contract
+                )
+
+            async def resume():
+                outcome = await self._resume_settlement(state)
+                if outcome is None:
+                    # That transaction can never land; sign the settlement again
+                    outcome = await trigger() if settles else False
+                return outcome
+
+            settle = None
+            if 'transaction_success' not in state:
+                if state.get('arc_tx_hash'):
+                    # Signed before a restart: finish that transaction rather than sign another
+                    settle = resume()
+                elif settles:
+                    settle = trigger()
+            if settle is not None:
+                solana_seal_tx, transaction_success = await asyncio.gather(seal(is_valid), settle)
+            else:
+                solana_seal_tx = await seal(is_valid)
+                transaction_success = state.get('transaction_success', False)
+            if journal and 'transaction_success' not in state:
+                await journal.arecord(transaction_id, 'arc_result', transaction_success=transaction_success)
+
+            result = {
+                **verdict,
+                "transaction_success": transaction_success,
+                "seller_address": seller_address,
+                "contract_address": target_contract,
+                "solana_init_tx": solana_init_tx,
+                "solana_seal_tx": solana_seal_tx,
+                "delivery_hash": content_digest
+            }
+            if journal:
+                await journal.arecord(transaction_id, 'completed', result=result)
+                await asyncio.to_thread(self.blobs.release_ref, state.get('contract_data'))
+            return result
+        finally:
+            if claimed:
+                journal.release_claim(transaction_id)
+            QUEUE_DEPTH.dec(queue='in_flight_deliveries')
+            DELIVERY_LATENCY.observe(time.perf_counter() - started)
+            reset_correlation_id(correlation_token)
+
+    async def recover_incomplete(self) -> List[Dict[str, Any]]:
+        """Replay incomplete journaled deliveries concurrently (see HaleOracle.recover_incomplete)."""
+        journal = self.journal
+        if not journal:
+            return []
+
+        async def replay(state):
+            log.info("Recovering incomplete delivery", transaction_id=state['transaction_id'])
+            try:
+                return await self.process_delivery(state['contract_data'], state.get('seller_address', ''),
+                                                   state.get('contract_address'),
+                                                   body_hash=state['contract_data'].get('delivery_hash'))
+            except DeliveryInProgress:
+                log.info("Delivery already being resumed by a retry", transaction_id=state['transaction_id'])
+                return None
+            except Exception as e:
+                log.error("Recovery failed", transaction_id=state['transaction_id'], error=str(e))
+                return None
+
+        results = await asyncio.gather(*(replay(state) for state in journal.incomplete()
+                                         if state.get('contract_data')))
+        return [r for r in results if r is not None]
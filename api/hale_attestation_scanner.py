@@ -0,0 +1,269 @@
+#!/usr/bin/env python3
+"""
+HALE Attestation Scanner
+Rebuilds a local index of the program's attestations from chain with
+server-side filtered getProgramAccounts calls, instead of fetching every
+registered account one by one.
+
+Attestations written by the oracle have a fixed layout up to report_hash
+(metadata_uri is always INITIAL_METADATA_URI), so the node can filter and
+trim them:
+
+    dataSize 661                          only Attestation-sized accounts
+    memcmp   0    account discriminator   only Attestation accounts
+    memcmp   8    authority               one scan per pool signer
+    memcmp   72   uri length + uri [+ status byte at 92]
+    memcmp   40   first byte(s) of intent_hash   shard prefix
+    dataSlice 8..159                      authority, intent_hash, status, outcome and report hashes
+
+getProgramAccounts has no cursor, so a full scan is split into shards on
+the leading byte(s) of intent_hash (sha256 output, so shards are even).
+Shards run concurrently and each one is written to the index as soon as it
+arrives, so a resync never holds the whole program in memory and a large
+shard cannot time out the rest.
+
+Example:
+    python hale_attestation_scanner.py --status audited
+    python hale_attestation_scanner.py --authority <pubkey> --shard-bytes 2
+
+Environment:
+    HALE_ATTESTATION_DB       Index path (default attestations.db)
+    HALE_SCAN_SHARD_BYTES     intent_hash prefix bytes per shard: 0, 1 or 2 (default 1)
+    HALE_SCAN_CONCURRENCY     Shards in flight (default 8)
+"""
+
+import os
+import sys
+import json
+import time
+import base64
+import struct
+import sqlite3
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, Any, List, Optional, Iterable
+
+from hale_logging import get_logger
+from hale_metrics import RPC_ERRORS
+from hale_pda_cache import ATTESTATION_ACCOUNT_DISCRIMINATOR, ATTESTATION_ACCOUNT_SIZE, INITIAL_METADATA_URI
+from solana_attestation_parser import AttestationStatus
+
+log = get_logger('solana.scan')
+
+AUTHORITY_OFFSET = 8
+INTENT_HASH_OFFSET = 40
+URI_OFFSET = 72
+STATUS_OFFSET = URI_OFFSET + 4 + len(INITIAL_METADATA_URI)
+# authority .. status, outcome_hash and report_hash (both Some)
+SLICE_OFFSET = AUTHORITY_OFFSET
+SLICE_LENGTH = STATUS_OFFSET + 1 + 33 + 33 - SLICE_OFFSET
+
+_URI_PREFIX = struct.pack('<I', len(INITIAL_METADATA_URI)) + INITIAL_METADATA_URI.encode()
+
+
+def _memcmp(offset: int, value: bytes) -> Dict[str, Any]:
+    return {'memcmp': {'offset': offset, 'bytes': base64.b64encode(value).decode(), 'encoding': 'base64'}}
+
+
+def scan_filters(authority: Optional[str] = None, status: Optional[int] = None,
+                 prefix: bytes = b'') -> List[Dict[str, Any]]:
+    """getProgramAccounts filters for one authority / status / intent_hash shard."""
+    from solders.pubkey import Pubkey
+    filters = [{'dataSize': ATTESTATION_ACCOUNT_SIZE}, _memcmp(0, ATTESTATION_ACCOUNT_DISCRIMINATOR)]
+    if authority:
+        filters.append(_memcmp(AUTHORITY_OFFSET, bytes(Pubkey.from_string(authority))))
+    # The URI match pins the offsets below it; the status byte follows it directly
+    filters.append(_memcmp(URI_OFFSET, _URI_PREFIX + (bytes([status]) if status is not None else b'')))
+    if prefix:
+        filters.append(_memcmp(INTENT_HASH_OFFSET, prefix))
+    return filters
+
+
+def decode_slice(data: bytes) -> Dict[str, Any]:
+    """Fields of a SLICE_OFFSET/SLICE_LENGTH slice of an attestation account."""
+    from solders.pubkey import Pubkey
+    authority = Pubkey.from_bytes(data[:32])
+    intent_hash = data[32:64]
+    at = STATUS_OFFSET - SLICE_OFFSET
+    status = data[at]
+    at += 1
+    outcome_hash = None
+    if data[at] == 1:
+        outcome_hash = data[at + 1:at + 33]
+        at += 33
+    else:
+        at += 1
+    report_hash = data[at + 1:at + 33] if at < len(data) and data[at] == 1 else None
+    return {
+        'authority': str(authority),
+        'intent_hash': intent_hash.hex(),
+        'status': status,
+        'outcome_hash': outcome_hash.hex() if outcome_hash else None,
+        'report_hash': report_hash.hex() if report_hash else None,
+    }
+
+
+class AttestationIndex:
+    """Local SQLite index of scanned attestations."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS attestations (
+        pubkey        TEXT PRIMARY KEY,
+        authority     TEXT NOT NULL,
+        intent_hash   TEXT NOT NULL,
+        status        INTEGER NOT NULL,
+        outcome_hash  TEXT,
+        report_hash   TEXT,
+        scanned_at    REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS attestations_status ON attestations (status);
+    CREATE INDEX IF NOT EXISTS attestations_authority ON attestations (authority);
+    CREATE INDEX IF NOT EXISTS attestations_intent ON attestations (intent_hash);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('HALE_ATTESTATION_DB', 'attestations.db')
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(self._SCHEMA)
+
+    def put_many(self, rows: Iterable[Dict[str, Any]]) -> int:
+        """Upsert scanned attestations in one transaction."""
+        now = time.time()
+        values = [(r['pubkey'], r['authority'], r['intent_hash'], r['status'],
+                   r.get('outcome_hash'), r.get('report_hash'), now) for r in rows]
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany('INSERT OR REPLACE INTO attestations VALUES (?, ?, ?, ?, ?, ?, ?)', values)
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+        return len(values)
+
+    def get(self, pubkey: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute('SELECT * FROM attestations WHERE pubkey = ?', (pubkey,)).fetchone()
+        return dict(row) if row else None
+
+    def by_intent(self, intent_hash: str) -> List[Dict[str, Any]]:
+        with self._lock:
+            rows = self._db.execute('SELECT * FROM attestations WHERE intent_hash = ?', (intent_hash,)).fetchall()
+        return [dict(row) for row in rows]
+
+    def by_status(self, status: int, limit: int = 1000, after: str = '') -> List[Dict[str, Any]]:
+        """Attestations with status, in pubkey order after `after` (for paging)."""
+        with self._lock:
+            rows = self._db.execute(
+                'SELECT * FROM attestations WHERE status = ? AND pubkey > ? ORDER BY pubkey LIMIT ?',
+                (status, after, limit)).fetchall()
+        return [dict(row) for row in rows]
+
+    def count(self, status: Optional[int] = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._db.execute('SELECT COUNT(*) FROM attestations').fetchone()[0]
+            return self._db.execute('SELECT COUNT(*) FROM attestations WHERE status = ?', (status,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class AttestationScanner:
+    """Sharded, filtered getProgramAccounts scan streamed into an AttestationIndex."""
+
+    def __init__(self, client, program_id: str, index: Optional[AttestationIndex] = None,
+                 shard_bytes: Optional[int] = None, concurrency: Optional[int] = None,
+                 commitment: str = 'confirmed'):
+        # A SolanaRpcPool: request() with failover
+        self.client = client
+        self.program_id = str(program_id)
+        self.index = index or AttestationIndex()
+        self.shard_bytes = min(2, max(0, int(shard_bytes if shard_bytes is not None
+                                             else os.getenv('HALE_SCAN_SHARD_BYTES', '1'))))
+        self.concurrency = int(concurrency or os.getenv('HALE_SCAN_CONCURRENCY', '8'))
+        self.commitment = commitment
+
+    def _prefixes(self) -> List[bytes]:
+        if not self.shard_bytes:
+            return [b'']
+        return [i.to_bytes(self.shard_bytes, 'big') for i in range(256 ** self.shard_bytes)]
+
+    def scan_shard(self, authority: Optional[str], status: Optional[int], prefix: bytes) -> List[Dict[str, Any]]:
+        """One getProgramAccounts call; returns decoded rows."""
+        config = {
+            'encoding': 'base64',
+            'commitment': self.commitment,
+            'dataSlice': {'offset': SLICE_OFFSET, 'length': SLICE_LENGTH},
+            'filters': scan_filters(authority, status, prefix),
+        }
+        response = self.client.request('getProgramAccounts', [self.program_id, config])
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        rows = []
+        for entry in response.get('result') or []:
+            data = base64.b64decode(entry['account']['data'][0])
+            rows.append({'pubkey': entry['pubkey'], **decode_slice(data)})
+        return rows
+
+    def scan(self, authorities: Optional[List[str]] = None,
+             statuses: Optional[List[int]] = None) -> Dict[str, Any]:
+        """
+        Scan every (authority, status, shard) combination and upsert the results.
+
+        Args:
+            authorities: Authorities to scan (None: any authority)
+            statuses: AttestationStatus values to keep (None: any status)
+        """
+        shards = [(authority, status, prefix)
+                  for authority in (authorities or [None])
+                  for status in (statuses or [None])
+                  for prefix in self._prefixes()]
+        started = time.perf_counter()
+        accounts = failed = 0
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix='hale-scan') as pool:
+            futures = {pool.submit(self.scan_shard, *shard): shard for shard in shards}
+            for future in as_completed(futures):
+                try:
+                    accounts += self.index.put_many(future.result())
+                except Exception as e:
+                    failed += 1
+                    authority, status, prefix = futures[future]
+                    log.warning("Shard scan failed", authority=authority, status=status,
+                                prefix=prefix.hex(), error=str(e))
+                    RPC_ERRORS.inc(chain='solana', operation='get_program_accounts')
+        elapsed = time.perf_counter() - started
+        stats = {'accounts': accounts, 'shards': len(shards), 'failed_shards': failed,
+                 'bytes': accounts * SLICE_LENGTH, 'seconds': round(elapsed, 3)}
+        log.info("Attestation scan finished", **stats)
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild the local attestation index from chain")
+    parser.add_argument('--rpc-url', default=os.getenv('SOLANA_RPC_URL', 'https://api.devnet.solana.com'))
+    parser.add_argument('--program-id', default="CnwQj2kPHpTbAvJT3ytzekrp7xd4HEtZJuEua9yn9MMe")
+    parser.add_argument('--authority', action='append', help="Authority pubkey (repeatable; default: any)")
+    parser.add_argument('--status', action='append', choices=[s.name.lower() for s in AttestationStatus],
+                        help="Status to keep (repeatable; default: any)")
+    parser.add_argument('--shard-bytes', type=int, default=None, help="intent_hash prefix bytes per shard")
+    parser.add_argument('--concurrency', type=int, default=None, help="Shards in flight")
+    parser.add_argument('--db', default=None, help="Index path (default HALE_ATTESTATION_DB)")
+    args = parser.parse_args()
+
+    from hale_rpc_pool import get_solana_pool
+    scanner = AttestationScanner(get_solana_pool(args.rpc_url), args.program_id, AttestationIndex(args.db),
+                                 args.shard_bytes, args.concurrency)
+    statuses = [AttestationStatus[s.upper()].value for s in args.status] if args.status else None
+    print(json.dumps(scanner.scan(args.authority, statuses), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+HALE Backfill Runner
+Re-audits historical deliveries in parallel across a process pool and writes
+verdict diffs against the stored results.
+
+A re-audit only verifies: nothing is attested on Solana, no escrow is
+settled and no review task is created. --live runs the full pipeline
+instead (re-sealing attestations and sending release/refund transactions
+against escrows that may since hold other deposits), and cannot be combined
+with --mock-llm, whose canned PASS verdicts would settle real escrows.
+
+Input is JSONL, one delivery per line:
+    {"contract_data": {...}, "seller_address": "0x...",
+     "contract_address": "0x...", "stored_result": {...}}
+
+Example:
+    python hale_backfill.py deliveries.jsonl --out results.jsonl --workers 8
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, Optional, Iterator, Tuple, Set, List
+
+# Fields compared between the stored result and the re-audited verdict
+DIFF_FIELDS = ('verdict', 'release_funds', 'confidence_score')
+
+# Deliveries handed to a worker per task
+CHUNK_SIZE = 8
+
+# Per-worker oracle, built once by the pool initializer
+_worker_oracle = None
+_worker_dry_run = True
+
+
+def _init_worker(gemini_api_key: Optional[str], arc_rpc_url: Optional[str],
+                 mock_llm: bool, dry_run: bool):
+    """Process pool initializer: build one HaleOracle per worker process."""
+    global _worker_oracle, _worker_dry_run
+
+    if mock_llm:
+        # Mock mode must be set before construction so no Gemini client is built
+        os.environ['MOCK_GEMINI'] = '1'
+        os.environ.setdefault('MOCK_GEMINI_LATENCY', '0')
+
+    from hale_oracle_backend import HaleOracle
+    _worker_oracle = HaleOracle(gemini_api_key, None if dry_run else arc_rpc_url)
+    # A re-audit re-runs every step; it must not replay (or share) the service's journal
+    _worker_oracle.journal = None
+    # Nor hand historical deliveries to reviewers, whose decisions would settle them
+    _worker_oracle.queue_reviews = not dry_run
+    _worker_dry_run = dry_run
+
+
+def _run_one(line_no: int, row: Dict[str, Any]) -> Dict[str, Any]:
+    """Re-audit a single delivery inside a worker process."""
+    contract_data = row.get('contract_data') or {}
+    transaction_id = contract_data.get('transaction_id') or f"line_{line_no}"
+    started = time.perf_counter()
+
+    try:
+        if _worker_dry_run:
+            # Verification only: no Solana attestation, no Arc settlement
+            result = {
+                **_worker_oracle.verify_delivery(contract_data),
+                'transaction_success': None,
+                'seller_address': row.get('seller_address'),
+                'contract_address': row.get('contract_address'),
+                'solana_init_tx': None,
+                'solana_seal_tx': None
+            }
+        else:
+            result = _worker_oracle.process_delivery(
+                contract_data=contract_data,
+                seller_address=row.get('seller_address', ''),
+                contract_address=row.get('contract_address')
+            )
+        error = None
+    except Exception as e:
+        result = {}
+        error = str(e)
+
+    return {
+        'line': line_no,
+        'transaction_id': transaction_id,
+        'result': result,
+        'error': error,
+        'elapsed_ms': round((time.perf_counter() - started) * 1000, 2)
+    }
+
+
+def _run_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[Dict[str, Any]]:
+    """Re-audit a chunk of deliveries, deriving their attestation PDAs in one pass first."""
+    if not _worker_dry_run:
+        _worker_oracle.attestation_pdas([
+            (row.get('contract_data') or {}).get('transaction_id') or f"line_{line_no}"
+            for line_no, row in chunk])
+    return [_run_one(line_no, row) for line_no, row in chunk]
+
+
+def diff_verdicts(stored: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compare a stored result with a freshly computed verdict.
+
+    Args:
+        stored: The previously recorded result (may be None)
+        current: The re-audited result
+
+    Returns:
+        Dict of field -> {'old': ..., 'new': ...} for every field that changed
+    """
+    if not stored:
+        return {}
+    changes = {}
+    for field in DIFF_FIELDS:
+        old, new = stored.get(field), current.get(field)
+        if old != new:
+            changes[field] = {'old': old, 'new': new}
+    return changes
+
+
+def load_checkpoint(path: str) -> Set[str]:
+    """Load the set of transaction ids already completed by a previous run."""
+    done = set()
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    done.add(line)
+    return done
+
+
+def iter_deliveries(path: str, done: Set[str]) -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """Yield (line_no, row) for every delivery not already in the checkpoint."""
+    with open(path, 'r') as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as e:
+                print(f"[Backfill] Skipping malformed line {line_no}: {e}")
+                continue
+            tx_id = (row.get('contract_data') or {}).get('transaction_id') or f"line_{line_no}"
+            if tx_id in done:
+                continue
+            yield line_no, row
+
+
+def run_backfill(input_path: str, out_path: str, diff_path: str, checkpoint_path: str,
+                 workers: int = 4, dry_run: bool = True, mock_llm: bool = False,
+                 gemini_api_key: Optional[str] = None,
+                 arc_rpc_url: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Re-audit every delivery in input_path across a process pool.
+
+    Results and diffs are appended as each delivery completes, and its
+    transaction id is appended to the checkpoint, so an interrupted run
+    resumes where it stopped.
+
+    Args:
+        dry_run: Verify only (default); False re-attests and settles every delivery
+
+    Returns:
+        Summary dictionary with counts and throughput
+
+    Raises:
+        ValueError: mock_llm without dry_run
+    """
+    if mock_llm and not dry_run:
+        raise ValueError("mock_llm requires dry_run: mock verdicts must not settle escrows")
+    done = load_checkpoint(checkpoint_path)
+    if done:
+        print(f"[Backfill] Resuming: {len(done)} deliveries already completed")
+
+    stats = {'processed': 0, 'changed': 0, 'errors': 0, 'skipped': len(done)}
+    # Stored results are kept only until the matching future completes
+    stored_by_line = {}
+    # In chunks of CHUNK_SIZE deliveries
+    max_in_flight = workers * 2
+    started = time.perf_counter()
+
+    with open(out_path, 'a') as out_f, open(diff_path, 'a') as diff_f, \
+            open(checkpoint_path, 'a') as ckpt_f, \
+            ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                initargs=(gemini_api_key, arc_rpc_url, mock_llm, dry_run)) as pool:
+
+        def drain(pending, return_when):
+            finished, pending = wait(pending, return_when=return_when)
+            for record in (record for future in finished for record in future.result()):
+                stored = stored_by_line.pop(record['line'], None)
+                stats['processed'] += 1
+                if record['error']:
+                    stats['errors'] += 1
+                    print(f"[Backfill] {record['transaction_id']}: ERROR {record['error']}")
+                else:
+                    changes = diff_verdicts(stored, record['result'])
+                    if changes:
+                        stats['changed'] += 1
+                        diff_f.write(json.dumps({
+                            'transaction_id': record['transaction_id'],
+                            'changes': changes
+                        }) + '\n')
+                    out_f.write(json.dumps(record) + '\n')
+                    # Errors are not checkpointed so they are retried on resume
+                    ckpt_f.write(record['transaction_id'] + '\n')
+                if stats['processed'] % 100 == 0:
+                    out_f.flush()
+                    diff_f.flush()
+                    ckpt_f.flush()
+                    print(f"[Backfill] {stats['processed']} processed, {stats['changed']} changed, {stats['errors']} errors")
+            return pending
+
+        pending = set()
+        chunk = []
+        for line_no, row in iter_deliveries(input_path, done):
+            stored_by_line[line_no] = row.get('stored_result')
+            chunk.append((line_no, row))
+            if len(chunk) >= CHUNK_SIZE:
+                pending.add(pool.submit(_run_chunk, chunk))
+                chunk = []
+            if len(pending) >= max_in_flight:
+                pending = drain(pending, FIRST_COMPLETED)
+        if chunk:
+            pending.add(pool.submit(_run_chunk, chunk))
+        while pending:
+            pending = drain(pending, FIRST_COMPLETED)
+
+    elapsed = time.perf_counter() - started
+    stats['elapsed_s'] = round(elapsed, 2)
+    stats['per_second'] = round(stats['processed'] / elapsed, 2) if elapsed > 0 else 0.0
+    return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-audit historical HALE deliveries in parallel")
+    parser.add_argument('input', help="JSONL file of deliveries to re-audit")
+    parser.add_argument('--out', default='backfill_results.jsonl', help="JSONL file for new results")
+    parser.add_argument('--diff', default=None, help="JSONL file for verdict diffs (default: <out>.diff.jsonl)")
+    parser.add_argument('--checkpoint', default=None, help="Checkpoint file (default: <out>.ckpt)")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 4, help="Number of worker processes")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Verify only; skip all Solana and Arc writes (the default, kept for old scripts)")
+    parser.add_argument('--live', action='store_true',
+                        help="Re-run the full pipeline: re-seal attestations and settle escrows")
+    parser.add_argument('--mock-llm', action='store_true', help="Use the mock Gemini verdict (no API calls, no delay)")
+    args = parser.parse_args()
+    if args.live and args.dry_run:
+        parser.error("--live and --dry-run are mutually exclusive")
+    if args.live and args.mock_llm:
+        parser.error("--mock-llm cannot be combined with --live: mock verdicts must not settle escrows")
+    dry_run = not args.live
+
+    diff_path = args.diff or f"{args.out}.diff.jsonl"
+    checkpoint_path = args.checkpoint or f"{args.out}.ckpt"
+
+    print("=" * 60)
+    print("HALE BACKFILL")
+    print("=" * 60)
+    print(f"Input:    {args.input}")
+    print(f"Workers:  {args.workers}")
+    print(f"Dry run:  {dry_run}")
+    print(f"Mock LLM: {args.mock_llm}")
+
+    stats = run_backfill(
+        args.input, args.out, diff_path, checkpoint_path,
+        workers=args.workers,
+        dry_run=dry_run,
+        mock_llm=args.mock_llm,
+        gemini_api_key=os.getenv('GEMINI_API_KEY'),
+        arc_rpc_url=os.getenv('ARC_RPC_URL')
+    )
+
+    print("\n" + "=" * 60)
+    print("BACKFILL SUMMARY")
+    print("=" * 60)
+    print(json.dumps(stats, indent=2))
+    return 0 if stats['errors'] == 0 else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
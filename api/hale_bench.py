@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+HALE End-to-End Benchmark
+Measures throughput and latency of process_delivery, the Flask endpoints and
+the bridge relayer against local stand-ins for Gemini, Solana and Arc RPC
+(see hale_bench_stubs.py). No devnet or Gemini quota is used.
+
+Scenarios:
+    single  - sequential process_delivery calls
+    burst   - concurrent process_delivery calls from a thread pool
+    async   - concurrent AsyncHaleOracle.process_delivery calls on one event loop
+    api     - concurrent POST /api/verify through the Flask app
+    bridge  - scheduler ticks over N pre-audited attestation mappings until all sync
+    scan    - sharded getProgramAccounts resync of N attestations into a local index
+
+Example:
+    python hale_bench.py burst --iterations 500 --concurrency 32 --gemini-latency 0.2
+"""
+
+import os
+import sys
+import json
+import time
+import asyncio
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Callable
+
+from hale_bench_stubs import (
+    GeminiStub,
+    SolanaRpcStub,
+    ArcRpcStub,
+    HALE_PROGRAM_ID,
+    SIMULATED_UNITS,
+    encode_attestation_account
+)
+
+BENCH_ESCROW_ADDRESS = '0x57c8a6466b097B33B3d98Ccd5D9787d426Bfb539'
+BENCH_SELLER_ADDRESS = '0x876f7ee6D6AA43c5A6cC13c05522eb47363E5907'
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(pct / 100.0 * len(sorted_values) + 0.5)) - 1))
+    return sorted_values[rank]
+
+
+def summarize(name: str, latencies: List[float], errors: int, wall_time: float) -> Dict[str, Any]:
+    """
+    Build the latency/throughput report for one scenario.
+
+    Args:
+        name: Scenario name
+        latencies: Per-operation latencies in seconds
+        errors: Number of failed operations
+        wall_time: Total wall-clock time of the scenario in seconds
+
+    Returns:
+        Report dictionary (latencies in milliseconds)
+    """
+    values = sorted(latencies)
+    count = len(values)
+    return {
+        'scenario': name,
+        'count': count,
+        'errors': errors,
+        'wall_time_s': round(wall_time, 3),
+        'rps': round(count / wall_time, 2) if wall_time > 0 else 0.0,
+        'mean_ms': round(sum(values) / count * 1000, 2) if count else 0.0,
+        'p50_ms': round(percentile(values, 50) * 1000, 2),
+        'p95_ms': round(percentile(values, 95) * 1000, 2),
+        'p99_ms': round(percentile(values, 99) * 1000, 2),
+        'max_ms': round(values[-1] * 1000, 2) if values else 0.0
+    }
+
+
+def _timed_runs(fn: Callable[[int], bool], iterations: int, concurrency: int):
+    """Run fn(i) iterations times across a thread pool, timing each call."""
+    latencies, errors = [], 0
+
+    def run(i):
+        started = time.perf_counter()
+        try:
+            ok = fn(i)
+        except Exception as e:
+            print(f"[Bench] Operation {i} raised: {e}")
+            ok = False
+        return time.perf_counter() - started, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for elapsed, ok in pool.map(run, range(iterations)):
+            latencies.append(elapsed)
+            if not ok:
+                errors += 1
+    return latencies, errors, time.perf_counter() - started
+
+
+def _configure_environment(gemini: GeminiStub, solana: SolanaRpcStub, arc: ArcRpcStub):
+    """Point every HALE component at the local stubs."""
+    from eth_account import Account
+
+    os.environ.pop('MOCK_GEMINI', None)
+    os.environ.pop('VERCEL', None)
+    os.environ['GEMINI_API_KEY'] = 'bench-key'
+    os.environ['GEMINI_BASE_URL'] = gemini.url
+    os.environ['SOLANA_RPC_URL'] = solana.url
+    os.environ['ARC_RPC_URL'] = arc.url
+    os.environ['ARC_TESTNET_RPC_URL'] = arc.url
+    os.environ['ORACLE_PRIVATE_KEY'] = Account.create().key.hex()
+    os.environ['ESCROW_CONTRACT_ADDRESS'] = BENCH_ESCROW_ADDRESS
+    # A fresh journal per run, so runs neither replay nor pollute each other
+    scratch = tempfile.mkdtemp(prefix='hale_bench_')
+    os.environ['HALE_JOURNAL_PATH'] = os.path.join(scratch, 'journal.jsonl')
+    os.environ['HALE_PROOF_DB'] = os.path.join(scratch, 'report_proofs.db')
+    os.environ['HALE_REVIEW_DB'] = os.path.join(scratch, 'review_queue.db')
+    os.environ['HALE_BLOB_DB'] = os.path.join(scratch, 'delivery_blobs.db')
+
+
+def _contract_data(i: int) -> Dict[str, Any]:
+    return {
+        'transaction_id': f"bench_{int(time.time() * 1000)}_{i}",
+        'Contract_Terms': 'Write a function that returns the sum of a list of integers.',
+        'Acceptance_Criteria': ['Returns the correct sum', 'Handles the empty list'],
+        # Not detected as executable code, so the sandbox stage is skipped
+        'Delivery_Content': 'sum_list(xs) returns sum(xs), and 0 for an empty list.'
+    }
+
+
+def run_oracle_scenario(name: str, iterations: int, concurrency: int) -> Dict[str, Any]:
+    """single/burst: drive HaleOracle.process_delivery directly."""
+    from hale_oracle_backend import HaleOracle
+
+    oracle = HaleOracle(os.environ['GEMINI_API_KEY'], os.environ['ARC_RPC_URL'])
+    # Steady-state numbers: keep lazy client start-up out of the timed runs
+    oracle.warm_up()
+
+    def op(i):
+        result = oracle.process_delivery(_contract_data(i), BENCH_SELLER_ADDRESS, BENCH_ESCROW_ADDRESS)
+        return result.get('transaction_success') is not False
+
+    latencies, errors, wall = _timed_runs(op, iterations, concurrency)
+    return summarize(name, latencies, errors, wall)
+
+
+def run_async_scenario(iterations: int, concurrency: int) -> Dict[str, Any]:
+    """async: AsyncHaleOracle.process_delivery with up to `concurrency` deliveries in flight."""
+    from hale_async_oracle import AsyncHaleOracle
+
+    async def run():
+        async with AsyncHaleOracle(os.environ['GEMINI_API_KEY'], os.environ['ARC_RPC_URL']) as oracle:
+            oracle.warm_up()
+            limit = asyncio.Semaphore(concurrency)
+
+            async def op(i):
+                async with limit:
+                    started = time.perf_counter()
+                    try:
+                        result = await oracle.process_delivery(_contract_data(i), BENCH_SELLER_ADDRESS, BENCH_ESCROW_ADDRESS)
+                        ok = result.get('transaction_success') is not False
+                    except Exception as e:
+                        print(f"[Bench] Operation {i} raised: {e}")
+                        ok = False
+                    return time.perf_counter() - started, ok
+
+            started = time.perf_counter()
+            results = await asyncio.gather(*(op(i) for i in range(iterations)))
+            return results, time.perf_counter() - started
+
+    results, wall = asyncio.run(run())
+    latencies = [elapsed for elapsed, _ in results]
+    errors = sum(1 for _, ok in results if not ok)
+    return summarize('async', latencies, errors, wall)
+
+
+def run_api_scenario(iterations: int, concurrency: int) -> Dict[str, Any]:
+    """api: POST /api/verify through the Flask app (no HTTP server in between)."""
+    import index
+    index.get_oracle().warm_up()
+
+    def op(i):
+        client = index.app.test_client()
+        resp = client.post('/api/verify', json={
+            'contract_data': _contract_data(i),
+            'seller_address': BENCH_SELLER_ADDRESS,
+            'contract_address': BENCH_ESCROW_ADDRESS
+        })
+        return resp.status_code == 200
+
+    latencies, errors, wall = _timed_runs(op, iterations, concurrency)
+    return summarize('api', latencies, errors, wall)
+
+
+def run_bridge_scenario(solana: SolanaRpcStub, mappings: int) -> Dict[str, Any]:
+    """bridge: seed N audited attestations and time scheduler ticks until none are pending."""
+    from solders.keypair import Keypair
+    from hale_bridge_relayer import HaleBridge
+
+    workdir = tempfile.mkdtemp(prefix='hale_bench_')
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    try:
+        bridge = HaleBridge(solana_rpc_url=solana.url, arc_rpc_url=os.environ['ARC_RPC_URL'])
+        authority = bytes(Keypair().pubkey())
+
+        print(f"[Bench] Seeding {mappings} audited attestations...")
+        seeded = []
+        for i in range(mappings):
+            pubkey = str(Keypair().pubkey())
+            intent_hash = i.to_bytes(32, 'big')
+            solana.put_account(pubkey, encode_attestation_account(
+                authority, intent_hash, status=2, outcome_hash=b'\x01' * 32, report_hash=b'\x02' * 32))
+            seeded.append({
+                'solana_attestation': pubkey,
+                'arc_seller': BENCH_SELLER_ADDRESS.lower(),
+                'arc_escrow': BENCH_ESCROW_ADDRESS,
+                'status': 'pending',
+                'created_at': datetime.now().isoformat()
+            })
+        bridge.store.put_many(seeded)
+
+        async def sweep():
+            # Like the monitor loop, back to back: each tick syncs the scheduler's
+            # budget of mappings concurrently, settlements batched
+            async def sync(pubkey):
+                started = time.perf_counter()
+                ok = await bridge.sync_attestation_to_arc(pubkey)
+                return time.perf_counter() - started, ok
+
+            results = []
+            while True:
+                batch = await bridge.scheduler.plan()
+                if not batch:
+                    break
+                results.extend(await asyncio.gather(*(sync(p) for p in batch)))
+            return [r[0] for r in results], sum(1 for r in results if not r[1])
+
+        started = time.perf_counter()
+        latencies, errors = asyncio.run(sweep())
+        return summarize('bridge', latencies, errors, time.perf_counter() - started)
+    finally:
+        os.chdir(cwd)
+
+
+def run_scan_scenario(solana: SolanaRpcStub, accounts: int) -> Dict[str, Any]:
+    """scan: seed N attestations and time a full sharded getProgramAccounts resync."""
+    from solders.keypair import Keypair
+    from hale_attestation_scanner import AttestationIndex, AttestationScanner
+    from hale_rpc_pool import get_solana_pool
+
+    authority = bytes(Keypair().pubkey())
+    print(f"[Bench] Seeding {accounts} attestations...")
+    for i in range(accounts):
+        solana.put_account(str(Keypair().pubkey()), encode_attestation_account(
+            authority, hashlib.sha256(str(i).encode()).digest(), status=2 if i % 2 else 1,
+            outcome_hash=b'\x01' * 32, report_hash=b'\x02' * 32 if i % 2 else None))
+
+    index = AttestationIndex(os.path.join(tempfile.mkdtemp(prefix='hale_bench_'), 'attestations.db'))
+    scanner = AttestationScanner(get_solana_pool(solana.url), HALE_PROGRAM_ID, index)
+    latencies = []
+    scan_shard = scanner.scan_shard
+
+    def timed_shard(*args):
+        started = time.perf_counter()
+        rows = scan_shard(*args)
+        latencies.append(time.perf_counter() - started)
+        return rows
+    scanner.scan_shard = timed_shard
+
+    started = time.perf_counter()
+    stats = scanner.scan()
+    report = summarize('scan', latencies, stats['failed_shards'], time.perf_counter() - started)
+    report['indexed'] = index.count()
+    print(f"[Bench] Indexed {report['indexed']} attestations from {stats['shards']} shards")
+    return report
+
+
+def check_compute_units(solana: SolanaRpcStub) -> Dict[str, Any]:
+    """
+    Compute-unit limits the oracle settled on. Each should be sized from the
+    stub's simulated units; a kind left at the runtime default means the
+    simulation never reached the node, and counts as an error.
+    """
+    from hale_compute_budget import get_compute_budget
+    from hale_rpc_pool import get_solana_pool
+
+    tuner = get_compute_budget(get_solana_pool(solana.url))
+    expected = int(SIMULATED_UNITS * tuner.margin)
+    limits = tuner.status()['unit_limits']
+    unsized = sorted(kind for kind, units in limits.items() if units != expected)
+    if not limits or unsized:
+        print(f"[Bench] Compute units not sized from simulation: {unsized or 'no limits recorded'}")
+    return {'limits': limits, 'expected': expected, 'errors': len(unsized) if limits else 1}
+
+
+def print_report(report: Dict[str, Any]):
+    print("\n" + "=" * 60)
+    print(f"BENCHMARK: {report['scenario']}")
+    print("=" * 60)
+    print(f"  Operations:   {report['count']} ({report['errors']} errors)")
+    print(f"  Wall time:    {report['wall_time_s']}s")
+    print(f"  Throughput:   {report['rps']} req/s")
+    print(f"  Latency mean: {report['mean_ms']} ms")
+    print(f"  Latency p50:  {report['p50_ms']} ms")
+    print(f"  Latency p95:  {report['p95_ms']} ms")
+    print(f"  Latency p99:  {report['p99_ms']} ms")
+    print(f"  Latency max:  {report['max_ms']} ms")
+    if 'compute_units' in report:
+        print(f"  Compute units: {json.dumps(report['compute_units']['limits'], sort_keys=True)}"
+              f" (expected {report['compute_units']['expected']})")
+    for stub_name, counts in report.get('rpc_calls', {}).items():
+        print(f"  {stub_name} RPC calls: {sum(counts.values())} {json.dumps(counts, sort_keys=True)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark HALE against local Gemini/Solana/Arc stubs")
+    parser.add_argument('scenario', choices=['single', 'burst', 'async', 'api', 'bridge', 'scan'])
+    parser.add_argument('--iterations', type=int, default=100, help="Operations for single/burst/api")
+    parser.add_argument('--concurrency', type=int, default=16, help="Worker threads (or in-flight deliveries) for burst/async/api")
+    parser.add_argument('--mappings', type=int, default=10000, help="Bridge mappings for the bridge sweep (accounts for scan)")
+    parser.add_argument('--gemini-latency', type=float, default=0.0, help="Seconds of simulated Gemini latency")
+    parser.add_argument('--gemini-429-every', type=int, default=0, help="Return HTTP 429 on every Nth Gemini call")
+    parser.add_argument('--rpc-latency', type=float, default=0.0, help="Seconds of simulated Solana/Arc RPC latency")
+    parser.add_argument('--json', default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args()
+
+    with GeminiStub(latency=args.gemini_latency, rate_limit_every=args.gemini_429_every) as gemini, \
+            SolanaRpcStub(latency=args.rpc_latency) as solana, \
+            ArcRpcStub(latency=args.rpc_latency) as arc:
+        _configure_environment(gemini, solana, arc)
+
+        if args.scenario == 'single':
+            report = run_oracle_scenario('single', args.iterations, 1)
+        elif args.scenario == 'burst':
+            report = run_oracle_scenario('burst', args.iterations, args.concurrency)
+        elif args.scenario == 'async':
+            report = run_async_scenario(args.iterations, args.concurrency)
+        elif args.scenario == 'api':
+            report = run_api_scenario(args.iterations, args.concurrency)
+        elif args.scenario == 'scan':
+            report = run_scan_scenario(solana, args.mappings)
+        else:
+            report = run_bridge_scenario(solana, args.mappings)
+
+        report['gemini_calls'] = gemini.generate_count
+        report['gemini_429s'] = gemini.rate_limited_count
+        report['rpc_calls'] = {'solana': dict(solana.method_counts), 'arc': dict(arc.method_counts)}
+        if args.scenario in ('single', 'burst', 'async', 'api'):
+            from hale_compute_budget import compute_budget_enabled
+            if compute_budget_enabled():
+                report['compute_units'] = check_compute_units(solana)
+                report['errors'] += report['compute_units']['errors']
+
+    print_report(report)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+HALE Benchmark Stubs
+Local stand-ins for the Gemini API, Solana JSON-RPC and Arc JSON-RPC so the
+pipeline can be measured without touching devnet or Gemini.
+
+Each stub is a ThreadingHTTPServer running on a background thread:
+    with GeminiStub(latency=0.05, rate_limit_every=20) as gemini, \\
+         SolanaRpcStub() as solana, ArcRpcStub() as arc:
+        os.environ['GEMINI_BASE_URL'] = gemini.url
+        ...
+"""
+
+import json
+import time
+import base64
+import hashlib
+import struct
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Any, Optional, List, Callable
+
+from solders.pubkey import Pubkey
+from solders.hash import Hash
+from solders.transaction import Transaction
+
+HALE_PROGRAM_ID = Pubkey.from_string("CnwQj2kPHpTbAvJT3ytzekrp7xd4HEtZJuEua9yn9MMe")
+
+# Anchor account/instruction discriminators
+ATTESTATION_ACCOUNT_DISCRIMINATOR = hashlib.sha256(b"account:Attestation").digest()[:8]
+INITIALIZE_DISCRIMINATOR = hashlib.sha256(b"global:initialize_attestation").digest()[:8]
+SEAL_DISCRIMINATOR = hashlib.sha256(b"global:seal_attestation").digest()[:8]
+AUDIT_DISCRIMINATOR = hashlib.sha256(b"global:audit_attestation").digest()[:8]
+
+# 8 (discriminator) + Attestation::INIT_SPACE
+ATTESTATION_ACCOUNT_SIZE = 8 + 32 + 32 + (4 + 256) + 1 + 33 + 33 + (1 + 4 + 256) + 1
+
+# unitsConsumed reported by simulateTransaction
+SIMULATED_UNITS = 12_000
+
+DEFAULT_VERDICT = {
+    "verdict": "PASS",
+    "confidence_score": 97,
+    "reasoning": "BENCH STUB: Delivery satisfies all acceptance criteria.",
+    "release_funds": True,
+    "risk_flags": []
+}
+
+
+def encode_attestation_account(authority: bytes, intent_hash: bytes, status: int = 0,
+                               metadata_uri: str = "initial_metadata",
+                               outcome_hash: Optional[bytes] = None,
+                               report_hash: Optional[bytes] = None,
+                               bump: int = 255) -> bytes:
+    """
+    Borsh-encode an Attestation account the way the Anchor program lays it out.
+
+    Args:
+        authority: 32-byte authority pubkey
+        intent_hash: 32-byte intent hash
+        status: AttestationStatus value (0=Draft, 1=Sealed, 2=Audited, 3=Disputed)
+        metadata_uri: Metadata URI string
+        outcome_hash: Optional 32-byte outcome hash
+        report_hash: Optional 32-byte report hash
+        bump: PDA bump seed
+
+    Returns:
+        Raw account data padded to the allocated account size
+    """
+    data = ATTESTATION_ACCOUNT_DISCRIMINATOR + bytes(authority) + bytes(intent_hash)
+    uri = metadata_uri.encode()
+    data += struct.pack("<I", len(uri)) + uri
+    data += bytes([status])
+    data += (b"\x01" + outcome_hash) if outcome_hash else b"\x00"
+    data += (b"\x01" + report_hash) if report_hash else b"\x00"
+    data += b"\x00"  # evidence_uri: None
+    data += bytes([bump])
+    return data.ljust(ATTESTATION_ACCOUNT_SIZE, b"\x00")
+
+
+class _StubServer:
+    """Base class: runs a ThreadingHTTPServer on 127.0.0.1 in a daemon thread."""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.request_count = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body go out in separate writes; without this, Nagle plus
+            # delayed ACKs add ~40ms to every keep-alive request
+            disable_nagle_algorithm = True
+
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                stub._dispatch(self, None)
+
+            def do_POST(self):
+                length = int(self.headers.get('Content-Length') or 0)
+                body = self.rfile.read(length) if length else b""
+                stub._dispatch(self, body)
+
+        # Default listen backlog (5) resets connections under burst load
+        server_class = type('_BenchHTTPServer', (ThreadingHTTPServer,), {'request_queue_size': 256})
+        self._server = server_class(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _dispatch(self, handler: BaseHTTPRequestHandler, body: Optional[bytes]):
+        with self._lock:
+            self.request_count += 1
+        if self.latency:
+            time.sleep(self.latency)
+        status, payload = self.handle(handler.path, body)
+        raw = json.dumps(payload).encode()
+        handler.send_response(status)
+        handler.send_header("Content-Type", "application/json")
+        handler.send_header("Content-Length", str(len(raw)))
+        handler.end_headers()
+        handler.wfile.write(raw)
+
+    def handle(self, path: str, body: Optional[bytes]):
+        raise NotImplementedError
+
+
+class GeminiStub(_StubServer):
+    """
+    Minimal Gemini REST API stand-in (models.list and models.generateContent).
+
+    Args:
+        latency: Seconds to sleep before every response
+        rate_limit_every: Return HTTP 429 on every Nth generateContent call (0 disables)
+        verdict: Verdict JSON returned as the model's text
+    """
+
+    MODELS = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash']
+
+    def __init__(self, latency: float = 0.0, rate_limit_every: int = 0,
+                 verdict: Optional[Dict[str, Any]] = None):
+        super().__init__(latency)
+        self.rate_limit_every = rate_limit_every
+        self.verdict = verdict or DEFAULT_VERDICT
+        self.generate_count = 0
+        self.rate_limited_count = 0
+
+    def handle(self, path: str, body: Optional[bytes]):
+        path = path.split('?', 1)[0]
+        if body is None and path.rstrip('/').endswith('/models'):
+            return 200, {'models': [
+                {'name': f'models/{m}', 'supportedGenerationMethods': ['generateContent', 'countTokens']}
+                for m in self.MODELS
+            ]}
+
+        if ':generateContent' in path:
+            with self._lock:
+                self.generate_count += 1
+                throttle = self.rate_limit_every and self.generate_count % self.rate_limit_every == 0
+                if throttle:
+                    self.rate_limited_count += 1
+            if throttle:
+                return 429, {'error': {'code': 429, 'message': 'Resource has been exhausted (e.g. check quota).',
+                                       'status': 'RESOURCE_EXHAUSTED'}}
+            return 200, {
+                'candidates': [{
+                    'content': {'role': 'model', 'parts': [{'text': json.dumps(self.verdict)}]},
+                    'finishReason': 'STOP',
+                    'index': 0
+                }],
+                'usageMetadata': {'promptTokenCount': 100, 'candidatesTokenCount': 50, 'totalTokenCount': 150}
+            }
+
+        return 404, {'error': {'code': 404, 'message': f'Unknown path {path}', 'status': 'NOT_FOUND'}}
+
+
+class _JsonRpcStub(_StubServer):
+    """JSON-RPC 2.0 dispatcher supporting single and batch payloads."""
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.method_counts: Dict[str, int] = {}
+
+    def handle(self, path: str, body: Optional[bytes]):
+        if body is None:
+            return 200, {'status': 'ok'}
+        payload = json.loads(body)
+        if isinstance(payload, list):
+            return 200, [self._call(item) for item in payload]
+        return 200, self._call(payload)
+
+    def _call(self, req: Dict[str, Any]) -> Dict[str, Any]:
+        method = req.get('method')
+        with self._lock:
+            self.method_counts[method] = self.method_counts.get(method, 0) + 1
+        fn: Optional[Callable] = getattr(self, 'rpc_' + str(method), None)
+        if fn is None:
+            return {'jsonrpc': '2.0', 'id': req.get('id'),
+                    'error': {'code': -32601, 'message': f'Method not found: {method}'}}
+        try:
+            return {'jsonrpc': '2.0', 'id': req.get('id'), 'result': fn(*(req.get('params') or []))}
+        except Exception as e:
+            return {'jsonrpc': '2.0', 'id': req.get('id'), 'error': {'code': -32000, 'message': str(e)}}
+
+
+def _matches(account_filter: Dict[str, Any], data: bytes) -> bool:
+    """getProgramAccounts dataSize / memcmp (base64-encoded bytes) filter."""
+    if 'dataSize' in account_filter:
+        return len(data) == account_filter['dataSize']
+    memcmp = account_filter['memcmp']
+    value = base64.b64decode(memcmp['bytes'])
+    return data[memcmp['offset']:memcmp['offset'] + len(value)] == value
+
+
+class SolanaRpcStub(_JsonRpcStub):
+    """
+    Solana JSON-RPC stand-in that stores accounts in memory.
+
+    sendTransaction applies HALE initialize/seal/audit instructions to the
+    stored attestation accounts, so the bridge can read back what the oracle wrote.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        super().__init__(latency)
+        self.accounts: Dict[str, bytes] = {}
+        self.signatures: Dict[str, int] = {}
+        self.slot = 1000
+
+    def put_account(self, pubkey: str, data: bytes):
+        """Seed an account (e.g. a pre-audited attestation)."""
+        with self._lock:
+            self.accounts[str(pubkey)] = data
+
+    def _context(self) -> Dict[str, Any]:
+        return {'slot': self.slot, 'apiVersion': '1.18.0'}
+
+    def _account_value(self, data: Optional[bytes]) -> Optional[Dict[str, Any]]:
+        if data is None:
+            return None
+        return {
+            'data': [base64.b64encode(data).decode(), 'base64'],
+            'executable': False,
+            'lamports': 5_484_480,
+            'owner': str(HALE_PROGRAM_ID),
+            'rentEpoch': 0,
+            'space': len(data)
+        }
+
+    def rpc_getHealth(self):
+        return 'ok'
+
+    def rpc_getLatestBlockhash(self, *args):
+        with self._lock:
+            self.slot += 1
+            slot = self.slot
+        blockhash = Hash(hashlib.sha256(struct.pack("<Q", slot)).digest())
+        return {'context': self._context(), 'value': {'blockhash': str(blockhash), 'lastValidBlockHeight': slot + 150}}
+
+    def rpc_getBlockHeight(self, *args):
+        return self.slot
+
+    def rpc_getAccountInfo(self, pubkey: str, *args):
+        return {'context': self._context(), 'value': self._account_value(self.accounts.get(pubkey))}
+
+    def rpc_getMultipleAccounts(self, pubkeys: List[str], *args):
+        return {'context': self._context(), 'value': [self._account_value(self.accounts.get(p)) for p in pubkeys]}
+
+    def rpc_getSignatureStatuses(self, signatures: List[str], *args):
+        value = []
+        for sig in signatures:
+            slot = self.signatures.get(sig)
+            value.append(None if slot is None else {
+                'slot': slot, 'confirmations': None, 'err': None, 'status': {'Ok': None},
+                'confirmationStatus': 'finalized'
+            })
+        return {'context': self._context(), 'value': value}
+
+    def rpc_getProgramAccounts(self, program_id: str, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        filters = config.get('filters') or []
+        data_slice = config.get('dataSlice')
+        with self._lock:
+            accounts = list(self.accounts.items())
+        matched = []
+        for pubkey, data in accounts:
+            if not all(_matches(f, data) for f in filters):
+                continue
+            if data_slice:
+                data = data[data_slice['offset']:data_slice['offset'] + data_slice['length']]
+            matched.append({'pubkey': pubkey, 'account': self._account_value(data)})
+        return matched
+
+    def rpc_simulateTransaction(self, encoded: str, config: Optional[Dict[str, Any]] = None):
+        config = config or {}
+        txn = Transaction.from_bytes(base64.b64decode(encoded))
+        # As on a node: an unknown blockhash only simulates when the node is asked to replace it
+        if txn.message.recent_blockhash == Hash.default() and not config.get('replaceRecentBlockhash'):
+            return {'context': self._context(), 'value': {
+                'err': 'BlockhashNotFound', 'logs': [], 'accounts': None, 'unitsConsumed': 0, 'returnData': None}}
+        return {'context': self._context(), 'value': {
+            'err': None, 'logs': [], 'accounts': None, 'unitsConsumed': SIMULATED_UNITS, 'returnData': None}}
+
+    def rpc_getRecentPrioritizationFees(self, *args):
+        return [{'slot': self.slot - i, 'prioritizationFee': 1000 * i} for i in range(150)]
+
+    def rpc_sendTransaction(self, encoded: str, *args):
+        txn = Transaction.from_bytes(base64.b64decode(encoded))
+        keys = txn.message.account_keys
+        with self._lock:
+            for ix in txn.message.instructions:
+                if keys[ix.program_id_index] != HALE_PROGRAM_ID:
+                    continue
+                self._apply_instruction(bytes(ix.data), [keys[i] for i in ix.accounts])
+            sig = str(txn.signatures[0])
+            self.signatures[sig] = self.slot
+        return sig
+
+    def _apply_instruction(self, data: bytes, accounts: List[Pubkey]):
+        disc, args = data[:8], data[8:]
+        pda = str(accounts[0])
+        if disc == INITIALIZE_DISCRIMINATOR:
+            uri_len = struct.unpack("<I", args[32:36])[0]
+            self.accounts[pda] = encode_attestation_account(
+                bytes(accounts[1]), args[:32], 0, args[36:36 + uri_len].decode())
+            return
+        existing = self.accounts.get(pda)
+        if existing is None:
+            raise ValueError(f"AccountNotInitialized: {pda}")
+        authority, intent_hash = existing[8:40], existing[40:72]
+        uri_len = struct.unpack("<I", existing[72:76])[0]
+        uri = existing[76:76 + uri_len].decode()
+        if disc == SEAL_DISCRIMINATOR:
+            self.accounts[pda] = encode_attestation_account(authority, intent_hash, 1, uri, outcome_hash=args[:32])
+        elif disc == AUDIT_DISCRIMINATOR:
+            status = 2 if args[32] else 3
+            # Audited attestations need an outcome hash to be bridgeable; reuse the report hash
+            self.accounts[pda] = encode_attestation_account(
+                authority, intent_hash, status, uri, outcome_hash=args[:32], report_hash=args[:32])
+
+
+# keccak('deposits(address)')[:4]
+DEPOSITS_SELECTOR = 'fc7e286d'
+
+
+class ArcRpcStub(_JsonRpcStub):
+    """
+    Arc (EVM) JSON-RPC stand-in. Accepts any signed transaction and mines it
+    immediately with a successful receipt.
+    """
+
+    CHAIN_ID = 5042002
+
+    def __init__(self, latency: float = 0.0, gas_price: int = 1_000_000_000):
+        super().__init__(latency)
+        self.gas_price = gas_price
+        self.block_number = 1
+        self.nonces: Dict[str, int] = {}
+        self.receipts: Dict[str, Dict[str, Any]] = {}
+        # Escrow deposits by seller (lowercase address), returned by deposits(address)
+        self.deposits: Dict[str, int] = {}
+
+    def rpc_web3_clientVersion(self):
+        return 'hale-bench-stub/1.0'
+
+    def rpc_eth_chainId(self):
+        return hex(self.CHAIN_ID)
+
+    def rpc_net_version(self):
+        return str(self.CHAIN_ID)
+
+    def rpc_eth_blockNumber(self):
+        return hex(self.block_number)
+
+    def rpc_eth_gasPrice(self):
+        return hex(self.gas_price)
+
+    def rpc_eth_maxPriorityFeePerGas(self):
+        return hex(self.gas_price // 10)
+
+    def rpc_eth_getBalance(self, address: str, block: str = 'latest'):
+        return hex(10 ** 21)
+
+    def rpc_eth_getTransactionCount(self, address: str, block: str = 'latest'):
+        return hex(self.nonces.get(address.lower(), 0))
+
+    def rpc_eth_estimateGas(self, tx: Dict[str, Any], *args):
+        return hex(60_000)
+
+    def rpc_eth_call(self, tx: Dict[str, Any], *args):
+        data = tx.get('data') or tx.get('input') or ''
+        if data.startswith('0x' + DEPOSITS_SELECTOR):
+            # Escrow.deposits(seller): the seller's seeded balance
+            seller = '0x' + data[-40:]
+            return '0x' + format(self.deposits.get(seller.lower(), 0), '064x')
+        return '0x'
+
+    def rpc_eth_feeHistory(self, block_count, newest_block, percentiles=None):
+        count = int(block_count, 16) if isinstance(block_count, str) else int(block_count)
+        return {
+            'oldestBlock': hex(max(0, self.block_number - count + 1)),
+            'baseFeePerGas': [hex(self.gas_price)] * (count + 1),
+            'gasUsedRatio': [0.5] * count,
+            'reward': [[hex(self.gas_price // 10 * (i + 1)) for i in range(len(percentiles or []))]] * count
+        }
+
+    def rpc_eth_getBlockByNumber(self, block: str, full: bool = False):
+        return {
+            'number': hex(self.block_number), 'hash': '0x' + '11' * 32, 'parentHash': '0x' + '00' * 32,
+            'timestamp': hex(int(time.time())), 'baseFeePerGas': hex(self.gas_price),
+            'gasLimit': hex(30_000_000), 'gasUsed': hex(0), 'transactions': [], 'miner': '0x' + '00' * 20,
+            'difficulty': '0x0', 'extraData': '0x', 'logsBloom': '0x' + '00' * 256, 'nonce': '0x' + '00' * 8,
+            'receiptsRoot': '0x' + '00' * 32, 'sha3Uncles': '0x' + '00' * 32, 'size': '0x0',
+            'stateRoot': '0x' + '00' * 32, 'totalDifficulty': '0x0', 'transactionsRoot': '0x' + '00' * 32,
+            'uncles': []
+        }
+
+    def rpc_eth_sendRawTransaction(self, raw: str):
+        from eth_account import Account
+        from eth_utils import keccak
+        raw_bytes = bytes.fromhex(raw[2:] if raw.startswith('0x') else raw)
+        tx_hash = '0x' + keccak(raw_bytes).hex()
+        sender = Account.recover_transaction(raw_bytes).lower()
+        with self._lock:
+            self.nonces[sender] = self.nonces.get(sender, 0) + 1
+            self.block_number += 1
+            self.receipts[tx_hash] = {
+                'transactionHash': tx_hash, 'transactionIndex': '0x0',
+                'blockHash': '0x' + '22' * 32, 'blockNumber': hex(self.block_number),
+                'from': sender, 'to': None, 'contractAddress': None,
+                'cumulativeGasUsed': hex(50_000), 'gasUsed': hex(50_000),
+                'effectiveGasPrice': hex(self.gas_price), 'logs': [],
+                'logsBloom': '0x' + '00' * 256, 'status': '0x1', 'type': '0x0'
+            }
+        return tx_hash
+
+    def rpc_eth_getTransactionReceipt(self, tx_hash: str):
+        return self.receipts.get(tx_hash)
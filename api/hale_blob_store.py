@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+HALE Blob Store
+Content-addressed, compressed, reference-counted store for delivery bodies.
+
+A delivery body used to be copied whole into every record that mentioned
+the delivery: the journal's 'received' entry (and its in-memory fold, held
+for as long as the delivery is in flight) and the review queue row. Now the
+body is stored once under the hex SHA-256 of its UTF-8 bytes, and records
+carry that hash in place of Delivery_Content:
+
+    externalize(contract_data)   {..., 'delivery_hash': <sha256>}      (stores the body, +1 ref)
+    hydrate(contract_data)       {..., 'Delivery_Content': <body>}     (no-op if the body is inline)
+    release(hash)                -1 ref; the body is deleted at zero
+
+Storing a body that is already present only adds a reference, so repeated
+deliveries cost one stored copy and are not compressed again. The same hash
+is returned in each delivery's result as delivery_hash, ready to use as the
+attestation's outcome hash or evidence reference.
+
+Bodies are compressed with zstd when the zstandard package is installed and
+with gzip otherwise; each row records its codec, so a store can mix both.
+Bodies that do not shrink are kept raw.
+
+Environment:
+    HALE_BLOB_DB      Database path (default api/delivery_blobs.db)
+    HALE_BLOB_CODEC   zstd, gzip or raw (default: zstd if available, else gzip)
+"""
+
+import os
+import gzip
+import zlib
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, Union, BinaryIO
+
+from hale_logging import get_logger
+
+try:
+    import zstandard
+except ImportError:  # optional; gzip is used instead
+    zstandard = None
+
+log = get_logger('blobs')
+
+CONTENT_FIELD = 'Delivery_Content'
+HASH_FIELD = 'delivery_hash'
+
+ZSTD_LEVEL = 3
+GZIP_LEVEL = 6
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    hash         TEXT PRIMARY KEY,
+    codec        TEXT NOT NULL,
+    size         INTEGER NOT NULL,
+    stored_size  INTEGER NOT NULL,
+    refcount     INTEGER NOT NULL,
+    created_at   REAL NOT NULL,
+    data         BLOB NOT NULL
+);
+"""
+
+
+def content_hash(data: Union[str, bytes]) -> str:
+    """Hex SHA-256 a body is stored under."""
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return hashlib.sha256(data).hexdigest()
+
+
+def _default_codec() -> str:
+    codec = os.getenv('HALE_BLOB_CODEC') or ('zstd' if zstandard else 'gzip')
+    if codec == 'zstd' and zstandard is None:
+        log.warning("zstandard is not installed; compressing blobs with gzip")
+        codec = 'gzip'
+    return codec
+
+
+def _compress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+    if codec == 'gzip':
+        # mtime=0: identical bodies compress to identical bytes
+        return gzip.compress(data, GZIP_LEVEL, mtime=0)
+    return data
+
+
+def _compressor(codec: str):
+    """Streaming compressor (compress/flush) producing the same format as _compress, or None for raw."""
+    if codec == 'zstd':
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL).compressobj()
+    if codec == 'gzip':
+        # wbits 31: gzip container, mtime 0
+        return zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+    return None
+
+
+def _decompress(codec: str, data: bytes) -> bytes:
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("Blob is zstd-compressed but zstandard is not installed")
+        return zstandard.ZstdDecompressor().decompress(data)
+    if codec == 'gzip':
+        return gzip.decompress(data)
+    return data
+
+
+class BlobStore:
+    """SQLite blob table keyed by content hash; safe to share between threads."""
+
+    def __init__(self, path: Optional[str] = None, codec: Optional[str] = None):
+        self.path = path or os.getenv('HALE_BLOB_DB') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'delivery_blobs.db')
+        self.codec = codec or _default_codec()
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+
+    def put(self, data: Union[str, bytes]) -> str:
+        """Store data (or add a reference to the existing copy); returns its hash."""
+        if isinstance(data, str):
+            data = data.encode('utf-8')
+        digest = content_hash(data)
+        if self.incref(digest):
+            return digest
+        # Compress outside the lock; a concurrent put of the same body just adds a reference
+        codec = self.codec
+        stored = _compress(codec, data)
+        if len(stored) >= len(data):
+            codec, stored = 'raw', data
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO blobs VALUES (?, ?, ?, ?, 1, ?, ?) '
+                'ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1',
+                (digest, codec, len(data), len(stored), time.time(), stored))
+        return digest
+
+    def put_file(self, f: BinaryIO, digest: str) -> str:
+        """
+        Store the rest of file f, whose SHA-256 the caller already computed
+        while receiving it (see hale_upload), compressing it chunk by chunk.
+        """
+        if self.incref(digest):
+            return digest
+        start = f.tell()
+        codec, size = self.codec, 0
+        compressor = _compressor(codec)
+        parts = []
+        for chunk in iter(lambda: f.read(STREAM_CHUNK_SIZE), b''):
+            size += len(chunk)
+            parts.append(compressor.compress(chunk) if compressor else chunk)
+        if compressor:
+            parts.append(compressor.flush())
+        stored = b''.join(parts)
+        if compressor and len(stored) >= size:
+            f.seek(start)
+            codec, stored = 'raw', f.read()
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO blobs VALUES (?, ?, ?, ?, 1, ?, ?) '
+                'ON CONFLICT (hash) DO UPDATE SET refcount = refcount + 1',
+                (digest, codec, size, len(stored), time.time(), stored))
+        return digest
+
+    def incref(self, digest: str) -> bool:
+        """Add a reference to a stored blob; False if it is not stored."""
+        with self._lock:
+            return self._db.execute('UPDATE blobs SET refcount = refcount + 1 WHERE hash = ?',
+                                    (digest,)).rowcount > 0
+
+    def release(self, digest: str):
+        """Drop a reference; the blob is deleted when none are left."""
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.execute('UPDATE blobs SET refcount = refcount - 1 WHERE hash = ?', (digest,))
+                self._db.execute('DELETE FROM blobs WHERE hash = ? AND refcount <= 0', (digest,))
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def get(self, digest: str) -> Optional[bytes]:
+        """The stored bytes, checked against their hash; None if not stored."""
+        with self._lock:
+            row = self._db.execute('SELECT codec, data FROM blobs WHERE hash = ?', (digest,)).fetchone()
+        if row is None:
+            return None
+        data = _decompress(row[0], row[1])
+        if content_hash(data) != digest:
+            raise ValueError(f"Blob {digest} is corrupt")
+        return data
+
+    def get_text(self, digest: str) -> Optional[str]:
+        data = self.get(digest)
+        return data.decode('utf-8') if data is not None else None
+
+    # --- CONTRACT DATA ---
+
+    def externalize(self, contract_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of contract_data with the delivery body stored here and replaced by its hash."""
+        content = contract_data.get(CONTENT_FIELD)
+        if not isinstance(content, str):
+            return dict(contract_data)
+        record = {k: v for k, v in contract_data.items() if k != CONTENT_FIELD}
+        record[HASH_FIELD] = self.put(content)
+        return record
+
+    def hydrate(self, contract_data: Dict[str, Any]) -> Dict[str, Any]:
+        """Copy of an externalized contract_data with the delivery body restored."""
+        return hydrate(contract_data, self)
+
+    def release_ref(self, contract_data: Optional[Dict[str, Any]]):
+        """Release the body an externalized contract_data refers to (no-op if it is inline)."""
+        if contract_data and contract_data.get(HASH_FIELD) and CONTENT_FIELD not in contract_data:
+            self.release(contract_data[HASH_FIELD])
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            count, size, stored, refs = self._db.execute(
+                'SELECT COUNT(*), COALESCE(SUM(size), 0), COALESCE(SUM(stored_size), 0), '
+                'COALESCE(SUM(refcount), 0) FROM blobs').fetchone()
+        return {'blobs': count, 'references': refs, 'bytes': size, 'stored_bytes': stored, 'codec': self.codec}
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+def hydrate(contract_data: Dict[str, Any], store: Optional[BlobStore] = None) -> Dict[str, Any]:
+    """
+    contract_data with its delivery body inline. Returned unchanged (without
+    opening the store) when the body is already inline.
+
+    Raises:
+        KeyError: The referenced body is not in the store
+    """
+    if CONTENT_FIELD in contract_data or not contract_data.get(HASH_FIELD):
+        return contract_data
+    content = (store or get_blob_store()).get_text(contract_data[HASH_FIELD])
+    if content is None:
+        raise KeyError(f"Delivery body {contract_data[HASH_FIELD]} is not in the blob store")
+    return {**contract_data, CONTENT_FIELD: content}
+
+
+_store: Optional[BlobStore] = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store() -> BlobStore:
+    """Process-wide blob store (HALE_BLOB_DB)."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = BlobStore()
+    return _store
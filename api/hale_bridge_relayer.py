@@ -5,26 +5,36 @@ Syncs Solana attestation state to Arc Network escrow decisions
 """
 
 import os
-import json
 import time
 import asyncio
 from typing import Dict, Any, Optional
 from datetime import datetime
 
 # Solana imports
-from solana.rpc.async_api import AsyncClient
 from solders.pubkey import Pubkey
 from solders.signature import Signature
 from anchorpy import Provider, Wallet, Program, Context
 from anchorpy.provider import DEFAULT_OPTIONS
 
 # Arc imports
-from hale_oracle_backend import HaleOracle
+from hale_async_oracle import AsyncHaleOracle
+from hale_settlement_batcher import SettlementBatcher, settlement_succeeded
+from hale_bridge_store import BridgeStore
+from hale_bridge_scheduler import SyncScheduler
 from solana_attestation_parser import (
     parse_attestation_account,
     is_attestation_ready_for_bridge,
     get_verdict_from_attestation
 )
+from hale_metrics import (
+    BRIDGE_PENDING,
+    BRIDGE_SYNCS,
+    CACHE_HITS,
+    RPC_ERRORS,
+    start_metrics_server
+)
+from hale_logging import get_logger, correlation_scope
+from hale_rpc_pool import get_solana_pool, pool_status
 
 # Load environment
 try:
@@ -35,6 +45,9 @@ except:
     pass
 
 
+log = get_logger('bridge')
+
+
 class HaleBridge:
     """
     Cross-chain bridge that syncs HALE attestations from Solana to Arc escrow
@@ -58,40 +71,27 @@ class HaleBridge:
         self.arc_rpc_url = arc_rpc_url or os.getenv('ARC_RPC_URL')
         self.gemini_api_key = gemini_api_key or os.getenv('GEMINI_API_KEY')
         
-        # Initialize Arc Oracle
-        self.arc_oracle = HaleOracle(self.gemini_api_key, self.arc_rpc_url)
+        # Initialize Arc Oracle (async, so settlements don't stall the monitor loop)
+        self.arc_oracle = AsyncHaleOracle(self.gemini_api_key, self.arc_rpc_url)
+        # Syncs completing close together settle in one batch (pipelined nonces or multicall)
+        self.settlement_batcher = SettlementBatcher(self.arc_oracle)
+        
+        # Shared keep-alive Solana RPC pool (solana_rpc_url plus SOLANA_RPC_URLS)
+        self.solana_rpc = get_solana_pool(self.solana_rpc_url)
         
         # Solana program ID
         self.program_id = Pubkey.from_string("CnwQj2kPHpTbAvJT3ytzekrp7xd4HEtZJuEua9yn9MMe")
         
-        # Bridge state
-        self.bridge_mappings_file = 'bridge_mappings.json'
-        self.bridge_mappings = self._load_mappings()
-        self.synced_attestations = set()
+        # Bridge state: mappings and their sync status (SQLite, see hale_bridge_store)
+        self.store = BridgeStore()
         self.mock_attestations = {}
+        # Picks each tick's syncs by escrow value, age and retries (see hale_bridge_scheduler)
+        self.scheduler = SyncScheduler(self)
         
-        print(f"[Bridge] Initialized")
-        print(f"[Bridge] Solana RPC: {solana_rpc_url}")
-        print(f"[Bridge] Arc RPC: {self.arc_rpc_url}")
-        print(f"[Bridge] Program ID: {self.program_id}")
-    
-    def _load_mappings(self) -> Dict[str, Any]:
-        """Load bridge mappings from file"""
-        if os.path.exists(self.bridge_mappings_file):
-            try:
-                with open(self.bridge_mappings_file, 'r') as f:
-                    return json.load(f)
-            except Exception as e:
-                print(f"[Bridge] Error loading mappings: {e}")
-        return {}
-    
-    def _save_mappings(self):
-        """Save bridge mappings to file"""
-        try:
-            with open(self.bridge_mappings_file, 'w') as f:
-                json.dump(self.bridge_mappings, f, indent=2)
-        except Exception as e:
-            print(f"[Bridge] Error saving mappings: {e}")
+        # Counted from the status index at scrape time
+        BRIDGE_PENDING.set_function(lambda: self.store.count('pending'))
+        
+        log.info("Bridge initialized", solana_rpc=solana_rpc_url, arc_rpc=self.arc_rpc_url, program_id=str(self.program_id))
     
     def register_mapping(
         self,
@@ -109,17 +109,16 @@ class HaleBridge:
         """
         mapping_id = solana_attestation
         
-        self.bridge_mappings[mapping_id] = {
-            'solana_attestation': solana_attestation,
+        self.store.put({
+            'solana_attestation': mapping_id,
             'arc_seller': arc_seller.lower(),
             'arc_escrow': arc_escrow.lower() if arc_escrow else None,
             'status': 'pending',
             'created_at': datetime.now().isoformat(),
             'synced_at': None
-        }
+        })
         
-        self._save_mappings()
-        print(f"[Bridge] Registered mapping: {solana_attestation[:8]}... → {arc_seller}")
+        log.info("Registered mapping", attestation=solana_attestation, arc_seller=arc_seller)
     
     def inject_mock_attestation(self, attestation_pubkey: str, status: str = 'Audited'):
         """
@@ -143,7 +142,7 @@ class HaleBridge:
             'metadata_uri': 'ipfs://mock',
             'authority': '0x876f7ee6D6AA43c5A6cC13c05522eb47363E5907'
         }
-        print(f"[Bridge] Injected mock attestation: {attestation_pubkey} with intent: {mock_intent[:16]}...")
+        log.info("Injected mock attestation", attestation=attestation_pubkey, intent_hash=mock_intent)
 
     async def fetch_attestation(self, attestation_pubkey: Pubkey) -> Optional[Dict[str, Any]]:
         """
@@ -160,15 +159,11 @@ class HaleBridge:
             return self.mock_attestations[str(attestation_pubkey)]
 
         try:
-            client = AsyncClient(self.solana_rpc_url)
-            # ... rest of existing code ...
-            
             # Fetch account data
-            response = await client.get_account_info(attestation_pubkey)
+            response = await self.solana_rpc.aio.get_account_info(attestation_pubkey)
             
             if not response.value:
-                print(f"[Bridge] Attestation not found: {attestation_pubkey}")
-                await client.close()
+                log.warning("Attestation not found", attestation=str(attestation_pubkey))
                 return None
             
             account_data = response.value.data
@@ -177,20 +172,17 @@ class HaleBridge:
             attestation = parse_attestation_account(account_data)
             
             if not attestation:
-                print(f"[Bridge] Failed to parse attestation data")
-                await client.close()
+                log.error("Failed to parse attestation data", attestation=str(attestation_pubkey))
                 return None
             
             # Add pubkey to result
             attestation['pubkey'] = str(attestation_pubkey)
             
-            await client.close()
             return attestation
             
         except Exception as e:
-            print(f"[Bridge] Error fetching attestation: {e}")
-            import traceback
-            traceback.print_exc()
+            log.error("Error fetching attestation", error=str(e), exc_info=True)
+            RPC_ERRORS.inc(chain='solana', operation='get_account_info')
             return None
     
     async def sync_attestation_to_arc(
@@ -208,37 +200,46 @@ class HaleBridge:
         Returns:
             True if synced successfully
         """
-        # Check if already synced
-        if solana_attestation_pubkey in self.synced_attestations and not force:
-            print(f"[Bridge] Already synced: {solana_attestation_pubkey[:8]}...")
-            return True
-        
+        with correlation_scope(solana_attestation_pubkey):
+            outcome = await self._sync(solana_attestation_pubkey, force)
+            # Not ready or failed: back off before the next attempt
+            self.scheduler.record(solana_attestation_pubkey, outcome)
+            return outcome in ('synced', 'already_synced')
+    
+    async def _sync(self, solana_attestation_pubkey: str, force: bool) -> str:
+        """Sync one attestation; returns the outcome (synced, already_synced, no_mapping, fetch_failed, not_ready, arc_failed)."""
         # Get mapping
-        mapping = self.bridge_mappings.get(solana_attestation_pubkey)
+        mapping = self.store.get(solana_attestation_pubkey)
         if not mapping:
-            print(f"[Bridge] No mapping found for: {solana_attestation_pubkey[:8]}...")
-            return False
+            log.warning("No mapping found")
+            return 'no_mapping'
+        
+        # Check if already synced (durable across restarts)
+        if mapping['status'] == 'synced' and not force:
+            log.debug("Already synced")
+            CACHE_HITS.inc(cache='bridge_synced')
+            return 'already_synced'
         
-        print(f"\n[Bridge] Syncing attestation: {solana_attestation_pubkey[:8]}...")
+        log.info("Syncing attestation")
         
         # Fetch attestation from Solana
         attestation_pubkey = Pubkey.from_string(solana_attestation_pubkey)
         attestation = await self.fetch_attestation(attestation_pubkey)
         
         if not attestation:
-            print(f"[Bridge] Failed to fetch attestation")
-            return False
+            log.warning("Failed to fetch attestation")
+            BRIDGE_SYNCS.inc(outcome='fetch_failed')
+            return 'fetch_failed'
         
         # Display attestation details
-        print(f"[Bridge] Attestation fetched from Solana")
-        print(f"[Bridge] Status: {attestation.get('status')}")
-        print(f"[Bridge] Intent Hash: {attestation.get('intent_hash', 'N/A')[:16]}...")
-        print(f"[Bridge] Outcome Hash: {attestation.get('outcome_hash', 'N/A')[:16] if attestation.get('outcome_hash') else 'None'}...")
+        log.info("Attestation fetched from Solana", status=attestation.get('status'),
+                 intent_hash=attestation.get('intent_hash'), outcome_hash=attestation.get('outcome_hash'))
         
         # Check if ready for bridge
         if not is_attestation_ready_for_bridge(attestation):
-            print(f"[Bridge] Attestation not ready for bridge (status: {attestation.get('status')})")
-            return False
+            log.info("Attestation not ready for bridge", status=attestation.get('status'))
+            BRIDGE_SYNCS.inc(outcome='not_ready')
+            return 'not_ready'
         
         # Get Arc seller address
         arc_seller = mapping['arc_seller']
@@ -248,36 +249,31 @@ class HaleBridge:
         transaction_id = f"solana_{attestation['intent_hash'][:16]}"
         
         # Trigger Arc escrow action
-        print(f"[Bridge] Triggering Arc escrow action...")
-        print(f"[Bridge] Seller: {arc_seller}")
-        print(f"[Bridge] Escrow: {arc_escrow}")
+        log.info("Triggering Arc escrow action", seller=arc_seller, escrow=arc_escrow)
         
         # Convert attestation to verdict
         verdict = get_verdict_from_attestation(attestation)
         
-        # Trigger smart contract
-        success = self.arc_oracle.trigger_smart_contract(
+        # Queue the settlement for the current batch window
+        settlement = await self.settlement_batcher.settle(
             verdict=verdict,
             seller_address=arc_seller,
             transaction_id=transaction_id,
             contract_address=arc_escrow
         )
         
-        if success:
-            # Update mapping
-            mapping['status'] = 'synced'
-            mapping['synced_at'] = datetime.now().isoformat()
-            self._save_mappings()
-            
-            # Mark as synced
-            self.synced_attestations.add(solana_attestation_pubkey)
-            
-            print(f"[Bridge] ✅ Successfully synced to Arc!")
-            return True
+        if settlement_succeeded(settlement):
+            # Mark as synced (one row update)
+            self.store.mark_synced(solana_attestation_pubkey, datetime.now().isoformat())
+        
+            log.info("Successfully synced to Arc", tx_hash=settlement.get('tx_hash'), via=settlement.get('via'))
+            BRIDGE_SYNCS.inc(outcome='synced')
+            return 'synced'
         else:
-            print(f"[Bridge] ❌ Failed to sync to Arc")
-            return False
-    
+            log.error("Failed to sync to Arc", status=settlement.get('status'), error=settlement.get('error'))
+            BRIDGE_SYNCS.inc(outcome='arc_failed')
+            return 'arc_failed'
+        
     async def monitor_solana_events(self, poll_interval: int = 10):
         """
         Monitor Solana for new attestation events
@@ -285,38 +281,35 @@ class HaleBridge:
         Args:
             poll_interval: Seconds between polls
         """
-        print(f"\n[Bridge] Starting Solana event monitor...")
-        print(f"[Bridge] Poll interval: {poll_interval}s")
+        log.info("Starting Solana event monitor", poll_interval=poll_interval)
         
         while True:
             try:
-                # Check all registered mappings
-                for attestation_pubkey, mapping in self.bridge_mappings.items():
-                    if mapping['status'] == 'pending':
-                        print(f"\n[Bridge] Checking pending attestation: {attestation_pubkey[:8]}...")
-                        
-                        # Try to sync
-                        await self.sync_attestation_to_arc(attestation_pubkey)
+                # This tick's budget of pending mappings, most valuable first;
+                # they sync concurrently so their settlements batch
+                summary = await self.scheduler.tick()
+                log.debug("Checked pending attestations", **summary)
                 
                 # Wait before next poll
                 await asyncio.sleep(poll_interval)
                 
             except KeyboardInterrupt:
-                print(f"\n[Bridge] Shutting down...")
+                log.info("Shutting down")
                 break
             except Exception as e:
-                print(f"[Bridge] Error in monitor loop: {e}")
+                log.error("Error in monitor loop", error=str(e))
                 await asyncio.sleep(poll_interval)
     
     def get_bridge_status(self) -> Dict[str, Any]:
         """Get current bridge status"""
         return {
-            'total_mappings': len(self.bridge_mappings),
-            'synced_count': len(self.synced_attestations),
-            'pending_count': sum(1 for m in self.bridge_mappings.values() if m['status'] == 'pending'),
+            'total_mappings': len(self.store),
+            'synced_count': self.store.count('synced'),
+            'pending_count': self.store.count('pending'),
             'solana_rpc': self.solana_rpc_url,
             'arc_rpc': self.arc_rpc_url,
-            'arc_oracle_connected': self.arc_oracle.web3 and self.arc_oracle.web3.is_connected()
+            'arc_oracle_connected': self.arc_oracle.web3 and self.arc_oracle.web3.is_connected(),
+            'rpc_endpoints': pool_status()
         }
 
 
@@ -328,6 +321,10 @@ async def main():
     print("=" * 60)
     print()
     
+    # Optional Prometheus endpoint for the standalone relayer
+    if os.getenv('HALE_METRICS_PORT'):
+        start_metrics_server(int(os.getenv('HALE_METRICS_PORT')))
+    
     # Initialize bridge
     bridge = HaleBridge()
     
@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+"""
+HALE Bridge Sync Scheduler
+Decides which pending attestations the bridge syncs on each monitor tick.
+
+Each tick has an RPC budget: at most HALE_BRIDGE_SYNC_BUDGET syncs (one
+Solana account read each, settlements batched) and at most
+HALE_BRIDGE_BALANCE_BUDGET escrow deposits() reads. Pending mappings are
+taken from the store in priority order:
+
+    priority = log10(1 + escrow balance) + age / HALE_BRIDGE_AGE_SCALE - retries
+
+so one decade of escrow value is worth AGE_SCALE seconds of waiting, and
+each failed attempt costs one decade. Under a backlog the most valuable
+settlements clear first, while old low-value ones still rise over time.
+
+Attestations that are not bridgeable yet (Draft or Sealed) and failed
+syncs are backed off exponentially (BACKOFF_BASE * 2^retries, capped at
+BACKOFF_MAX) instead of being fetched again on every tick. Balances are
+cached per (escrow, seller) for HALE_BRIDGE_BALANCE_TTL seconds; mappings
+whose balance was never read are refreshed first.
+
+Environment:
+    HALE_BRIDGE_SYNC_BUDGET      Syncs started per tick (default 100)
+    HALE_BRIDGE_BALANCE_BUDGET   Escrow balance reads per tick (default 100)
+    HALE_BRIDGE_AGE_SCALE        Seconds of waiting worth one decade of escrow value (default 3600)
+    HALE_BRIDGE_BACKOFF_BASE     First retry delay in seconds (default 10)
+    HALE_BRIDGE_BACKOFF_MAX      Longest retry delay in seconds (default 3600)
+    HALE_BRIDGE_BALANCE_TTL      Seconds an escrow balance is reused (default 300)
+"""
+
+import os
+import math
+import time
+import asyncio
+from collections import Counter
+from typing import Dict, Any, Optional, List
+
+from hale_logging import get_logger
+
+log = get_logger('bridge.scheduler')
+
+# Sync outcomes that leave nothing to retry
+SETTLED_OUTCOMES = ('synced', 'already_synced', 'no_mapping')
+
+
+class SyncScheduler:
+    """Budgeted, priority-ordered selection of bridge syncs over a BridgeStore."""
+
+    def __init__(self, bridge, sync_budget: Optional[int] = None, balance_budget: Optional[int] = None,
+                 age_scale: Optional[float] = None, backoff_base: Optional[float] = None,
+                 backoff_max: Optional[float] = None, balance_ttl: Optional[float] = None):
+        self.bridge = bridge
+        self.store = bridge.store
+        self.sync_budget = int(sync_budget or os.getenv('HALE_BRIDGE_SYNC_BUDGET', '100'))
+        self.balance_budget = int(balance_budget or os.getenv('HALE_BRIDGE_BALANCE_BUDGET', '100'))
+        self.age_scale = float(age_scale or os.getenv('HALE_BRIDGE_AGE_SCALE', '3600'))
+        self.backoff_base = float(backoff_base or os.getenv('HALE_BRIDGE_BACKOFF_BASE', '10'))
+        self.backoff_max = float(backoff_max or os.getenv('HALE_BRIDGE_BACKOFF_MAX', '3600'))
+        self.balance_ttl = float(balance_ttl or os.getenv('HALE_BRIDGE_BALANCE_TTL', '300'))
+
+    def backoff(self, retries: int) -> float:
+        """Delay before the next attempt after `retries` failed ones."""
+        return min(self.backoff_max, self.backoff_base * 2 ** max(0, retries - 1))
+
+    def record(self, solana_attestation: str, outcome: str):
+        """Back off an attestation whose sync did not settle it."""
+        if outcome in SETTLED_OUTCOMES:
+            return
+        mapping = self.store.get(solana_attestation)
+        if not mapping:
+            return
+        delay = self.backoff(mapping['retries'] + 1)
+        self.store.defer(solana_attestation, outcome, time.time() + delay)
+        log.debug("Sync deferred", attestation=solana_attestation, outcome=outcome,
+                  retries=mapping['retries'] + 1, delay_s=delay)
+
+    async def _read_balance(self, arc_escrow: Optional[str], arc_seller: str) -> Optional[int]:
+        oracle = self.bridge.arc_oracle
+        w3 = oracle.async_web3
+        escrow = arc_escrow or os.getenv('ESCROW_CONTRACT_ADDRESS')
+        if not w3 or not escrow:
+            return None
+        try:
+            contract = w3.eth.contract(address=w3.to_checksum_address(escrow), abi=oracle.escrow_abi)
+            return await contract.functions.deposits(w3.to_checksum_address(arc_seller)).call()
+        except Exception as e:
+            log.debug("Escrow balance read failed", escrow=escrow, seller=arc_seller, error=str(e))
+            return None
+
+    async def refresh_balances(self) -> int:
+        """Read escrow balances for stale (escrow, seller) pairs, within the balance budget."""
+        now = time.time()
+        stale = self.store.stale_balances(now - self.balance_ttl, self.balance_budget)
+        if not stale:
+            return 0
+        # Concurrent reads go out as one JSON-RPC batch through the Arc pool
+        balances = await asyncio.gather(*(self._read_balance(escrow, seller) for escrow, seller in stale))
+        for (escrow, seller), balance in zip(stale, balances):
+            value_score = math.log10(1 + balance) if balance else 0.0
+            self.store.set_balance(escrow, seller, balance, value_score, now)
+        return len(stale)
+
+    async def plan(self) -> List[str]:
+        """Attestations to sync this tick, highest priority first."""
+        await self.refresh_balances()
+        return self.store.due(time.time(), self.sync_budget, self.age_scale)
+
+    async def tick(self) -> Dict[str, Any]:
+        """Sync one budget's worth of pending attestations concurrently (settlements batch)."""
+        batch = await self.plan()
+        results = await asyncio.gather(*(self.bridge.sync_attestation_to_arc(pubkey) for pubkey in batch))
+        outcomes = Counter('synced' if ok else 'deferred' for ok in results)
+        log.debug("Scheduler tick", planned=len(batch), **outcomes)
+        return {'planned': len(batch), **outcomes}
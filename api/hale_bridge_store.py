@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+HALE Bridge Mapping Store
+SQLite-backed store for Solana attestation -> Arc seller mappings and their
+sync state, replacing the bridge_mappings.json rewrite on every change.
+
+Each register or sync touches one row, so writes stay O(1) however many
+mappings exist. The database runs in WAL mode: a crash mid-write leaves the
+last committed state intact instead of a truncated JSON file. Sync state
+lives in the same row, so an attestation synced before a restart is not
+settled again after it. Pending scans and counts come from the index on
+status rather than a walk over every mapping.
+
+Rows also carry the sync scheduler's state (hale_bridge_scheduler): retry
+count, next attempt time, last outcome and the cached escrow balance. due()
+returns pending mappings whose backoff has expired in priority order;
+SQLite keeps only the top `limit` rows while scanning the due index.
+
+A legacy bridge_mappings.json next to the database is imported the first
+time the database is opened empty, then renamed to *.migrated.
+
+Environment:
+    HALE_BRIDGE_DB               Database path (default bridge_mappings.db)
+    HALE_BRIDGE_DB_SYNCHRONOUS   SQLite synchronous level: NORMAL survives process
+                                 crashes, FULL also power loss (default NORMAL)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Dict, Any, Optional, List, Iterable, Tuple
+
+from hale_logging import get_logger
+
+log = get_logger('bridge.store')
+
+# Legacy store, imported once into an empty database
+LEGACY_MAPPINGS_FILE = 'bridge_mappings.json'
+
+MAPPING_FIELDS = ('solana_attestation', 'arc_seller', 'arc_escrow', 'status', 'created_at', 'synced_at')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS mappings (
+    solana_attestation TEXT PRIMARY KEY,
+    arc_seller         TEXT NOT NULL,
+    arc_escrow         TEXT,
+    status             TEXT NOT NULL DEFAULT 'pending',
+    created_at         TEXT,
+    synced_at          TEXT
+);
+"""
+
+# Scheduler columns, added in place to databases created before them
+_SCHEDULER_COLUMNS = {
+    'created_ts': 'REAL NOT NULL DEFAULT 0',
+    'retries': 'INTEGER NOT NULL DEFAULT 0',
+    'next_attempt_at': 'REAL NOT NULL DEFAULT 0',
+    'last_outcome': 'TEXT',
+    'escrow_balance': 'TEXT',
+    'value_score': 'REAL NOT NULL DEFAULT 0',
+    'balance_checked_at': 'REAL NOT NULL DEFAULT 0',
+}
+
+_INDEXES = """
+CREATE INDEX IF NOT EXISTS mappings_status ON mappings (status);
+CREATE INDEX IF NOT EXISTS mappings_due ON mappings (status, next_attempt_at);
+CREATE INDEX IF NOT EXISTS mappings_balance ON mappings (status, balance_checked_at);
+"""
+
+
+def _created_ts(created_at: Optional[str]) -> float:
+    try:
+        return datetime.fromisoformat(created_at).timestamp()
+    except (TypeError, ValueError):
+        return time.time()
+
+
+class BridgeStore:
+    """Keyed mapping store; safe to share between the event loop and the metrics thread."""
+
+    def __init__(self, path: Optional[str] = None, legacy_path: Optional[str] = None):
+        self.path = path or os.getenv('HALE_BRIDGE_DB', 'bridge_mappings.db')
+        synchronous = os.getenv('HALE_BRIDGE_DB_SYNCHRONOUS', 'NORMAL').upper()
+        if synchronous not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+            synchronous = 'NORMAL'
+        self._lock = threading.Lock()
+        # Autocommit: every statement outside an explicit BEGIN is its own transaction
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute(f'PRAGMA synchronous={synchronous}')
+        self._db.executescript(_SCHEMA)
+        self._add_scheduler_columns()
+        self._db.executescript(_INDEXES)
+        self._migrate_legacy(legacy_path or os.path.join(os.path.dirname(self.path), LEGACY_MAPPINGS_FILE))
+
+    def _add_scheduler_columns(self):
+        existing = {row['name'] for row in self._db.execute('PRAGMA table_info(mappings)')}
+        missing = [name for name in _SCHEDULER_COLUMNS if name not in existing]
+        for name in missing:
+            self._db.execute(f'ALTER TABLE mappings ADD COLUMN {name} {_SCHEDULER_COLUMNS[name]}')
+        if 'created_ts' in missing:
+            rows = self._db.execute('SELECT solana_attestation, created_at FROM mappings').fetchall()
+            self._db.executemany('UPDATE mappings SET created_ts = ? WHERE solana_attestation = ?',
+                                 [(_created_ts(row['created_at']), row['solana_attestation']) for row in rows])
+
+    def _migrate_legacy(self, legacy_path: str):
+        if not os.path.exists(legacy_path) or len(self):
+            return
+        try:
+            with open(legacy_path, 'r') as f:
+                mappings = json.load(f)
+        except Exception as e:
+            log.error("Error loading legacy mappings", path=legacy_path, error=str(e))
+            return
+        self.put_many(mappings.values())
+        os.replace(legacy_path, legacy_path + '.migrated')
+        log.info("Migrated legacy bridge mappings", path=legacy_path, mappings=len(mappings))
+
+    # --- READS ---
+
+    def get(self, solana_attestation: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            row = self._db.execute('SELECT * FROM mappings WHERE solana_attestation = ?',
+                                   (solana_attestation,)).fetchone()
+        return dict(row) if row else None
+
+    def pending(self, limit: Optional[int] = None) -> List[str]:
+        """Attestation pubkeys still waiting to sync (from the status index)."""
+        query = "SELECT solana_attestation FROM mappings WHERE status = 'pending'"
+        params: tuple = ()
+        if limit is not None:
+            query += ' LIMIT ?'
+            params = (limit,)
+        with self._lock:
+            return [row[0] for row in self._db.execute(query, params)]
+
+    def due(self, now: float, limit: int, age_scale: float) -> List[str]:
+        """
+        Up to `limit` pending attestations whose backoff has expired, highest
+        priority first: value_score + age / age_scale - retries. The age term
+        grows at the same rate for every row, so ordering by created_ts
+        instead of age gives the same order.
+        """
+        with self._lock:
+            return [row[0] for row in self._db.execute(
+                "SELECT solana_attestation FROM mappings WHERE status = 'pending' AND next_attempt_at <= ? "
+                "ORDER BY value_score - created_ts / ? - retries DESC LIMIT ?",
+                (now, age_scale, limit))]
+
+    def stale_balances(self, checked_before: float, limit: int) -> List[Tuple[Optional[str], str]]:
+        """Distinct (arc_escrow, arc_seller) of pending mappings with no balance checked since checked_before."""
+        with self._lock:
+            return [(row[0], row[1]) for row in self._db.execute(
+                "SELECT DISTINCT arc_escrow, arc_seller FROM mappings "
+                "WHERE status = 'pending' AND balance_checked_at < ? ORDER BY balance_checked_at LIMIT ?",
+                (checked_before, limit))]
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._db.execute('SELECT COUNT(*) FROM mappings').fetchone()[0]
+            return self._db.execute('SELECT COUNT(*) FROM mappings WHERE status = ?', (status,)).fetchone()[0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def __contains__(self, solana_attestation: str) -> bool:
+        return self.get(solana_attestation) is not None
+
+    # --- WRITES ---
+
+    @staticmethod
+    def _row(mapping: Dict[str, Any]) -> tuple:
+        return tuple(mapping.get(field) or 'pending' if field == 'status' else mapping.get(field)
+                     for field in MAPPING_FIELDS) + (_created_ts(mapping.get('created_at')),)
+
+    def put(self, mapping: Dict[str, Any]):
+        """Insert or replace one mapping."""
+        self.put_many([mapping])
+
+    def put_many(self, mappings: Iterable[Dict[str, Any]]):
+        """Insert or replace mappings in a single transaction."""
+        columns = MAPPING_FIELDS + ('created_ts',)
+        placeholders = ', '.join('?' * len(columns))
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.executemany(
+                    f"INSERT OR REPLACE INTO mappings ({', '.join(columns)}) VALUES ({placeholders})",
+                    (self._row(m) for m in mappings))
+                self._db.execute('COMMIT')
+            except BaseException:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def mark_synced(self, solana_attestation: str, synced_at: str):
+        with self._lock:
+            self._db.execute("UPDATE mappings SET status = 'synced', synced_at = ?, last_outcome = 'synced' "
+                             "WHERE solana_attestation = ?", (synced_at, solana_attestation))
+
+    def defer(self, solana_attestation: str, outcome: str, next_attempt_at: float):
+        """Record a failed attempt: bump retries and hold the mapping back until next_attempt_at."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE mappings SET retries = retries + 1, next_attempt_at = ?, last_outcome = ? "
+                "WHERE solana_attestation = ?", (next_attempt_at, outcome, solana_attestation))
+
+    def set_balance(self, arc_escrow: Optional[str], arc_seller: str, balance: Optional[int],
+                    value_score: float, checked_at: float):
+        """Store an escrow balance (None when the read failed) on every pending mapping for that seller."""
+        with self._lock:
+            self._db.execute(
+                "UPDATE mappings SET escrow_balance = ?, value_score = ?, balance_checked_at = ? "
+                "WHERE status = 'pending' AND arc_escrow IS ? AND arc_seller = ?",
+                (None if balance is None else str(balance), value_score, checked_at, arc_escrow, arc_seller))
+
+    def close(self):
+        with self._lock:
+            self._db.close()
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+HALE Capability Cache
+Shared, on-disk cache of Gemini model capabilities.
+
+Holds, per API flavour ('new' for google.genai, 'legacy' for
+google.generativeai), the available models with their supported methods, the
+model selected from the oracle's preference list, and observed call latencies.
+The file is shared by every process of the same user on the host (API,
+bridge, demo scripts) and refreshed on a background thread, so picking a
+model never waits on a network listing. The default file lives in a
+directory only that user can write; if that directory is not private (e.g.
+another user created it first), the cache stays in memory.
+
+Environment:
+    HALE_CAPABILITY_CACHE      Cache file (default <tmpdir>/hale-<uid>/capabilities.json)
+    HALE_CAPABILITY_TTL        Seconds before an entry is refreshed (default 3600)
+"""
+
+import os
+import json
+import time
+import stat
+import atexit
+import tempfile
+import threading
+from typing import Dict, Any, Optional, Callable, Sequence, List
+
+from hale_logging import get_logger
+
+log = get_logger('capabilities')
+
+# Lister: returns {model_name: [supported methods]}
+ModelLister = Callable[[], Dict[str, List[str]]]
+
+# Weight of the newest sample in the latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Minimum seconds between latency-only writes of the cache file
+LATENCY_SAVE_INTERVAL = 60.0
+
+
+def _default_path() -> Optional[str]:
+    """capabilities.json in a per-user 0700 directory under tmpdir, or None if it is not private."""
+    uid = os.getuid() if hasattr(os, 'getuid') else None
+    directory = os.path.join(tempfile.gettempdir(), f'hale-{uid}' if uid is not None else 'hale')
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        info = os.lstat(directory)
+    except OSError as e:
+        log.warning("No capability cache directory; caching in memory", path=directory, error=str(e))
+        return None
+    if uid is not None and (not stat.S_ISDIR(info.st_mode) or info.st_uid != uid or info.st_mode & 0o077):
+        # Someone else could plant a cache selecting their own model
+        log.warning("Capability cache directory is not private; caching in memory", path=directory)
+        return None
+    return os.path.join(directory, 'capabilities.json')
+
+
+class CapabilityCache:
+    """TTL cache of model capabilities, backed by a JSON file and refreshed in the background."""
+
+    def __init__(self, path: Optional[str] = None, ttl: Optional[float] = None):
+        # None: in memory only
+        self.path = path or os.getenv('HALE_CAPABILITY_CACHE') or _default_path()
+        self.ttl = float(ttl if ttl is not None else os.getenv('HALE_CAPABILITY_TTL', '3600'))
+        self._lock = threading.Lock()
+        self._refreshing = set()
+        self._last_save = 0.0
+        self._dirty = False
+        self._data: Dict[str, Any] = self._load()
+
+    def _load(self) -> Dict[str, Any]:
+        if not self.path:
+            return {}
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except FileNotFoundError:
+            return {}
+        except Exception as e:
+            log.warning("Ignoring unreadable capability cache", path=self.path, error=str(e))
+            return {}
+
+    def _save(self):
+        """Atomically replace the cache file (caller holds the lock)."""
+        if not self.path:
+            self._dirty = False
+            return
+        try:
+            directory = os.path.dirname(self.path) or '.'
+            fd, tmp_path = tempfile.mkstemp(prefix='.hale_capabilities.', dir=directory)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(self._data, f, indent=2)
+            os.replace(tmp_path, self.path)
+            self._last_save = time.time()
+            self._dirty = False
+        except Exception as e:
+            log.warning("Could not write capability cache", path=self.path, error=str(e))
+
+    def get(self, api: str) -> Optional[Dict[str, Any]]:
+        """Cached entry for api ('models', 'selected', 'fetched_at', 'latencies'), or None."""
+        with self._lock:
+            entry = self._data.get(api)
+            return dict(entry) if entry else None
+
+    def is_fresh(self, entry: Optional[Dict[str, Any]]) -> bool:
+        return bool(entry) and time.time() - entry.get('fetched_at', 0) < self.ttl
+
+    def refresh(self, api: str, lister: ModelLister, preferences: Sequence[str],
+                method: str = 'generateContent') -> Optional[Dict[str, Any]]:
+        """
+        List models now, pick the first preference supporting method, and persist.
+
+        Returns:
+            The new entry, or None if the listing failed
+        """
+        started = time.perf_counter()
+        try:
+            models = lister()
+        except Exception as e:
+            log.warning("Gemini model listing failed", api=api, error=str(e))
+            return None
+        listing_ms = round((time.perf_counter() - started) * 1000, 1)
+
+        selected = None
+        for pref in preferences:
+            for name in (pref, f'models/{pref}'):
+                methods = models.get(name)
+                if methods is not None and (not methods or method in methods):
+                    selected = pref
+                    break
+            if selected:
+                break
+
+        with self._lock:
+            # Pick up entries other processes wrote since we loaded
+            on_disk = self._load()
+            on_disk.update({k: v for k, v in self._data.items() if k not in on_disk})
+            self._data = on_disk
+            previous = self._data.get(api) or {}
+            entry = {
+                'fetched_at': time.time(),
+                'listing_ms': listing_ms,
+                'models': models,
+                'selected': selected or previous.get('selected'),
+                'latencies': previous.get('latencies', {})
+            }
+            self._data[api] = entry
+            self._save()
+        log.info("Refreshed Gemini capabilities", api=api, models=len(models), selected=entry['selected'], listing_ms=listing_ms)
+        return dict(entry)
+
+    def refresh_async(self, api: str, lister: ModelLister, preferences: Sequence[str]) -> bool:
+        """Start a background refresh unless one for api is already running."""
+        with self._lock:
+            if api in self._refreshing:
+                return False
+            self._refreshing.add(api)
+
+        def run():
+            try:
+                self.refresh(api, lister, preferences)
+            finally:
+                with self._lock:
+                    self._refreshing.discard(api)
+
+        threading.Thread(target=run, name=f'hale-capabilities-{api}', daemon=True).start()
+        return True
+
+    def select_model(self, api: str, preferences: Sequence[str], lister: ModelLister,
+                     default: str) -> str:
+        """
+        Return the cached model selection without blocking. A missing or stale
+        entry schedules a background refresh and the previous selection (or
+        default) is used in the meantime.
+        """
+        entry = self.get(api)
+        if not self.is_fresh(entry):
+            self.refresh_async(api, lister, preferences)
+        return (entry or {}).get('selected') or default
+
+    def record_latency(self, api: str, model: str, seconds: float):
+        """Fold an observed call latency into the model's moving average."""
+        with self._lock:
+            entry = self._data.setdefault(api, {'fetched_at': 0, 'models': {}, 'selected': None, 'latencies': {}})
+            stats = entry.setdefault('latencies', {}).setdefault(model, {'count': 0, 'ewma_ms': None})
+            sample_ms = seconds * 1000
+            stats['ewma_ms'] = round(sample_ms if stats['ewma_ms'] is None else
+                                     stats['ewma_ms'] + LATENCY_EWMA_ALPHA * (sample_ms - stats['ewma_ms']), 1)
+            stats['count'] += 1
+            self._dirty = True
+            if time.time() - self._last_save >= LATENCY_SAVE_INTERVAL:
+                self._save()
+
+    def flush(self):
+        """Write latency samples not yet persisted."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+
+_cache: Optional[CapabilityCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_capability_cache() -> CapabilityCache:
+    """Process-wide capability cache."""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = CapabilityCache()
+                atexit.register(_cache.flush)
+    return _cache
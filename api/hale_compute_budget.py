@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+HALE Compute Budget
+Compute-unit limits and priority fees for Solana attestation transactions.
+
+Without ComputeBudget instructions a transaction requests the default
+200k CU per instruction and bids no priority fee, so under congestion it
+lands late or is dropped. Each attestation transaction is now prefixed with:
+
+    SetComputeUnitLimit   units the instruction type actually consumes
+    SetComputeUnitPrice   a percentile of recent prioritization fees
+
+The unit limit comes from one simulateTransaction per instruction type,
+times a safety margin, and is cached afterwards, since initialize and audit
+cost the same on every call. A tight limit also raises the transaction's
+effective priority and tells a packer how many instructions fit in one
+transaction (MAX_TRANSACTION_UNITS).
+
+The price is the chosen percentile of getRecentPrioritizationFees over the
+last 150 slots, sampled at most every HALE_SOLANA_FEE_TTL seconds and
+clamped to [HALE_SOLANA_MIN_PRIORITY_FEE, HALE_SOLANA_MAX_PRIORITY_FEE], so
+the fee paid is bounded: price * units / 1e6 lamports.
+
+Environment:
+    HALE_SOLANA_COMPUTE_BUDGET     Set to 0 to send without ComputeBudget instructions
+    HALE_SOLANA_FEE_PERCENTILE     Percentile of recent fees to bid (default 75)
+    HALE_SOLANA_MIN_PRIORITY_FEE   Floor in micro-lamports per CU (default 1000)
+    HALE_SOLANA_MAX_PRIORITY_FEE   Cap in micro-lamports per CU (default 500000)
+    HALE_SOLANA_FEE_TTL            Seconds a fee sample is reused (default 10)
+    HALE_SOLANA_CU_MARGIN          Multiplier on simulated units (default 1.15)
+"""
+
+import os
+import time
+import asyncio
+import threading
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from hale_logging import get_logger
+from hale_metrics import CACHE_HITS, CACHE_MISSES, RPC_ERRORS
+
+log = get_logger('solana.budget')
+
+# Per-transaction compute ceiling
+MAX_TRANSACTION_UNITS = 1_400_000
+# What the runtime grants an instruction with no explicit limit
+DEFAULT_INSTRUCTION_UNITS = 200_000
+# Largest serialized transaction a node accepts
+PACKET_DATA_SIZE = 1232
+
+
+def compute_budget_enabled() -> bool:
+    return os.getenv('HALE_SOLANA_COMPUTE_BUDGET', '1') != '0'
+
+
+def _percentile(values: List[int], percentile: float) -> int:
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(percentile / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+class ComputeBudgetTuner:
+    """Cached per-instruction compute-unit limits plus a sampled priority-fee price."""
+
+    def __init__(self, client, percentile: Optional[float] = None, min_price: Optional[int] = None,
+                 max_price: Optional[int] = None, fee_ttl: Optional[float] = None,
+                 margin: Optional[float] = None):
+        # A SolanaRpcPool: request() for getRecentPrioritizationFees
+        self.client = client
+        self.percentile = float(percentile or os.getenv('HALE_SOLANA_FEE_PERCENTILE', '75'))
+        self.min_price = int(min_price if min_price is not None else os.getenv('HALE_SOLANA_MIN_PRIORITY_FEE', '1000'))
+        self.max_price = int(max_price or os.getenv('HALE_SOLANA_MAX_PRIORITY_FEE', '500000'))
+        self.fee_ttl = float(fee_ttl or os.getenv('HALE_SOLANA_FEE_TTL', '10'))
+        self.margin = float(margin or os.getenv('HALE_SOLANA_CU_MARGIN', '1.15'))
+        self._lock = threading.Lock()
+        self._units: Dict[str, int] = {}
+        self._price: Optional[int] = None
+        self._price_at = 0.0
+        # (loop, key) -> task, so concurrent cold-cache callers share one simulation or sample
+        self._inflight: Dict[tuple, asyncio.Task] = {}
+        # The same for threads: key -> lock held by the one caller refilling it
+        self._miss_locks: Dict[str, threading.Lock] = {}
+
+    # --- UNIT LIMITS ---
+
+    def _cached_units(self, kind: str) -> Optional[int]:
+        with self._lock:
+            units = self._units.get(kind)
+        if units is not None:
+            CACHE_HITS.inc(cache='compute_units')
+        else:
+            CACHE_MISSES.inc(cache='compute_units')
+        return units
+
+    def _store_units(self, kind: str, consumed: Optional[int]) -> int:
+        if not consumed:
+            # Simulation failed: fall back to the runtime default and try again next time
+            return DEFAULT_INSTRUCTION_UNITS
+        units = min(MAX_TRANSACTION_UNITS, int(consumed * self.margin))
+        with self._lock:
+            self._units[kind] = units
+        log.info("Compute units sized", kind=kind, consumed=consumed, limit=units)
+        return units
+
+    def _miss_lock(self, key: str) -> threading.Lock:
+        with self._lock:
+            return self._miss_locks.setdefault(key, threading.Lock())
+
+    def unit_limit(self, kind: str, simulate: Callable[[], Optional[int]]) -> int:
+        """CU limit for an instruction type; simulate() returns units consumed (None on failure)."""
+        units = self._cached_units(kind)
+        if units is None:
+            with self._miss_lock('units:' + kind):
+                # Sized by the thread that held the lock before us
+                with self._lock:
+                    units = self._units.get(kind)
+                if units is None:
+                    units = self._store_units(kind, simulate())
+        return units
+
+    async def _single_flight(self, key: str, make: Callable[[], Awaitable[int]]) -> int:
+        slot = (id(asyncio.get_running_loop()), key)
+        task = self._inflight.get(slot)
+        if task is None:
+            task = self._inflight[slot] = asyncio.ensure_future(make())
+            task.add_done_callback(lambda _: self._inflight.pop(slot, None))
+        return await asyncio.shield(task)
+
+    async def aunit_limit(self, kind: str, simulate: Callable[[], Awaitable[Optional[int]]]) -> int:
+        """unit_limit with an async simulation."""
+        units = self._cached_units(kind)
+        if units is None:
+            async def measure():
+                return self._store_units(kind, await simulate())
+            units = await self._single_flight('units:' + kind, measure)
+        return units
+
+    def max_instructions(self, kind: str) -> int:
+        """How many instructions of kind fit under MAX_TRANSACTION_UNITS (for packing)."""
+        with self._lock:
+            units = self._units.get(kind) if compute_budget_enabled() else None
+        return max(1, MAX_TRANSACTION_UNITS // (units or DEFAULT_INSTRUCTION_UNITS))
+
+    # --- PRICE ---
+
+    def _sample_price(self) -> int:
+        try:
+            response = self.client.request('getRecentPrioritizationFees', [[]])
+            if 'error' in response:
+                raise RuntimeError(response['error'])
+            fees = [entry['prioritizationFee'] for entry in response.get('result') or []]
+            price = _percentile(fees, self.percentile) if fees else self.min_price
+        except Exception as e:
+            log.warning("Prioritization fee sample failed", error=str(e))
+            RPC_ERRORS.inc(chain='solana', operation='get_recent_prioritization_fees')
+            with self._lock:
+                # Keep bidding the last price rather than dropping to the floor
+                return self._price if self._price is not None else self.min_price
+        price = max(self.min_price, min(self.max_price, price))
+        with self._lock:
+            self._price, self._price_at = price, time.time()
+        return price
+
+    def _fresh_price(self) -> Optional[int]:
+        with self._lock:
+            if self._price is not None and time.time() - self._price_at < self.fee_ttl:
+                return self._price
+        return None
+
+    def unit_price(self) -> int:
+        """Priority fee in micro-lamports per CU."""
+        price = self._fresh_price()
+        if price is None:
+            with self._miss_lock('price'):
+                price = self._fresh_price()
+                if price is None:
+                    price = self._sample_price()
+        return price
+
+    async def aunit_price(self) -> int:
+        """unit_price for event loops: only goes to a thread when a fresh sample is needed."""
+        price = self._fresh_price()
+        if price is not None:
+            return price
+        # unit_price in the thread, so threads and loops sharing this tuner sample once
+        return await self._single_flight('price', lambda: asyncio.to_thread(self.unit_price))
+
+    # --- INSTRUCTIONS ---
+
+    @staticmethod
+    def instructions(units: int, price: int) -> list:
+        """ComputeBudget instructions to prefix a transaction with."""
+        from solders.compute_budget import set_compute_unit_limit, set_compute_unit_price
+        return [set_compute_unit_limit(units), set_compute_unit_price(price)]
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'unit_limits': dict(self._units), 'unit_price': self._price}
+
+
+_tuners: Dict[int, ComputeBudgetTuner] = {}
+_tuners_lock = threading.Lock()
+
+
+def get_compute_budget(client) -> ComputeBudgetTuner:
+    """Process-wide tuner for a Solana pool."""
+    with _tuners_lock:
+        tuner = _tuners.get(id(client))
+        if tuner is None:
+            tuner = _tuners[id(client)] = ComputeBudgetTuner(client)
+    return tuner
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+HALE Fee Estimator
+EIP-1559 fee pricing and gas-limit caching for oracle transactions on Arc.
+
+A background thread samples eth_feeHistory every few seconds. Fees are
+derived from the latest sample, so building a transaction no longer waits on
+an eth_gasPrice call:
+
+    maxPriorityFeePerGas = median over recent blocks of the urgency's reward percentile
+    maxFeePerGas         = next block base fee * headroom + maxPriorityFeePerGas
+
+Urgency levels trade price for inclusion speed: 'low' (10th percentile tip,
+base fee headroom 1.25x), 'standard' (50th, 2x) and 'fast' (90th, 3x). Chains
+or nodes without fee history fall back to a legacy gasPrice.
+
+Gas limits are cached per (contract, method) after the first successful
+estimate and reused until a transaction using them reverts, so a repeat
+release or refund skips eth_estimateGas as well.
+
+Environment:
+    HALE_FEE_URGENCY           Default urgency: low, standard or fast (default standard)
+    HALE_FEE_SAMPLE_INTERVAL   Seconds between fee history samples (default 5)
+    HALE_FEE_HISTORY_BLOCKS    Blocks per fee history sample (default 20)
+    HALE_GAS_CACHE_TTL         Seconds a cached gas limit is reused (default 600)
+"""
+
+import os
+import time
+import asyncio
+import statistics
+import threading
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable
+
+from hale_logging import get_logger
+from hale_metrics import CACHE_HITS, CACHE_MISSES, RPC_ERRORS
+from hale_rpc_pool import get_arc_pool
+
+log = get_logger('fees')
+
+# urgency: (reward percentile, base fee headroom)
+URGENCY_LEVELS = {
+    'low': (10, 1.25),
+    'standard': (50, 2.0),
+    'fast': (90, 3.0),
+}
+
+# Buffer applied to gas estimates
+GAS_LIMIT_BUFFER = 1.2
+
+# Samples older than this many intervals are refreshed before use
+STALE_AFTER_INTERVALS = 4
+
+
+class FeeEstimator:
+    """Background fee-history sampler plus per-(contract, method) gas-limit cache."""
+
+    def __init__(self, rpc_url: Optional[str] = None, sample_interval: Optional[float] = None,
+                 history_blocks: Optional[int] = None, gas_cache_ttl: Optional[float] = None):
+        self.pool = get_arc_pool(rpc_url)
+        self.sample_interval = float(sample_interval or os.getenv('HALE_FEE_SAMPLE_INTERVAL', '5'))
+        self.history_blocks = int(history_blocks or os.getenv('HALE_FEE_HISTORY_BLOCKS', '20'))
+        self.gas_cache_ttl = float(gas_cache_ttl or os.getenv('HALE_GAS_CACHE_TTL', '600'))
+        self.default_urgency = os.getenv('HALE_FEE_URGENCY', 'standard')
+        self._lock = threading.Lock()
+        self._sample: Optional[Dict[str, Any]] = None
+        self._gas_limits: Dict[Tuple[str, str], Tuple[int, float]] = {}
+        self._thread: Optional[threading.Thread] = None
+
+    # --- FEES ---
+
+    def _rpc(self, method: str, params: list):
+        response = self.pool.request(method, params)
+        if 'error' in response:
+            raise RuntimeError(response['error'])
+        return response['result']
+
+    def sample(self) -> Dict[str, Any]:
+        """Take one fee history sample now and make it current."""
+        percentiles = sorted({p for p, _ in URGENCY_LEVELS.values()})
+        sample: Dict[str, Any] = {'taken_at': time.time()}
+        try:
+            history = self._rpc('eth_feeHistory', [hex(self.history_blocks), 'latest', percentiles])
+            base_fees = history.get('baseFeePerGas') or []
+            next_base_fee = int(base_fees[-1], 16) if base_fees else 0
+            if not next_base_fee:
+                raise ValueError('no base fee reported')
+            rewards = [[int(r, 16) for r in block] for block in history.get('reward') or [] if block]
+            sample['base_fee'] = next_base_fee
+            sample['priority_fees'] = {
+                p: int(statistics.median(block[i] for block in rewards)) if rewards else 0
+                for i, p in enumerate(percentiles)
+            }
+        except Exception as e:
+            # No EIP-1559 data: price with the node's legacy gas price
+            log.debug("Fee history unavailable; using legacy gas price", error=str(e))
+            sample['gas_price'] = int(self._rpc('eth_gasPrice', []), 16)
+        with self._lock:
+            self._sample = sample
+        return sample
+
+    def _sampler(self):
+        while True:
+            try:
+                self.sample()
+            except Exception as e:
+                log.warning("Fee sampling failed", error=str(e))
+                RPC_ERRORS.inc(chain='arc', operation='fee_history')
+            time.sleep(self.sample_interval)
+
+    def start(self):
+        """Start the background sampler (idempotent)."""
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._sampler, name='hale-fee-sampler', daemon=True)
+        self._thread.start()
+
+    def _current_sample(self) -> Dict[str, Any]:
+        self.start()
+        with self._lock:
+            sample = self._sample
+        if sample is None or time.time() - sample['taken_at'] > self.sample_interval * STALE_AFTER_INTERVALS:
+            sample = self.sample()
+        return sample
+
+    def fee_params(self, urgency: Optional[str] = None) -> Dict[str, int]:
+        """
+        Transaction fee fields for urgency ('low', 'standard' or 'fast').
+
+        Returns:
+            {'maxFeePerGas', 'maxPriorityFeePerGas'}, or {'gasPrice'} on legacy chains
+        """
+        urgency = urgency or self.default_urgency
+        percentile, headroom = URGENCY_LEVELS.get(urgency, URGENCY_LEVELS['standard'])
+        sample = self._current_sample()
+        if 'gas_price' in sample:
+            return {'gasPrice': sample['gas_price']}
+        priority_fee = sample['priority_fees'].get(percentile, 0)
+        return {
+            'maxFeePerGas': int(sample['base_fee'] * headroom) + priority_fee,
+            'maxPriorityFeePerGas': priority_fee,
+        }
+
+    async def afee_params(self, urgency: Optional[str] = None) -> Dict[str, int]:
+        """fee_params for event loops: only goes to a thread when a fresh sample is needed."""
+        with self._lock:
+            sample = self._sample
+        if sample is not None and time.time() - sample['taken_at'] <= self.sample_interval * STALE_AFTER_INTERVALS:
+            return self.fee_params(urgency)
+        return await asyncio.to_thread(self.fee_params, urgency)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'sample': dict(self._sample) if self._sample else None,
+                    'cached_gas_limits': len(self._gas_limits)}
+
+    # --- GAS LIMITS ---
+
+    def _cached_gas(self, contract: str, method: str) -> Optional[int]:
+        key = (contract.lower(), method)
+        with self._lock:
+            entry = self._gas_limits.get(key)
+        if entry and time.time() - entry[1] < self.gas_cache_ttl:
+            CACHE_HITS.inc(cache='gas_limit')
+            return entry[0]
+        CACHE_MISSES.inc(cache='gas_limit')
+        return None
+
+    def _store_gas(self, contract: str, method: str, estimate: int) -> int:
+        limit = int(estimate * GAS_LIMIT_BUFFER)
+        with self._lock:
+            self._gas_limits[(contract.lower(), method)] = (limit, time.time())
+        return limit
+
+    def gas_limit(self, contract: str, method: str, estimate: Callable[[], int]) -> int:
+        """
+        Cached gas limit for contract.method, estimating (plus buffer) on a miss.
+        Estimation errors propagate: the call would revert, so nothing is sent.
+        """
+        limit = self._cached_gas(contract, method)
+        if limit is None:
+            limit = self._store_gas(contract, method, estimate())
+        return limit
+
+    async def agas_limit(self, contract: str, method: str, estimate: Callable[[], Awaitable[int]]) -> int:
+        """gas_limit with an async estimator."""
+        limit = self._cached_gas(contract, method)
+        if limit is None:
+            limit = self._store_gas(contract, method, await estimate())
+        return limit
+
+    def invalidate(self, contract: str, method: str):
+        """Drop the cached gas limit after a revert."""
+        with self._lock:
+            self._gas_limits.pop((contract.lower(), method), None)
+
+
+_estimators: Dict[str, FeeEstimator] = {}
+_estimators_lock = threading.Lock()
+
+
+def get_fee_estimator(rpc_url: Optional[str] = None) -> FeeEstimator:
+    """Process-wide fee estimator for an Arc RPC URL."""
+    key = rpc_url or os.getenv('ARC_RPC_URL') or ''
+    with _estimators_lock:
+        estimator = _estimators.get(key)
+        if estimator is None:
+            estimator = _estimators[key] = FeeEstimator(rpc_url)
+    return estimator
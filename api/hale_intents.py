@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+HALE Intents
+Canonical intent hashing and schema validation, one intent or thousands.
+
+An intent's hash is "0x" + SHA-256 of its details in canonical JSON: keys
+sorted at every level, compact separators, ASCII escapes. This is the same
+byte string scripts/generate_intent_hash.py produces by rebuilding nested
+OrderedDicts, but done in one pass by the C JSON encoder with sort_keys.
+
+Intents are validated against schemas/intent.schema.json. The schema is
+compiled once per process into a tree of small check functions (keywords
+are looked up at compile time, not per intent). The compiler covers the
+draft-07 keywords the schema uses, plus the common ones near them; a schema
+using any other keyword fails to compile rather than being half-checked. An
+intent that carries an intent_hash is also checked against the hash of its
+details.
+
+process_batch() validates and hashes a list of intents across a worker
+pool, in chunks so per-task overhead is paid per chunk. JSON encoding holds
+the GIL, so the default pool is processes; threads suit small batches.
+
+Example:
+    python hale_intents.py intents.jsonl > results.jsonl
+
+Environment:
+    HALE_INTENT_SCHEMA      Schema path (default schemas/intent.schema.json in the repo)
+    HALE_INTENT_WORKERS     Pool size for process_batch (default: CPU count)
+    HALE_INTENT_EXECUTOR    process or thread (default process)
+    HALE_INTENT_CHUNK       Intents per pool task (default 512)
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+from hale_logging import get_logger
+
+log = get_logger('intents')
+
+DEFAULT_SCHEMA_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                                   'schemas', 'intent.schema.json')
+
+# One encoder for every call: sort_keys sorts nested objects as they are written
+_ENCODER = json.JSONEncoder(sort_keys=True, separators=(',', ':'))
+
+# Keywords that only describe the schema
+_ANNOTATIONS = {'$schema', '$id', '$comment', 'title', 'description', 'default', 'examples'}
+
+_TYPES: Dict[str, Callable[[Any], bool]] = {
+    'object': lambda v: isinstance(v, dict),
+    'array': lambda v: isinstance(v, list),
+    'string': lambda v: isinstance(v, str),
+    'integer': lambda v: isinstance(v, int) and not isinstance(v, bool),
+    'number': lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    'boolean': lambda v: isinstance(v, bool),
+    'null': lambda v: v is None,
+}
+
+# A compiled check appends "path: message" strings to errors
+Check = Callable[[Any, str, List[str]], None]
+
+
+def canonical_json(obj: Any) -> bytes:
+    """Sorted-key, compact JSON of obj (the bytes an intent hash is taken over)."""
+    return _ENCODER.encode(obj).encode('utf-8')
+
+
+def intent_hash(details: Dict[str, Any]) -> str:
+    """"0x" + hex SHA-256 of the canonical JSON of an intent's details."""
+    return '0x' + hashlib.sha256(canonical_json(details)).hexdigest()
+
+
+class SchemaError(ValueError):
+    """The schema uses a keyword the compiler does not implement."""
+
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """Compile a JSON schema (draft-07 subset) into a single check function."""
+    unsupported = set(schema) - _ANNOTATIONS - {
+        'type', 'enum', 'const', 'required', 'properties', 'additionalProperties', 'items',
+        'pattern', 'minLength', 'maxLength', 'minimum', 'maximum'}
+    if unsupported:
+        raise SchemaError(f"Unsupported schema keywords: {', '.join(sorted(unsupported))}")
+
+    checks: List[Check] = []
+    if 'type' in schema:
+        names = schema['type'] if isinstance(schema['type'], list) else [schema['type']]
+        predicates = [_TYPES[name] for name in names]
+        expected = ' or '.join(names)
+
+        def check_type(value, path, errors):
+            if not any(predicate(value) for predicate in predicates):
+                errors.append(f"{path}: expected {expected}")
+        checks.append(check_type)
+    if 'enum' in schema:
+        allowed = schema['enum']
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: {value!r} is not one of {allowed}")
+        checks.append(check_enum)
+    if 'const' in schema:
+        constant = schema['const']
+
+        def check_const(value, path, errors):
+            if value != constant:
+                errors.append(f"{path}: must be {constant!r}")
+        checks.append(check_const)
+    if 'pattern' in schema:
+        regex = re.compile(schema['pattern'])
+
+        def check_pattern(value, path, errors):
+            if isinstance(value, str) and not regex.search(value):
+                errors.append(f"{path}: does not match {regex.pattern}")
+        checks.append(check_pattern)
+    if 'minLength' in schema or 'maxLength' in schema:
+        low, high = schema.get('minLength', 0), schema.get('maxLength')
+
+        def check_length(value, path, errors):
+            if isinstance(value, str) and (len(value) < low or (high is not None and len(value) > high)):
+                errors.append(f"{path}: length {len(value)} outside [{low}, {high}]")
+        checks.append(check_length)
+    if 'minimum' in schema or 'maximum' in schema:
+        low, high = schema.get('minimum'), schema.get('maximum')
+
+        def check_range(value, path, errors):
+            if _TYPES['number'](value) and ((low is not None and value < low) or
+                                            (high is not None and value > high)):
+                errors.append(f"{path}: {value} outside [{low}, {high}]")
+        checks.append(check_range)
+    if 'required' in schema:
+        required = list(schema['required'])
+
+        def check_required(value, path, errors):
+            if isinstance(value, dict):
+                for key in required:
+                    if key not in value:
+                        errors.append(f"{path}: missing {key!r}")
+        checks.append(check_required)
+    if 'properties' in schema or 'additionalProperties' in schema:
+        properties = {key: compile_schema(sub) for key, sub in schema.get('properties', {}).items()}
+        additional = schema.get('additionalProperties', True)
+        extra = compile_schema(additional) if isinstance(additional, dict) else None
+
+        def check_properties(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for key, item in value.items():
+                check = properties.get(key)
+                if check is not None:
+                    check(item, f"{path}.{key}", errors)
+                elif extra is not None:
+                    extra(item, f"{path}.{key}", errors)
+                elif additional is False:
+                    errors.append(f"{path}: unexpected {key!r}")
+        checks.append(check_properties)
+    if 'items' in schema:
+        item_check = compile_schema(schema['items'])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for i, item in enumerate(value):
+                    item_check(item, f"{path}[{i}]", errors)
+        checks.append(check_items)
+
+    def check(value, path, errors):
+        for c in checks:
+            c(value, path, errors)
+    return check
+
+
+class IntentValidator:
+    """Schema check plus intent_hash computation (and verification when the intent carries one)."""
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None, path: Optional[str] = None):
+        if schema is None:
+            path = path or os.getenv('HALE_INTENT_SCHEMA') or DEFAULT_SCHEMA_PATH
+            with open(path, 'r') as f:
+                schema = json.load(f)
+        self._check = compile_schema(schema)
+
+    def errors(self, intent: Any) -> List[str]:
+        errors: List[str] = []
+        self._check(intent, '$', errors)
+        return errors
+
+    def process(self, intent: Any) -> Dict[str, Any]:
+        """
+        Returns:
+            {'valid': bool, 'errors': [...], 'intent_hash': '0x...' or None}
+        """
+        errors = self.errors(intent)
+        digest = None
+        if isinstance(intent, dict) and isinstance(intent.get('details'), dict):
+            digest = intent_hash(intent['details'])
+            claimed = intent.get('intent_hash')
+            if isinstance(claimed, str) and claimed.lower() != digest:
+                errors.append(f"$.intent_hash: does not match details ({digest})")
+        return {'valid': not errors, 'errors': errors, 'intent_hash': digest}
+
+
+_validator: Optional[IntentValidator] = None
+_validator_lock = threading.Lock()
+
+
+def get_validator() -> IntentValidator:
+    """Process-wide validator compiled from HALE_INTENT_SCHEMA (once per pool worker, too)."""
+    global _validator
+    if _validator is None:
+        with _validator_lock:
+            if _validator is None:
+                _validator = IntentValidator()
+    return _validator
+
+
+def _process_chunk(intents: List[Any]) -> List[Dict[str, Any]]:
+    validator = get_validator()
+    return [validator.process(intent) for intent in intents]
+
+
+def process_batch(intents: List[Any], workers: Optional[int] = None, executor: Optional[str] = None,
+                  chunk_size: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Validate and hash every intent, in order, across a worker pool.
+    Batches of a single chunk (or workers=1) run inline.
+
+    Returns:
+        One process() result per intent
+    """
+    from hale_metrics import INTENTS
+    chunk_size = max(1, int(chunk_size or os.getenv('HALE_INTENT_CHUNK', '512')))
+    workers = int(workers or os.getenv('HALE_INTENT_WORKERS', '0') or os.cpu_count() or 1)
+    executor = executor or os.getenv('HALE_INTENT_EXECUTOR', 'process')
+    chunks = [intents[i:i + chunk_size] for i in range(0, len(intents), chunk_size)]
+
+    if workers <= 1 or len(chunks) <= 1:
+        results = [result for chunk in chunks for result in _process_chunk(chunk)]
+    else:
+        pool_class = ThreadPoolExecutor if executor == 'thread' else ProcessPoolExecutor
+        with pool_class(max_workers=min(workers, len(chunks))) as pool:
+            results = [result for chunk in pool.map(_process_chunk, chunks) for result in chunk]
+
+    valid = sum(1 for r in results if r['valid'])
+    INTENTS.inc(valid, result='valid')
+    INTENTS.inc(len(results) - valid, result='invalid')
+    log.info("Intent batch processed", intents=len(results), invalid=len(results) - valid,
+             chunks=len(chunks), executor=executor if len(chunks) > 1 and workers > 1 else 'inline')
+    return results
+
+
+def _read_intents(lines: Iterable[str]) -> List[Any]:
+    return [json.loads(line) for line in lines if line.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Validate and hash intents (one JSON object per line)")
+    parser.add_argument('path', nargs='?', default='-', help="JSON lines file (default stdin)")
+    parser.add_argument('--workers', type=int, default=None, help="Pool size")
+    parser.add_argument('--executor', choices=['process', 'thread'], default=None)
+    parser.add_argument('--chunk-size', type=int, default=None, help="Intents per pool task")
+    args = parser.parse_args()
+
+    if args.path == '-':
+        intents = _read_intents(sys.stdin)
+    else:
+        with open(args.path, 'r') as f:
+            intents = _read_intents(f)
+    results = process_batch(intents, args.workers, args.executor, args.chunk_size)
+    for result in results:
+        sys.stdout.write(json.dumps(result) + '\n')
+    return 0 if all(r['valid'] for r in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+HALE Settlement Journal
+Write-ahead, append-only journal of each delivery's pipeline state.
+
+Every step of process_delivery appends one JSON line keyed by transaction_id
+before the pipeline moves on:
+
+    received       contract_data, seller_address, contract_address, delivery_hash
+    solana_init    solana_init_tx
+    verdict        verdict
+    solana_seal    solana_seal_tx
+    arc_prepared   action, arc_tx_hash, arc_raw_tx   (written before the broadcast)
+    arc_result     transaction_success
+    completed      result
+
+Appends are group-committed: a single writer thread writes whatever has
+queued up and fsyncs once per group, so many deliveries in flight share one
+fsync. Callers wait until their record is durable.
+
+Replaying a delivery is idempotent. A completed transaction_id returns its
+journaled result instead of settling again, but only to the seller that
+started it with the same delivery body (same delivery_hash); any other
+reuse of the id raises DeliveryConflict. An incomplete one resumes after
+its last durable step: a journaled verdict is reused, and a signed Arc
+transaction is re-broadcast (same hash) or its receipt awaited instead of
+signing a new one. HaleOracle.recover_incomplete() runs this for every
+incomplete entry at startup.
+
+A transaction_id is claimed for as long as a run of it is in flight, so a
+client retry (or a retry racing the startup recovery) cannot verify, seal
+and settle it a second time concurrently: it gets DeliveryInProgress.
+
+The file is compacted when opened: each transaction collapses to one
+snapshot line, and completed ones older than the retention period are
+dropped. Give each process its own journal file.
+
+Environment:
+    HALE_JOURNAL                Set to 0 to disable the journal
+    HALE_JOURNAL_PATH           Journal file (default api/settlement_journal.jsonl)
+    HALE_JOURNAL_GROUP_WINDOW   Seconds the writer waits to grow a commit group (default 0.002)
+    HALE_JOURNAL_RETENTION      Seconds completed entries are kept (default 604800)
+"""
+
+import os
+import json
+import time
+import asyncio
+import tempfile
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, Optional, List
+
+from hale_logging import get_logger
+from hale_metrics import JOURNAL_COMMIT_SIZE, JOURNAL_COMMIT_LATENCY
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX
+    fcntl = None
+
+log = get_logger('journal')
+
+# Fields dropped from a completed transaction's snapshot
+_COMPLETED_DROP = ('contract_data', 'arc_raw_tx')
+
+
+class DeliveryConflict(Exception):
+    """A journaled transaction_id was reused by another seller or for another delivery."""
+
+
+class DeliveryInProgress(DeliveryConflict):
+    """The transaction_id is already being processed."""
+
+
+def check_replay(state: Dict[str, Any], seller_address: Optional[str], delivery_hash: str):
+    """Raise DeliveryConflict unless state was journaled for this seller and delivery body."""
+    journaled_seller = (state.get('seller_address') or '').lower()
+    if journaled_seller != (seller_address or '').lower():
+        raise DeliveryConflict(f"Transaction {state['transaction_id']} belongs to another seller")
+    # Entries journaled before delivery_hash was recorded only carry the seller
+    if state.get('delivery_hash') and state['delivery_hash'] != delivery_hash:
+        raise DeliveryConflict(f"Transaction {state['transaction_id']} was journaled for a different delivery")
+
+
+class SettlementJournal:
+    """Group-committed JSONL journal with an in-memory fold of each transaction's state."""
+
+    def __init__(self, path: Optional[str] = None, group_window: Optional[float] = None,
+                 retention: Optional[float] = None):
+        self.path = path or os.getenv('HALE_JOURNAL_PATH') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'settlement_journal.jsonl')
+        self.group_window = float(group_window if group_window is not None else
+                                  os.getenv('HALE_JOURNAL_GROUP_WINDOW', '0.002'))
+        self.retention = float(retention if retention is not None else
+                               os.getenv('HALE_JOURNAL_RETENTION', str(7 * 24 * 3600)))
+        self._lock = threading.Lock()
+        self._cond = threading.Condition()
+        self._queue: List[tuple] = []
+        self._states: Dict[str, Dict[str, Any]] = {}
+        # transaction ids with a run in flight in this process
+        self._claims: set = set()
+        self._writer: Optional[threading.Thread] = None
+        self._load_and_compact()
+        self._file = open(self.path, 'a', encoding='utf-8')
+
+    # --- STATE ---
+
+    def _fold(self, record: Dict[str, Any]):
+        """Apply one record to the in-memory state (caller holds the lock)."""
+        transaction_id = record['transaction_id']
+        state = self._states.setdefault(transaction_id, {'transaction_id': transaction_id})
+        state.update({k: v for k, v in record.items() if k not in ('event', 'transaction_id')})
+        state.setdefault('started_at', record.get('ts'))
+        if record.get('event') in ('completed', 'snapshot') and 'result' in state:
+            for key in _COMPLETED_DROP:
+                state.pop(key, None)
+
+    def _load_and_compact(self):
+        """Fold the existing journal and rewrite it as one snapshot per live transaction."""
+        if not os.path.exists(self.path):
+            return
+        corrupt = 0
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    self._fold(json.loads(line))
+                except (ValueError, KeyError):
+                    # A torn final line from a crash mid-append
+                    corrupt += 1
+        cutoff = time.time() - self.retention
+        self._states = {tx: s for tx, s in self._states.items()
+                        if 'result' not in s or (s.get('ts') or 0) >= cutoff}
+
+        directory = os.path.dirname(self.path) or '.'
+        fd, tmp_path = tempfile.mkstemp(prefix='.hale_journal.', dir=directory)
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            for state in self._states.values():
+                f.write(json.dumps({**state, 'event': 'snapshot'}, default=str) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        log.info("Journal loaded", path=self.path, transactions=len(self._states),
+                 incomplete=len(self.incomplete()), corrupt_lines=corrupt)
+
+    def state(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """Folded state of a transaction, or None if it was never journaled."""
+        with self._lock:
+            state = self._states.get(transaction_id)
+            return dict(state) if state else None
+
+    def incomplete(self) -> List[Dict[str, Any]]:
+        """Transactions with a journaled start but no completed result, oldest first."""
+        with self._lock:
+            states = [dict(s) for s in self._states.values() if 'result' not in s]
+        return sorted(states, key=lambda s: s.get('started_at') or 0)
+
+    def claim(self, transaction_id: str):
+        """
+        Mark a run of transaction_id as in flight until release_claim() is called.
+
+        Raises:
+            DeliveryInProgress: Another run of it has not finished
+        """
+        with self._lock:
+            if transaction_id in self._claims:
+                raise DeliveryInProgress(f"Transaction {transaction_id} is already being processed")
+            self._claims.add(transaction_id)
+
+    def release_claim(self, transaction_id: str):
+        with self._lock:
+            self._claims.discard(transaction_id)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            total = len(self._states)
+            incomplete = sum(1 for s in self._states.values() if 'result' not in s)
+        return {'path': self.path, 'transactions': total, 'incomplete': incomplete}
+
+    # --- APPEND ---
+
+    def append(self, transaction_id: str, event: str, **fields) -> Future:
+        """
+        Queue a record; the returned future resolves once it is fsynced.
+        The in-memory state reflects the record immediately.
+        """
+        record = {'ts': time.time(), 'transaction_id': transaction_id, 'event': event, **fields}
+        line = json.dumps(record, default=str) + '\n'
+        with self._lock:
+            self._fold(record)
+        future = Future()
+        with self._cond:
+            self._queue.append((line, future))
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='hale-journal', daemon=True)
+                self._writer.start()
+            self._cond.notify()
+        return future
+
+    def record(self, transaction_id: str, event: str, **fields):
+        """Append and block until durable. Journal I/O errors are logged, not raised."""
+        try:
+            self.append(transaction_id, event, **fields).result()
+        except Exception as e:
+            log.error("Journal write failed", event=event, error=str(e))
+
+    async def arecord(self, transaction_id: str, event: str, **fields):
+        """record() for event loops."""
+        try:
+            await asyncio.wrap_future(self.append(transaction_id, event, **fields))
+        except Exception as e:
+            log.error("Journal write failed", event=event, error=str(e))
+
+    def _write_loop(self):
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+            if self.group_window:
+                time.sleep(self.group_window)
+            with self._cond:
+                group, self._queue = self._queue, []
+            started = time.perf_counter()
+            try:
+                if fcntl:
+                    fcntl.flock(self._file.fileno(), fcntl.LOCK_EX)
+                try:
+                    self._file.write(''.join(line for line, _ in group))
+                    self._file.flush()
+                    os.fsync(self._file.fileno())
+                finally:
+                    if fcntl:
+                        fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+            except Exception as e:
+                for _, future in group:
+                    future.set_exception(e)
+                continue
+            JOURNAL_COMMIT_SIZE.observe(len(group))
+            JOURNAL_COMMIT_LATENCY.observe(time.perf_counter() - started)
+            for _, future in group:
+                future.set_result(None)
+
+
+_journal: Optional[SettlementJournal] = None
+_journal_failed = False
+_journal_lock = threading.Lock()
+
+
+def get_journal() -> Optional[SettlementJournal]:
+    """Process-wide journal, or None when disabled (HALE_JOURNAL=0) or its file cannot be opened."""
+    global _journal, _journal_failed
+    if os.getenv('HALE_JOURNAL', '1') == '0':
+        return None
+    if _journal is None and not _journal_failed:
+        with _journal_lock:
+            if _journal is None and not _journal_failed:
+                try:
+                    _journal = SettlementJournal()
+                except OSError as e:
+                    # e.g. a read-only deployment filesystem
+                    log.warning("Settlement journal unavailable", error=str(e))
+                    _journal_failed = True
+    return _journal
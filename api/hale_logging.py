@@ -0,0 +1,259 @@
+#!/usr/bin/env python3
+"""
+HALE Logging
+Structured, leveled, non-blocking logging for the oracle and bridge.
+
+Records are put on an in-memory queue by the calling thread and formatted and
+written by a single background listener, so request threads never wait on
+the stdout lock. Every record carries the correlation id of the delivery (or
+attestation) being processed. Tracebacks (exc_info=True) are rendered on the
+calling thread, before the record is queued, and written as the 'exc' field.
+
+Environment:
+    HALE_LOG_LEVEL              Minimum level (default INFO)
+    HALE_LOG_FORMAT             'json' (default) or 'text'
+    HALE_LOG_DEBUG_SAMPLE_RATE  Fraction of correlation ids whose DEBUG records
+                                are kept even when HALE_LOG_LEVEL is higher (default 0)
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import copy
+import atexit
+import hashlib
+import logging
+import logging.handlers
+import contextvars
+from contextlib import contextmanager
+from typing import Optional, Iterator
+
+_correlation_id: contextvars.ContextVar = contextvars.ContextVar('hale_correlation_id', default=None)
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+def get_correlation_id() -> Optional[str]:
+    return _correlation_id.get()
+
+
+def set_correlation_id(correlation_id: Optional[str]) -> contextvars.Token:
+    """Bind correlation_id to the current context; pass the token to reset_correlation_id."""
+    return _correlation_id.set(correlation_id)
+
+
+def reset_correlation_id(token: contextvars.Token) -> None:
+    _correlation_id.reset(token)
+
+
+@contextmanager
+def correlation_scope(correlation_id: Optional[str]) -> Iterator[None]:
+    """Attach correlation_id to every record logged in this context (thread or asyncio task)."""
+    token = _correlation_id.set(correlation_id)
+    try:
+        yield
+    finally:
+        _correlation_id.reset(token)
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, correlation_id and any fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'correlation_id', None):
+            entry['correlation_id'] = record.correlation_id
+        entry.update(getattr(record, 'fields', None) or {})
+        exc = _exception_text(self, record)
+        if exc:
+            entry['exc'] = exc
+        if record.stack_info:
+            entry['stack'] = record.stack_info
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Human-readable variant for local development."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        line = f"{time.strftime('%H:%M:%S', time.localtime(record.created))} {record.levelname:<7} [{record.name}]"
+        if getattr(record, 'correlation_id', None):
+            line += f" ({record.correlation_id})"
+        line += f" {record.getMessage()}"
+        fields = getattr(record, 'fields', None)
+        if fields:
+            line += ' ' + ' '.join(f"{k}={v}" for k, v in fields.items())
+        exc = _exception_text(self, record)
+        if exc:
+            line += '\n' + exc
+        if record.stack_info:
+            line += '\n' + record.stack_info
+        return line
+
+
+def _exception_text(formatter: logging.Formatter, record: logging.LogRecord) -> Optional[str]:
+    """The record's traceback: rendered before queueing (exc_text), or from exc_info."""
+    if record.exc_text:
+        return record.exc_text
+    if record.exc_info:
+        return formatter.formatException(record.exc_info)
+    return None
+
+
+class _QueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps tracebacks. The stock prepare() formats the whole
+    record into msg and drops exc_info; this one only merges the message args
+    and renders the traceback into exc_text, so it crosses the queue as text
+    (no frames kept alive) and the listener's formatter still sees it.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            if not record.exc_text:
+                record.exc_text = (self.formatter or logging.Formatter()).formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+class _ContextFilter(logging.Filter):
+    """
+    Stamps the correlation id on the calling thread (before the record crosses
+    the queue) and drops DEBUG records outside the sampled correlation ids.
+    """
+
+    def __init__(self, level: int, debug_sample_rate: float):
+        super().__init__()
+        self.level = level
+        self.threshold = int(max(0.0, min(1.0, debug_sample_rate)) * 0xFFFFFFFF)
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        cid = _correlation_id.get()
+        record.correlation_id = cid
+        if record.levelno >= self.level:
+            return True
+        # Below the configured level: keep only for sampled correlation ids so a
+        # sampled delivery yields a complete debug trace
+        if not cid or not self.threshold:
+            return False
+        bucket = int.from_bytes(hashlib.blake2b(cid.encode(), digest_size=4).digest(), 'big')
+        return bucket <= self.threshold
+
+
+class StructuredLogger(logging.LoggerAdapter):
+    """
+    Logger adapter accepting structured fields as keyword arguments:
+        log.info("Verdict received", verdict='PASS', confidence=97)
+    A field named like a core key (msg, level, ts...) is written as field_<name>
+    so it cannot overwrite it.
+    """
+
+    _PASSTHROUGH = ('exc_info', 'stack_info', 'stacklevel', 'extra')
+    # Keys the formatters write themselves
+    _RESERVED = ('ts', 'level', 'logger', 'msg', 'correlation_id', 'exc', 'stack')
+
+    def process(self, msg, kwargs):
+        fields = {('field_' + k if k in self._RESERVED else k): kwargs.pop(k)
+                  for k in list(kwargs) if k not in self._PASSTHROUGH}
+        if fields:
+            extra = dict(kwargs.get('extra') or {})
+            extra['fields'] = fields
+            kwargs['extra'] = extra
+        return msg, kwargs
+
+    # Positional-only, so fields named level or msg reach process() instead of clashing
+    def log(self, level, msg, /, *args, **kwargs):
+        if self.isEnabledFor(level):
+            msg, kwargs = self.process(msg, kwargs)
+            self.logger.log(level, msg, *args, **kwargs)
+
+    def debug(self, msg, /, *args, **kwargs):
+        self.log(logging.DEBUG, msg, *args, **kwargs)
+
+    def info(self, msg, /, *args, **kwargs):
+        self.log(logging.INFO, msg, *args, **kwargs)
+
+    def warning(self, msg, /, *args, **kwargs):
+        self.log(logging.WARNING, msg, *args, **kwargs)
+
+    def error(self, msg, /, *args, **kwargs):
+        self.log(logging.ERROR, msg, *args, **kwargs)
+
+    def exception(self, msg, /, *args, exc_info=True, **kwargs):
+        self.log(logging.ERROR, msg, *args, exc_info=exc_info, **kwargs)
+
+    def critical(self, msg, /, *args, **kwargs):
+        self.log(logging.CRITICAL, msg, *args, **kwargs)
+
+
+def configure_logging(level: Optional[str] = None, fmt: Optional[str] = None,
+                      debug_sample_rate: Optional[float] = None, stream=None) -> None:
+    """
+    Install the queue-backed handler on the 'hale' logger. Safe to call more
+    than once; later calls replace the previous configuration.
+
+    Args:
+        level: Minimum level name (default HALE_LOG_LEVEL or INFO)
+        fmt: 'json' or 'text' (default HALE_LOG_FORMAT or json)
+        debug_sample_rate: Fraction of correlation ids traced at DEBUG
+        stream: Output stream (default stdout)
+    """
+    global _listener
+
+    level_name = (level or os.getenv('HALE_LOG_LEVEL', 'INFO')).upper()
+    level_no = logging.getLevelName(level_name)
+    if not isinstance(level_no, int):
+        level_no = logging.INFO
+    fmt = (fmt or os.getenv('HALE_LOG_FORMAT', 'json')).lower()
+    if debug_sample_rate is None:
+        debug_sample_rate = float(os.getenv('HALE_LOG_DEBUG_SAMPLE_RATE', '0') or 0)
+
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(TextFormatter() if fmt == 'text' else JsonFormatter())
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _QueueHandler(log_queue)
+    queue_handler.addFilter(_ContextFilter(level_no, debug_sample_rate))
+
+    root = logging.getLogger('hale')
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.propagate = False
+    # Let DEBUG through to the filter only when sampling is on
+    root.setLevel(logging.DEBUG if debug_sample_rate > 0 else level_no)
+
+    _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=False)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+def get_logger(name: str) -> StructuredLogger:
+    """Return the structured logger 'hale.<name>', configuring logging on first use."""
+    if _listener is None:
+        configure_logging()
+    return StructuredLogger(logging.getLogger(f'hale.{name}'), {})
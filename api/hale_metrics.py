@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""
+HALE Metrics
+Lightweight, dependency-free Prometheus metrics for the oracle and bridge.
+
+Metrics are process-local and rendered in the Prometheus text exposition
+format by render_metrics() (served on /metrics by index.py, or by
+start_metrics_server() for the standalone relayer).
+"""
+
+import time
+import bisect
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from typing import Dict, Tuple, Optional, Callable, List, Sequence
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Latency buckets (seconds) covering fast RPC reads up to slow receipt waits
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = '') -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return '{' + ','.join(parts) + '}' if parts else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    """Base class: one named metric family with a fixed set of label names."""
+
+    kind = 'untyped'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(n, '')) for n in self.labelnames)
+
+    def collect(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self.collect())
+        return '\n'.join(lines)
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter."""
+
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, or be computed at scrape time."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._functions: Dict[Tuple[str, ...], Callable[[], float]] = {}
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+    def set_function(self, fn: Callable[[], float], **labels):
+        """Evaluate fn at scrape time instead of storing a value (keeps the hot path free)."""
+        key = self._key(labels)
+        with self._lock:
+            self._functions[key] = fn
+
+    def value(self, **labels) -> float:
+        key = self._key(labels)
+        fn = self._functions.get(key)
+        return fn() if fn else self._values.get(key, 0)
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = dict(self._values)
+            functions = list(self._functions.items())
+        for key, fn in functions:
+            try:
+                items[key] = fn()
+            except Exception:
+                continue
+        return [f'{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}' for k, v in items.items()]
+
+
+class _Timer:
+    """Context manager that observes its elapsed time into a histogram."""
+
+    __slots__ = ('_histogram', '_labels', '_start')
+
+    def __init__(self, histogram: 'Histogram', labels: Dict[str, str]):
+        self._histogram = histogram
+        self._labels = labels
+
+    def __enter__(self):
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self._histogram.observe(time.perf_counter() - self._start, **self._labels)
+        return False
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket histogram (stored as per-bucket counts, summed at render)."""
+
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [per-bucket counts..., +Inf count, sum]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * (len(self.buckets) + 2)
+            state[index] += 1
+            state[-1] += value
+
+    def time(self, **labels) -> _Timer:
+        """Usage: with STAGE_LATENCY.time(stage='gemini_call'): ..."""
+        return _Timer(self, labels)
+
+    def count(self, **labels) -> int:
+        state = self._values.get(self._key(labels))
+        return int(sum(state[:-1])) if state else 0
+
+    def collect(self) -> List[str]:
+        with self._lock:
+            items = [(k, list(v)) for k, v in self._values.items()]
+        lines = []
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f'{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(state[-1])}')
+            lines.append(f'{self.name}_count{labels} {_format_value(cumulative)}')
+        return lines
+
+
+class Registry:
+    """Collection of metric families rendered together."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        return '\n'.join(m.render() for m in metrics) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames))
+
+
+def histogram(name: str, documentation: str, labelnames: Sequence[str] = (),
+              buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format."""
+    return REGISTRY.render()
+
+
+# --- HALE METRICS ---
+
+# stage: solana_init, gemini_call, sandbox, solana_seal, arc_build, arc_sign, arc_send, arc_receipt_wait
+STAGE_LATENCY = histogram(
+    'hale_stage_duration_seconds', 'Latency of each delivery pipeline stage', ['stage'])
+DELIVERY_LATENCY = histogram(
+    'hale_delivery_duration_seconds', 'End-to-end latency of process_delivery')
+VERDICTS = counter(
+    'hale_verdicts_total', 'Verdicts returned by verify_delivery', ['verdict'])
+FALLBACKS = counter(
+    'hale_fallbacks_total', 'Verdicts produced by a fallback path instead of Gemini', ['reason'])
+CACHE_HITS = counter(
+    'hale_cache_hits_total', 'Cache hits', ['cache'])
+CACHE_MISSES = counter(
+    'hale_cache_misses_total', 'Cache misses', ['cache'])
+RPC_ERRORS = counter(
+    'hale_rpc_errors_total', 'Failed chain RPC operations', ['chain', 'operation'])
+RPC_LATENCY = histogram(
+    'hale_rpc_request_duration_seconds', 'Latency of successful RPC requests per endpoint', ['chain', 'endpoint'])
+RPC_BATCH_SIZE = histogram(
+    'hale_rpc_batch_size', 'Requests per JSON-RPC payload sent to a node', ['chain'],
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+RPC_ENDPOINT_UP = gauge(
+    'hale_rpc_endpoint_up', 'Whether an RPC endpoint is in rotation (0 while on failure cooldown)', ['chain', 'endpoint'])
+SETTLEMENTS = counter(
+    'hale_settlements_total', 'Arc escrow settlement attempts', ['action', 'outcome'])
+SIMULATIONS = counter(
+    'hale_preflight_simulations_total', 'Pre-flight eth_call simulations of settlements', ['action', 'outcome'])
+SETTLEMENT_BATCH_SIZE = histogram(
+    'hale_settlement_batch_size', 'Settlements submitted together by the settlement batcher',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+JOURNAL_COMMIT_SIZE = histogram(
+    'hale_journal_commit_records', 'Records written per settlement journal fsync',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128))
+JOURNAL_COMMIT_LATENCY = histogram(
+    'hale_journal_commit_duration_seconds', 'Write plus fsync time of one settlement journal commit')
+QUEUE_DEPTH = gauge(
+    'hale_queue_depth', 'Items waiting in a work queue', ['queue'])
+SOLANA_CONFIRMATIONS = counter(
+    'hale_solana_confirmations_total', 'Solana transactions resolved by the confirmation service', ['outcome'])
+SOLANA_RESENDS = counter(
+    'hale_solana_resends_total', 'Unconfirmed Solana transactions re-sent before blockhash expiry')
+REPORT_WINDOW_SIZE = histogram(
+    'hale_report_window_size', 'Verdicts anchored under one Merkle root',
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256))
+SIGNER_BALANCE = gauge(
+    'hale_signer_balance', 'Balance of each pool signer (lamports on Solana, wei on Arc)', ['chain', 'signer'])
+BRIDGE_PENDING = gauge(
+    'hale_bridge_pending_mappings', 'Bridge mappings still waiting to be synced to Arc')
+BRIDGE_SYNCS = counter(
+    'hale_bridge_syncs_total', 'Bridge sync attempts', ['outcome'])
+INTENTS = counter(
+    'hale_intents_total', 'Intents validated and hashed by the intent library', ['result'])
+
+
+def start_metrics_server(port: int, host: str = '0.0.0.0') -> Optional[ThreadingHTTPServer]:
+    """
+    Serve /metrics on a background thread (for processes without Flask, e.g. the relayer).
+
+    Args:
+        port: TCP port to listen on
+        host: Interface to bind
+
+    Returns:
+        The running server, or None if it could not be started
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            if self.path.split('?', 1)[0] != '/metrics':
+                self.send_response(404)
+                self.end_headers()
+                return
+            body = render_metrics().encode()
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    try:
+        server = ThreadingHTTPServer((host, port), Handler)
+    except OSError as e:
+        print(f"[Metrics] Could not start metrics server on {host}:{port}: {e}")
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"[Metrics] Serving Prometheus metrics on http://{host}:{port}/metrics")
+    return server
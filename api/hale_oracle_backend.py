@@ -9,32 +9,40 @@ HALE (H-A-L-E = 8 in numerology) represents balance and strength.
 import json
 import os
 import sys
+import base64
 import subprocess
 import tempfile
 import time
 import struct
-from typing import Dict, Any, Optional
-try:
-    # Try new google.genai package first
-    import google.genai as genai
-    USE_NEW_API = True
-except ImportError:
-    # Fallback to deprecated package with warning
-    import google.generativeai as genai
-    USE_NEW_API = False
-    import warnings
-    warnings.warn("google.generativeai is deprecated. Install google-genai package for future compatibility.", DeprecationWarning)
-from web3 import Web3
+import threading
+import uuid
+from typing import Dict, Any, Optional, List
 import hashlib
-from solana.rpc.api import Client as SolanaClient
-from solana.rpc.async_api import AsyncClient
 from solders.keypair import Keypair
 from solders.pubkey import Pubkey
 from solders.system_program import ID as SYS_PROGRAM_ID
-import asyncio
 from solders.instruction import Instruction, AccountMeta
 from solders.transaction import Transaction
 from solders.message import Message
+from hale_metrics import (
+    STAGE_LATENCY,
+    DELIVERY_LATENCY,
+    VERDICTS,
+    FALLBACKS,
+    RPC_ERRORS,
+    SETTLEMENTS,
+    QUEUE_DEPTH,
+    CACHE_HITS
+)
+from hale_logging import get_logger, set_correlation_id, reset_correlation_id
+from hale_capability_cache import get_capability_cache
+from hale_preflight import SimulatedRevert, classify_error, preflight_enabled, simulate
+from hale_pda_cache import INITIAL_METADATA_URI, discriminator, get_pda_cache, intent_hash as attestation_intent_hash
+from hale_compute_budget import ComputeBudgetTuner, MAX_TRANSACTION_UNITS, PACKET_DATA_SIZE, compute_budget_enabled
+from hale_signer_pool import SignerPool, ArcSigner
+from hale_report_anchor import ReportAnchor
+from hale_blob_store import content_hash as delivery_hash, hydrate as hydrate_delivery
+from hale_journal import DeliveryInProgress, check_replay
 
 # Load environment variables from .env file
 try:
@@ -73,6 +81,41 @@ if os.environ.get('MOCK_GEMINI') is None:
     # For now, let's default to False unless we detect failure
     pass
 
+# Heavy SDKs (google.genai, web3, solana-py) are imported on first use so that
+# importing this module, and constructing an oracle, stays cheap on cold start.
+genai = None
+USE_NEW_API = None
+
+# Used until the first listing lands (every cold instance), so it must be a model that is still served
+DEFAULT_GEMINI_MODEL = 'gemini-2.5-flash'
+MODEL_PREFERENCES = {
+    'new': ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash', 'gemini-pro'],
+    'legacy': ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro'],
+}
+
+
+def _load_genai():
+    """Import the Gemini SDK on first use."""
+    global genai, USE_NEW_API
+    if genai is None:
+        try:
+            # Try new google.genai package first
+            import google.genai as genai_module
+            USE_NEW_API = True
+        except ImportError:
+            # Fallback to deprecated package with warning
+            import google.generativeai as genai_module
+            USE_NEW_API = False
+            import warnings
+            warnings.warn("google.generativeai is deprecated. Install google-genai package for future compatibility.", DeprecationWarning)
+        genai = genai_module
+    return genai
+
+
+log = get_logger('oracle')
+arc_log = get_logger('arc')
+solana_log = get_logger('solana')
+
 
 class HaleOracle:
     """HALE Oracle that verifies deliveries using Gemini AI."""
@@ -88,11 +131,26 @@ class HaleOracle:
         self.gemini_api_key = gemini_api_key
         self.arc_rpc_url = arc_rpc_url
         self.mock_mode = False
+        # Simulated Gemini latency in mock mode (set to 0 when benchmarking pipeline overhead)
+        self.mock_latency = float(os.getenv('MOCK_GEMINI_LATENCY', '1'))
         
         # Solana Configuration
         self.solana_rpc_url = os.getenv('SOLANA_RPC_URL', 'https://api.devnet.solana.com')
         self.solana_program_id = Pubkey.from_string("CnwQj2kPHpTbAvJT3ytzekrp7xd4HEtZJuEua9yn9MMe")
-        self.solana_client = SolanaClient(self.solana_rpc_url)
+        self.pda_cache = get_pda_cache(self.solana_program_id)
+        
+        # Clients are created lazily (see solana_client, web3 and _ensure_gemini)
+        self._solana_client = None
+        self._web3 = None
+        self._fee_estimator = None
+        self._journal = False  # False = not resolved yet; None = disabled
+        self._report_anchor = None
+        self._report_anchor_lock = threading.Lock()
+        self._gemini_ready = False
+        self._gemini_lock = threading.Lock()
+        self.init_timings: Dict[str, float] = {}
+        # False: borderline verdicts are still marked PENDING_REVIEW, but no review task is created
+        self.queue_reviews = True
         
         # Load Solana Keypair
         self.solana_keypair = None
@@ -102,79 +160,24 @@ class HaleOracle:
                 with open(keypair_path, 'r') as f:
                     secret_key = json.load(f)
                     self.solana_keypair = Keypair.from_bytes(bytes(secret_key))
-                print(f"[Solana] Loaded Oracle Keypair from file: {self.solana_keypair.pubkey()}")
+                solana_log.info("Loaded oracle keypair from file", pubkey=str(self.solana_keypair.pubkey()))
             except Exception as e:
-                print(f"[Solana] Error loading keypair from file: {e}")
+                solana_log.error("Error loading keypair from file", error=str(e))
         
         # Fallback to environment variable
         if not self.solana_keypair and os.getenv('SOLANA_KEYPAIR'):
             try:
                 secret_key = json.loads(os.getenv('SOLANA_KEYPAIR'))
                 self.solana_keypair = Keypair.from_bytes(bytes(secret_key))
-                print(f"[Solana] Loaded Oracle Keypair from environment: {self.solana_keypair.pubkey()}")
+                solana_log.info("Loaded oracle keypair from environment", pubkey=str(self.solana_keypair.pubkey()))
             except Exception as e:
-                print(f"[Solana] Error loading keypair from environment variable: {e}")
+                solana_log.error("Error loading keypair from environment variable", error=str(e))
         
         # Check MOCK_MOD env override
         if os.environ.get('MOCK_GEMINI') == 'true' or os.environ.get('MOCK_GEMINI') == '1':
             self.mock_mode = True
-            print("[HALE Oracle] Mock mode forced via environment variable.")
+            log.info("Mock mode forced via environment variable")
 
-        # Configure Gemini
-        if not self.mock_mode:
-            try:
-                if USE_NEW_API:
-                    # New google.genai API
-                    if not gemini_api_key:
-                        raise ValueError("No Gemini API Key provided")
-                    self.client = genai.Client(api_key=gemini_api_key)
-                    
-                    # Detect best available model
-                    self.model_name = 'gemini-1.5-flash' # Default
-                    try:
-                        resp = self.client.models.list()
-                        available = [m.name for m in resp]
-                        model_prefs = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash', 'gemini-pro']
-                        for pref in model_prefs:
-                            if pref in available or f'models/{pref}' in available:
-                                self.model_name = pref
-                                break
-                        print(f"[HALE Oracle] New API: Selected model {self.model_name}")
-                    except Exception as e:
-                        print(f"[HALE Oracle] New API model detection failed: {e}")
-                else:
-                    # Legacy google.generativeai API
-                    if not gemini_api_key:
-                        raise ValueError("No Gemini API Key provided")
-                        
-                    genai.configure(api_key=gemini_api_key)
-                    
-                    # Try to list models to verify connectivity and auth
-                    try:
-                        list(genai.list_models(page_size=1))
-                    except Exception as e:
-                        print(f"[HALE Oracle] Network/Auth check failed: {e}")
-                        raise e
-
-                    if not self.mock_mode:
-                        self.model_name = 'gemini-1.5-flash' # Default
-                        try:
-                            # Try newer models first
-                            available_models = [m.name for m in genai.list_models() 
-                                              if 'generateContent' in m.supported_generation_methods]
-                            model_preferences = ['gemini-2.5-flash', 'gemini-2.0-flash', 'gemini-1.5-flash', 'gemini-1.5-pro', 'gemini-pro']
-                            for pref in model_preferences:
-                                if pref in available_models or f'models/{pref}' in available_models:
-                                    self.model_name = pref
-                                    break
-                        except Exception:
-                            pass
-                        print(f"[HALE Oracle] Legacy API: Selected model {self.model_name}")
-            except Exception as e:
-                print(f"[HALE Oracle] Failed to initialize Gemini API: {e}")
-                print("[HALE Oracle] Switching to MOCK MODE.")
-                self.mock_mode = True
-        
         # Load system prompt
         try:
             system_prompt_path = os.path.join(
@@ -186,32 +189,11 @@ class HaleOracle:
         except Exception:
             self.system_prompt = "You are a forensic code auditor."
         
-        # Initialize Gemini model object if not mocking
-        if not self.mock_mode:
-            if USE_NEW_API:
-                self.model = self.model_name
-            else:
-                self.model = genai.GenerativeModel(
-                    model_name=self.model_name,
-                    system_instruction=self.system_prompt
-                )
-        
-        # Initialize Web3
-        self.web3 = None
-        if arc_rpc_url:
-            try:
-                self.web3 = Web3(Web3.HTTPProvider(arc_rpc_url, request_kwargs={'timeout': 10}))
-                if not self.web3.is_connected():
-                    print("Warning: Could not connect to Arc blockchain (will retry on transaction)")
-            except Exception as e:
-                print(f"Warning: Error initializing Web3: {e}")
-                # Keep the object if possible, or retry later
-                if self.web3 is None:
-                     self.web3 = Web3(Web3.HTTPProvider(arc_rpc_url, request_kwargs={'timeout': 10}))
-    
         # Load Oracle Identity
         self.oracle_private_key = os.getenv('ORACLE_PRIVATE_KEY') or os.getenv('PRIVATE_KEY')
         self.oracle_address = os.getenv('HALE_ORACLE_ADDRESS')
+        # Deliveries are sharded across every configured Solana keypair and Arc key
+        self.signers = SignerPool.from_env(self.solana_keypair, self.oracle_private_key)
         
         # Load ABI
         try:
@@ -226,9 +208,183 @@ class HaleOracle:
                     {"inputs":[{"internalType":"address","name":"seller","type":"address"},{"internalType":"string","name":"reason","type":"string"}],"name":"refund","outputs":[],"stateMutability":"nonpayable","type":"function"}
                 ]
         except Exception as e:
-            print(f"Warning: Failed to load ABI: {e}")
+            log.warning("Failed to load ABI", error=str(e))
             self.escrow_abi = []
     
+    @property
+    def solana_client(self):
+        """
+        Solana RPC client (the process-wide keep-alive pool for solana_rpc_url
+        plus SOLANA_RPC_URLS), created on first use.
+        """
+        if self._solana_client is None:
+            from hale_rpc_pool import get_solana_pool
+            self._solana_client = get_solana_pool(self.solana_rpc_url)
+        return self._solana_client
+    
+    @property
+    def solana_confirmer(self):
+        """Batched signature confirmation for the Solana pool (see hale_solana_confirmer)."""
+        from hale_solana_confirmer import get_confirmer
+        return get_confirmer(self.solana_client)
+    
+    @property
+    def compute_budget(self) -> ComputeBudgetTuner:
+        """Compute-unit limits and priority fees for the Solana pool (see hale_compute_budget)."""
+        from hale_compute_budget import get_compute_budget
+        return get_compute_budget(self.solana_client)
+    
+    @property
+    def web3(self):
+        """
+        Web3 connection to Arc over the process-wide RPC pool (arc_rpc_url plus
+        ARC_RPC_URLS), created on first use. No connectivity probe is made
+        here; callers check is_connected() when they need to.
+        """
+        if self._web3 is None and self.arc_rpc_url:
+            started = time.perf_counter()
+            try:
+                from web3 import Web3
+                from hale_rpc_pool import ArcPoolProvider, get_arc_pool
+                self._web3 = Web3(ArcPoolProvider(get_arc_pool(self.arc_rpc_url)))
+            except Exception as e:
+                arc_log.warning("Error initializing Web3", error=str(e))
+            self.init_timings.setdefault('web3_ms', round((time.perf_counter() - started) * 1000, 1))
+        return self._web3
+    
+    @web3.setter
+    def web3(self, value):
+        self._web3 = value
+    
+    @property
+    def fee_estimator(self):
+        """Shared EIP-1559 fee sampler and gas-limit cache for arc_rpc_url, created on first use."""
+        if self._fee_estimator is None and self.arc_rpc_url:
+            from hale_fee_estimator import get_fee_estimator
+            self._fee_estimator = get_fee_estimator(self.arc_rpc_url)
+        return self._fee_estimator
+    
+    @property
+    def journal(self):
+        """Process-wide write-ahead settlement journal, or None when disabled (see hale_journal)."""
+        if self._journal is False:
+            from hale_journal import get_journal
+            self._journal = get_journal()
+        return self._journal
+    
+    @journal.setter
+    def journal(self, value):
+        self._journal = value
+    
+    @property
+    def report_anchor(self) -> ReportAnchor:
+        """Windows verdicts under Merkle roots for sealing (see hale_report_anchor), created on first use."""
+        if self._report_anchor is None:
+            with self._report_anchor_lock:
+                if self._report_anchor is None:
+                    self._report_anchor = ReportAnchor(self)
+        return self._report_anchor
+    
+    @property
+    def blobs(self):
+        """Process-wide delivery blob store (see hale_blob_store), opened on first use."""
+        from hale_blob_store import get_blob_store
+        return get_blob_store()
+    
+    @property
+    def review_queue(self):
+        """Process-wide human review queue (see hale_review_queue), opened on first use."""
+        from hale_review_queue import get_review_queue
+        return get_review_queue()
+    
+    def _list_models(self) -> Dict[str, list]:
+        """List available Gemini models with their supported methods."""
+        if USE_NEW_API:
+            return {m.name: list(getattr(m, 'supported_actions', None) or [])
+                    for m in self.client.models.list()}
+        return {m.name: list(m.supported_generation_methods) for m in genai.list_models()}
+    
+    def _select_model(self) -> str:
+        """
+        Pick the best available Gemini model from the shared capability cache.
+        Never blocks on a listing: a cold or stale cache is refreshed in the
+        background and the default (or previous) model is used meanwhile.
+        GEMINI_MODEL pins the model and skips the cache.
+        """
+        override = os.getenv('GEMINI_MODEL')
+        if override:
+            return override
+        api = 'new' if USE_NEW_API else 'legacy'
+        return get_capability_cache().select_model(
+            api, MODEL_PREFERENCES[api], self._list_models, DEFAULT_GEMINI_MODEL)
+    
+    def _refresh_model(self):
+        """Switch to a newer cached model selection, if the background refresh found one."""
+        model_name = self._select_model()
+        if model_name == self.model_name:
+            return
+        log.info("Selected Gemini model", api='new' if USE_NEW_API else 'legacy', model=model_name)
+        self.model_name = model_name
+        if USE_NEW_API:
+            self.model = model_name
+        else:
+            self.model = genai.GenerativeModel(
+                model_name=model_name,
+                system_instruction=self.system_prompt
+            )
+    
+    def _ensure_gemini(self) -> bool:
+        """
+        Configure the Gemini client on first use.
+        
+        Returns:
+            True if Gemini is ready, False if the oracle is (now) in mock mode
+        """
+        if self._gemini_ready or self.mock_mode:
+            return not self.mock_mode
+        with self._gemini_lock:
+            if self._gemini_ready or self.mock_mode:
+                return not self.mock_mode
+            started = time.perf_counter()
+            try:
+                if not self.gemini_api_key:
+                    raise ValueError("No Gemini API Key provided")
+                _load_genai()
+                # GEMINI_BASE_URL points the client at a proxy or local stub (see hale_bench.py)
+                base_url = os.getenv('GEMINI_BASE_URL')
+                if USE_NEW_API:
+                    # New google.genai API
+                    http_options = {'base_url': base_url} if base_url else None
+                    self.client = genai.Client(api_key=self.gemini_api_key, http_options=http_options)
+                else:
+                    # Legacy google.generativeai API
+                    if base_url:
+                        genai.configure(api_key=self.gemini_api_key, transport='rest',
+                                        client_options={'api_endpoint': base_url})
+                    else:
+                        genai.configure(api_key=self.gemini_api_key)
+                self.model_name = None
+                self._refresh_model()
+                self._gemini_ready = True
+            except Exception as e:
+                log.error("Failed to initialize Gemini API; switching to mock mode", error=str(e))
+                self.mock_mode = True
+            self.init_timings['gemini_ms'] = round((time.perf_counter() - started) * 1000, 1)
+            return not self.mock_mode
+    
+    def warm_up(self) -> Dict[str, float]:
+        """
+        Eagerly create every client (for long-running processes that would
+        rather pay the start-up cost before the first delivery).
+        
+        Returns:
+            Initialization timings in milliseconds
+        """
+        self._ensure_gemini()
+        self.web3
+        self.solana_client
+        return dict(self.init_timings)
+    
     def format_verification_request(self, contract_data: Dict[str, Any]) -> str:
         """
         Format the contract data into a prompt for Gemini.
@@ -262,123 +418,162 @@ class HaleOracle:
         Returns:
             Dictionary containing verdict, confidence_score, release_funds, etc.
         """
-        print(f"[HALE Oracle] Analyzing delivery for transaction: {contract_data.get('transaction_id', 'unknown')}")
-        print(f"[HALE Oracle] Contract Terms: {contract_data.get('Contract_Terms', '')[:100]}...")
+        log.info("Analyzing delivery", transaction_id=contract_data.get('transaction_id', 'unknown'))
+        log.debug("Contract terms", contract_terms=contract_data.get('Contract_Terms', '')[:100])
         
         # Format the request
         user_prompt = self.format_verification_request(contract_data)
         
-        # Check for MOCK_GEMINI mode
-        if self.mock_mode or os.environ.get('MOCK_GEMINI') == 'true' or os.environ.get('MOCK_GEMINI') == '1':
-            print("[HALE Oracle] MOCK MODE ACTIVATED: Skipping Gemini API call.")
-            time.sleep(1) # Simulate network delay
-            return {
-                "verdict": "PASS",
-                "confidence_score": 98,
-                "reasoning": "MOCK MODE: Verification passed (simulated). Code structure looks valid.",
-                "release_funds": True,
-                "risk_flags": []
-            }
+        # Check for MOCK_GEMINI mode (configures Gemini on the first real call)
+        if self._use_mock():
+            time.sleep(self.mock_latency) # Simulate network delay
+            return self._mock_verdict()
         
+        response_text = None
         try:
             # Send to Gemini
-            print("[HALE Oracle] Sending delivery to HALE Oracle (Gemini)...")
-            
-            if USE_NEW_API:
-                # New google.genai API
-                response = self.client.models.generate_content(
-                    model=self.model_name,
-                    contents=user_prompt,
-                    config={'system_instruction': self.system_prompt}
-                )
-                response_text = response.text.strip()
-            else:
-                # Legacy google.generativeai API
-                response = self.model.generate_content(user_prompt)
-                response_text = response.text.strip()
+            log.debug("Sending delivery to Gemini")
+            self._refresh_model()
             
-            # Remove markdown code blocks if present
-            if response_text.startswith('```'):
-                # Find the JSON part
-                json_start = response_text.find('{')
-                json_end = response_text.rfind('}') + 1
-                if json_start != -1 and json_end > json_start:
-                    response_text = response_text[json_start:json_end]
-            
-            # Parse JSON
-            verdict = json.loads(response_text)
-            
-            print(f"[HALE Oracle] Verdict: {verdict.get('verdict', 'UNKNOWN')}")
-            print(f"[HALE Oracle] Confidence: {verdict.get('confidence_score', 0)}%")
-            print(f"[HALE Oracle] Reasoning: {verdict.get('reasoning', 'N/A')}")
+            gemini_started = time.perf_counter()
+            with STAGE_LATENCY.time(stage='gemini_call'):
+                if USE_NEW_API:
+                    # New google.genai API
+                    response = self.client.models.generate_content(
+                        model=self.model_name,
+                        contents=user_prompt,
+                        config={'system_instruction': self.system_prompt}
+                    )
+                    response_text = response.text.strip()
+                else:
+                    # Legacy google.generativeai API
+                    response = self.model.generate_content(user_prompt)
+                    response_text = response.text.strip()
+            get_capability_cache().record_latency('new' if USE_NEW_API else 'legacy', self.model_name,
+                                                  time.perf_counter() - gemini_started)
             
-            if verdict.get('risk_flags'):
-                print(f"[HALE Oracle] Risk Flags: {', '.join(verdict.get('risk_flags', []))}")
+            verdict = self._parse_verdict(response_text)
+            return self._review_verdict(contract_data, verdict)
             
-            # --- SUGGESTION 2: AUTOMATED EXECUTION SHUTTLING ---
-            # If the verdict is PASS but it's code, we run a quick sanity check
-            content = contract_data.get('Delivery_Content', '')
-            if verdict.get('verdict') == 'PASS' and self._is_executable_code(content):
-                print("[HALE Oracle] Pass detected for code delivery. Running sandboxed sanity check...")
+        except Exception as e:
+            if self._is_quota_error(e):
+                time.sleep(1)
+            return self._fallback_verdict(contract_data, e, response_text)
+    
+    def _use_mock(self) -> bool:
+        """True if verification should skip Gemini (forced or after a failed setup)."""
+        if not self._ensure_gemini() or os.environ.get('MOCK_GEMINI') == 'true' or os.environ.get('MOCK_GEMINI') == '1':
+            log.info("Mock mode: skipping Gemini API call")
+            return True
+        return False
+    
+    def _mock_verdict(self) -> Dict[str, Any]:
+        FALLBACKS.inc(reason='mock_mode')
+        VERDICTS.inc(verdict='PASS')
+        return {
+            "verdict": "PASS",
+            "confidence_score": 98,
+            "reasoning": "MOCK MODE: Verification passed (simulated). Code structure looks valid.",
+            "release_funds": True,
+            "risk_flags": []
+        }
+    
+    def _parse_verdict(self, response_text: str) -> Dict[str, Any]:
+        """Extract the verdict JSON from a Gemini response (raises json.JSONDecodeError)."""
+        # Remove markdown code blocks if present
+        if response_text.startswith('```'):
+            # Find the JSON part
+            json_start = response_text.find('{')
+            json_end = response_text.rfind('}') + 1
+            if json_start != -1 and json_end > json_start:
+                response_text = response_text[json_start:json_end]
+        
+        # Parse JSON
+        verdict = json.loads(response_text)
+        
+        log.info("Verdict received", verdict=verdict.get('verdict', 'UNKNOWN'),
+                 confidence=verdict.get('confidence_score', 0), risk_flags=verdict.get('risk_flags', []))
+        log.debug("Verdict reasoning", reasoning=verdict.get('reasoning', 'N/A'))
+        return verdict
+    
+    def _review_verdict(self, contract_data: Dict[str, Any], verdict: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the sandbox check and human-review routing to a parsed verdict (blocking)."""
+        # --- SUGGESTION 2: AUTOMATED EXECUTION SHUTTLING ---
+        # If the verdict is PASS but it's code, we run a quick sanity check
+        content = contract_data.get('Delivery_Content', '')
+        if verdict.get('verdict') == 'PASS' and self._is_executable_code(content):
+            log.info("PASS for code delivery; running sandboxed sanity check")
+            with STAGE_LATENCY.time(stage='sandbox'):
                 sandbox_result = self.run_sandbox_test(content)
-                if not sandbox_result['success']:
-                    print(f"[HALE Oracle] SANDBOX FAILURE: {sandbox_result['error']}")
-                    verdict['verdict'] = 'FAIL'
-                    verdict['release_funds'] = False
-                    verdict['confidence_score'] = min(verdict['confidence_score'], 40)
-                    verdict['reasoning'] += f"\n\nSANDBOX FAILURE: The code failed to execute or contained errors: {sandbox_result['error']}"
-                    verdict['risk_flags'].append("RUNTIME_ERROR")
-            
-            # --- SUGGESTION 3: HUMAN-IN-THE-LOOP (HITL) ---
-            # If confidence is borderline (70-89), we mark for review instead of auto-releasing
-            confidence = verdict.get('confidence_score', 0)
-            if 70 <= confidence < 90 and verdict.get('verdict') == 'PASS':
-                print(f"[HALE Oracle] Borderline confidence ({confidence}%). Queuing for Human Review.")
-                verdict['verdict'] = 'PENDING_REVIEW'
+            if not sandbox_result['success']:
+                log.warning("Sandbox failure", error=sandbox_result['error'])
+                verdict['verdict'] = 'FAIL'
                 verdict['release_funds'] = False
-                verdict['reasoning'] += "\n\nSTATUS: Queued for manual forensic audit due to borderline confidence score."
-                self.queue_for_review(contract_data, verdict)
-            
-            return verdict
-            
-        except Exception as e:
-            error_str = str(e)
-            
-            # 1. Handle API Quota / Rate Limits
-            if "RESOURCE_EXHAUSTED" in error_str or "429" in error_str:
-                print(f"[HALE Oracle] ⚠️ Quota Exceeded (429). Falling back to MOCK MODE for this request.")
-                time.sleep(1) 
-                return {
-                    "verdict": "PASS",
-                    "confidence_score": 99,
-                    "reasoning": "MOCK MODE (Fallback): Verification passed. The live Gemini API quota was exceeded, so this mock verdict was generated to allow the flow to continue.",
-                    "release_funds": True,
-                    "risk_flags": ["QUOTA_EXCEEDED_FALLBACK"]
-                }
-
-            # 2. Handle JSON Parsing Errors
-            if isinstance(e, json.JSONDecodeError):
-                print(f"[HALE Oracle] ERROR: Failed to parse JSON response: {e}")
-                print(f"[HALE Oracle] Raw response: {response_text[:500] if 'response_text' in locals() else 'None'}")
-                return {
-                    "transaction_id": contract_data.get('transaction_id', ''),
-                    "verdict": "FAIL",
-                    "confidence_score": 0,
-                    "release_funds": False,
-                    "reasoning": f"Failed to parse HALE Oracle response: {str(e)}",
-                    "risk_flags": ["JSON_PARSE_ERROR"]
-                }
-            
-            # 3. Handle Generic Errors
-            print(f"[HALE Oracle] ERROR: {str(e)}")
+                verdict['confidence_score'] = min(verdict['confidence_score'], 40)
+                verdict['reasoning'] += f"\n\nSANDBOX FAILURE: The code failed to execute or contained errors: {sandbox_result['error']}"
+                verdict['risk_flags'].append("RUNTIME_ERROR")
+        
+        # --- SUGGESTION 3: HUMAN-IN-THE-LOOP (HITL) ---
+        # If confidence is borderline (70-89), we mark for review instead of auto-releasing
+        confidence = verdict.get('confidence_score', 0)
+        if 70 <= confidence < 90 and verdict.get('verdict') == 'PASS':
+            log.info("Borderline confidence; queuing for human review", confidence=confidence)
+            verdict['verdict'] = 'PENDING_REVIEW'
+            verdict['release_funds'] = False
+            verdict['reasoning'] += "\n\nSTATUS: Queued for manual forensic audit due to borderline confidence score."
+            if self.queue_reviews:
+                verdict['review_id'] = self.queue_for_review(contract_data, verdict)
+        
+        VERDICTS.inc(verdict=verdict.get('verdict', 'UNKNOWN'))
+        return verdict
+    
+    def _is_quota_error(self, e: Exception) -> bool:
+        error_str = str(e)
+        return "RESOURCE_EXHAUSTED" in error_str or "429" in error_str
+    
+    def _fallback_verdict(self, contract_data: Dict[str, Any], e: Exception,
+                          response_text: Optional[str] = None) -> Dict[str, Any]:
+        """Verdict returned when the Gemini call or its parsing failed."""
+        # 1. Handle API Quota / Rate Limits
+        if self._is_quota_error(e):
+            log.warning("Gemini quota exceeded (429); falling back to mock verdict")
+            FALLBACKS.inc(reason='quota_exceeded')
+            VERDICTS.inc(verdict='PASS')
+            return {
+                "verdict": "PASS",
+                "confidence_score": 99,
+                "reasoning": "MOCK MODE (Fallback): Verification passed. The live Gemini API quota was exceeded, so this mock verdict was generated to allow the flow to continue.",
+                "release_funds": True,
+                "risk_flags": ["QUOTA_EXCEEDED_FALLBACK"]
+            }
+
+        # 2. Handle JSON Parsing Errors
+        if isinstance(e, json.JSONDecodeError):
+            log.error("Failed to parse Gemini JSON response", error=str(e))
+            log.debug("Raw Gemini response", raw_response=response_text[:500] if response_text else None)
+            FALLBACKS.inc(reason='json_parse_error')
+            VERDICTS.inc(verdict='FAIL')
             return {
                 "transaction_id": contract_data.get('transaction_id', ''),
                 "verdict": "FAIL",
                 "confidence_score": 0,
                 "release_funds": False,
-                "reasoning": f"HALE Oracle verification failed: {str(e)}",
-                "risk_flags": ["SYSTEM_ERROR"]
+                "reasoning": f"Failed to parse HALE Oracle response: {str(e)}",
+                "risk_flags": ["JSON_PARSE_ERROR"]
             }
+        
+        # 3. Handle Generic Errors
+        log.error("Verification failed", error=str(e))
+        FALLBACKS.inc(reason='system_error')
+        VERDICTS.inc(verdict='FAIL')
+        return {
+            "transaction_id": contract_data.get('transaction_id', ''),
+            "verdict": "FAIL",
+            "confidence_score": 0,
+            "release_funds": False,
+            "reasoning": f"HALE Oracle verification failed: {str(e)}",
+            "risk_flags": ["SYSTEM_ERROR"]
+        }
     
     def _is_executable_code(self, content: str) -> bool:
         """Helper to determine if content looks like Python code."""
@@ -475,28 +670,52 @@ except Exception as e:
                 except:
                     pass
 
-    def queue_for_review(self, contract_data: Dict[str, Any], verdict: Dict[str, Any]):
-        """Saves a borderline verification to the pending_reviews directory."""
-        review_id = f"review_{contract_data.get('transaction_id', int(time.time()))}"
-        # Ensure path is absolute and directory exists
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-        reviews_dir = os.path.join(base_dir, 'pending_reviews')
-        if not os.path.exists(reviews_dir):
-            os.makedirs(reviews_dir)
-            
-        review_path = os.path.join(reviews_dir, f"{review_id}.json")
-        
-        review_data = {
-            "id": review_id,
-            "timestamp": time.time(),
-            "contract_data": contract_data,
-            "ai_verdict": verdict,
-            "status": "pending"
-        }
+    def queue_for_review(self, contract_data: Dict[str, Any], verdict: Dict[str, Any],
+                         seller_address: Optional[str] = None, contract_address: Optional[str] = None) -> str:
+        """Queue a borderline verification for human review; returns the review id."""
+        review_id = self.review_queue.enqueue(contract_data, verdict, seller_address, contract_address)
+        log.info("Review task created", review_id=review_id)
+        return review_id
+
+    def resolve_review(self, review_id: str, reviewer: str, decision: str, notes: str = '') -> Dict[str, Any]:
+        """
+        Record a reviewer's PASS/FAIL decision and settle the delivery with it:
+        the attestation is re-sealed with the reviewed verdict and the escrow is
+        released (PASS) or refunded (FAIL).
         
-        with open(review_path, 'w') as f:
-            json.dump(review_data, f, indent=2)
-        print(f"[HALE Oracle] Review task created: {review_path}")
+        Raises:
+            ReviewError: The review is not open or is claimed by another reviewer
+        """
+        return self.settle_review(self.review_queue.resolve(review_id, reviewer, decision, notes))
+
+    def settle_review(self, review: Dict[str, Any]) -> Dict[str, Any]:
+        """Settle a resolved review and record the outcome on it (also retries an unsettled one)."""
+        decision = review['decision']
+        verdict = {
+            **review['ai_verdict'],
+            'verdict': decision,
+            'release_funds': decision == 'PASS',
+            'reviewed_by': review['resolved_by'],
+        }
+        verdict['reasoning'] = (verdict.get('reasoning', '') +
+                                f"\n\nREVIEW: {decision} by {review['resolved_by']}. {review.get('notes') or ''}").rstrip()
+        transaction_id = review['transaction_id'] or 'unknown'
+        correlation_token = set_correlation_id(transaction_id)
+        try:
+            solana_seal_tx = self.seal_solana_attestation(transaction_id, decision == 'PASS', verdict)
+            transaction_success = self.trigger_smart_contract(
+                verdict, review['seller_address'] or '', transaction_id, review['contract_address'])
+            settlement = {
+                'transaction_success': transaction_success,
+                'solana_seal_tx': solana_seal_tx,
+                'settled_at': time.time(),
+            }
+            self.review_queue.record_settlement(review['id'], settlement)
+            log.info("Review settled", review_id=review['id'], decision=decision, success=transaction_success)
+            return {**verdict, **settlement, 'review_id': review['id'], 'seller_address': review['seller_address'],
+                    'contract_address': review['contract_address']}
+        finally:
+            reset_correlation_id(correlation_token)
 
     def trigger_smart_contract(self, verdict: Dict[str, Any], seller_address: str, 
                                transaction_id: str, contract_address: Optional[str] = None) -> bool:
@@ -513,104 +732,91 @@ except Exception as e:
             True if transaction was successful, False otherwise
         """
         if verdict.get('verdict') == 'FAIL':
-            print("[Blockchain] Verdict: FAIL - Processing refund to buyer")
-            return self._refund_funds(seller_address, verdict, contract_address)
+            arc_log.info("Verdict FAIL: processing refund to buyer")
+            return self._refund_funds(seller_address, verdict, contract_address, transaction_id)
         
         if not verdict.get('release_funds', False):
-            print(f"[Blockchain] Status: {verdict.get('verdict')} - No automated action taken.")
+            arc_log.info("No automated action taken", verdict=verdict.get('verdict'))
             return True # Not a failure, just no action needed yet
         
         if not self.web3:
-            # Last ditch attempt to initialize
-            if self.arc_rpc_url:
-                 try:
-                     self.web3 = Web3(Web3.HTTPProvider(self.arc_rpc_url, request_kwargs={'timeout': 10}))
-                 except: 
-                     pass
-                     
-        if not self.web3:
-            print("[Blockchain] WARNING: No blockchain connection configured (self.web3 is None)")
+            arc_log.warning("No blockchain connection configured (self.web3 is None)")
             return False
             
-        if not self.web3.is_connected():
-             print("[Blockchain] Warning: Connection check failed. Attempting transaction anyway...")
-            
-        if not self.oracle_private_key:
-            print("[Blockchain] ERROR: No ORACLE_PRIVATE_KEY found in environment")
+        if not self.signers.arc:
+            arc_log.error("No ORACLE_PRIVATE_KEY found in environment")
             return False
             
+        contract_address = self._resolve_escrow_address(contract_address)
         if not contract_address:
-            # Fallback to env
-            contract_address = os.getenv('ESCROW_CONTRACT_ADDRESS')
-            
-        if not contract_address:
-            print("[Blockchain] ERROR: No ESCROW_CONTRACT_ADDRESS provided")
             return False
 
+        signer = None
         try:
-            print(f"[Blockchain] Triggering Smart Contract: Escrow.release({seller_address}, {transaction_id})...")
-            
-            # Setup contract
-            contract = self.web3.eth.contract(address=contract_address, abi=self.escrow_abi)
+            if not self.web3.is_connected():
+                arc_log.warning("Connection check failed; attempting transaction anyway")
             
-            # ArcFuseEscrow expects release(address seller, bytes32 transactionId) – hash string to bytes32
-            tx_id_bytes32 = Web3.keccak(text=transaction_id)
+            arc_log.info("Triggering Escrow.release", seller=seller_address, transaction_id=transaction_id, contract=contract_address)
             
-            # Get valid nonce
-            account = self.web3.eth.account.from_key(self.oracle_private_key)
-            nonce = self.web3.eth.get_transaction_count(account.address)
+            with STAGE_LATENCY.time(stage='arc_build'):
+                # Setup contract
+                contract = self.web3.eth.contract(address=contract_address, abi=self.escrow_abi)
             
-            # Build transaction
-            tx = contract.functions.release(Web3.to_checksum_address(seller_address), tx_id_bytes32).build_transaction({
-                'from': account.address,
-                'nonce': nonce,
-                'gasPrice': self.web3.eth.gas_price, # Let web3 estimate or fetch
-            })
+                # ArcFuseEscrow expects release(address seller, bytes32 transactionId) – hash string to bytes32
+                tx_id_bytes32 = self.web3.keccak(text=transaction_id)
             
-            # Estimate gas (optional but recommended)
-            try:
-                gas_estimate = self.web3.eth.estimate_gas(tx)
-                tx['gas'] = int(gas_estimate * 1.2) # Add 20% buffer
-            except Exception as e:
-                print(f"[Blockchain] Gas estimation failed: {e}. Using default.")
-                tx['gas'] = 200000
+                # Nonce, sampled EIP-1559 fees and cached gas limit
+                signer = self._arc_signer(transaction_id, contract_address)
+                tx = self._build_settlement_tx(
+                    contract.functions.release(self.web3.to_checksum_address(seller_address), tx_id_bytes32),
+                    signer)
 
             # Sign and send
-            signed_tx = self.web3.eth.account.sign_transaction(tx, self.oracle_private_key)
-            
-            # Handle Web3.py v6/v7 differences
-            if hasattr(signed_tx, 'rawTransaction'):
-                raw_tx = signed_tx.rawTransaction
-            elif hasattr(signed_tx, 'raw_transaction'):
-                raw_tx = signed_tx.raw_transaction
-            else:
-                print(f"[Blockchain] signed_tx dir: {dir(signed_tx)}")
-                raw_tx = signed_tx['rawTransaction'] # Try dict access
+            with STAGE_LATENCY.time(stage='arc_sign'):
+                signed_tx = self.web3.eth.account.sign_transaction(tx, signer.private_key)
+                raw_tx = self._raw_transaction(signed_tx)
+            self._journal_prepared(transaction_id, 'release', raw_tx)
                 
-            tx_hash = self.web3.eth.send_raw_transaction(raw_tx)
+            with STAGE_LATENCY.time(stage='arc_send'):
+                tx_hash = self.web3.eth.send_raw_transaction(raw_tx)
             
-            print(f"[Blockchain] Transaction submitted! Hash: {self.web3.to_hex(tx_hash)}")
+            arc_log.info("Transaction submitted", tx_hash=self.web3.to_hex(tx_hash))
             
             # For serverless (Vercel), we might want to skip waiting to avoid timeout
             if os.getenv('VERCEL') == '1' or os.getenv('SKIP_TX_WAIT') == '1':
-                print("[Blockchain] Serverless detected. Returning hash immediately.")
+                arc_log.info("Serverless detected; returning hash without waiting for receipt")
+                SETTLEMENTS.inc(action='release', outcome='submitted')
                 return self.web3.to_hex(tx_hash)
                 
-            print("[Blockchain] Waiting for receipt...")
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=30)
+            arc_log.debug("Waiting for receipt")
+            with STAGE_LATENCY.time(stage='arc_receipt_wait'):
+                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=30)
             if receipt.status == 1:
-                print(f"[Blockchain] Transaction Confirmed in block {receipt.blockNumber}")
+                arc_log.info("Transaction confirmed", block=receipt.blockNumber)
+                SETTLEMENTS.inc(action='release', outcome='confirmed')
                 return True
             else:
-                print("[Blockchain] Transaction Failed on-chain")
+                arc_log.error("Transaction failed on-chain", tx_hash=self.web3.to_hex(tx_hash))
+                self.fee_estimator.invalidate(contract_address, 'release')
+                SETTLEMENTS.inc(action='release', outcome='reverted')
                 return False
                 
         except Exception as e:
-            print(f"[Blockchain] Transaction Error: {e}")
+            if isinstance(e, SimulatedRevert):
+                arc_log.error("Not sending release: simulation reverted", reason=str(e))
+                SETTLEMENTS.inc(action='release', outcome='simulated_revert')
+                return False
+            if signer is not None:
+                # The nonce may never have reached the node
+                signer.resync()
+            arc_log.error("Transaction error", error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation='release')
+            SETTLEMENTS.inc(action='release', outcome='error')
             return False
     
     def _refund_funds(self, seller_address: str, verdict: Dict[str, Any],
-                     contract_address: Optional[str] = None) -> bool:
+                     contract_address: Optional[str] = None,
+                     transaction_id: Optional[str] = None) -> bool:
         """
         Refund funds back to buyer when verification fails.
         
@@ -618,245 +824,627 @@ except Exception as e:
             seller_address: The seller's address (funds were deposited for this seller)
             verdict: The verdict dictionary with reasoning
             contract_address: Optional smart contract address
+            transaction_id: Delivery the refund belongs to (for the settlement journal)
             
         Returns:
             True if refund transaction was successful, False otherwise
         """
         if not self.web3:
-            if self.arc_rpc_url:
-                 try:
-                     self.web3 = Web3(Web3.HTTPProvider(self.arc_rpc_url, request_kwargs={'timeout': 10}))
-                 except: pass
-                 
-        if not self.web3:
-             print("[Blockchain] WARNING: No blockchain connection configured")
+             arc_log.warning("No blockchain connection configured")
              return False
             
-        if not self.oracle_private_key:
-            print("[Blockchain] ERROR: No ORACLE_PRIVATE_KEY found in environment")
+        if not self.signers.arc:
+            arc_log.error("No ORACLE_PRIVATE_KEY found in environment")
             return False
             
+        contract_address = self._resolve_escrow_address(contract_address)
         if not contract_address:
-            # Fallback to env
-            contract_address = os.getenv('ESCROW_CONTRACT_ADDRESS')
-            
-        if not contract_address:
-            print("[Blockchain] ERROR: No ESCROW_CONTRACT_ADDRESS provided")
             return False
 
+        signer = None
         try:
-            print(f"[Blockchain] Triggering Smart Contract: ArcFuseEscrow.refund({seller_address})...")
-            
-            # Setup contract
-            contract = self.web3.eth.contract(address=contract_address, abi=self.escrow_abi)
+            arc_log.info("Triggering ArcFuseEscrow.refund", seller=seller_address, contract=contract_address)
             
-            # Get valid nonce
-            account = self.web3.eth.account.from_key(self.oracle_private_key)
-            nonce = self.web3.eth.get_transaction_count(account.address)
+            with STAGE_LATENCY.time(stage='arc_build'):
+                # Setup contract
+                contract = self.web3.eth.contract(address=contract_address, abi=self.escrow_abi)
             
-            # Reason
-            reason = f"VERIFICATION_FAILED: {verdict.get('reasoning', 'No reason provided')}"
-            # Truncate reason if too long
-            if len(reason) > 200:
-                reason = reason[:200] + "..."
-            
-            # Build transaction
-            tx = contract.functions.refund(seller_address, reason).build_transaction({
-                'from': account.address,
-                'nonce': nonce,
-                'gasPrice': self.web3.eth.gas_price,
-            })
-            
-            # Estimate gas
-            try:
-                gas_estimate = self.web3.eth.estimate_gas(tx)
-                tx['gas'] = int(gas_estimate * 1.2)
-            except Exception as e:
-                print(f"[Blockchain] Gas estimation failed: {e}. Using default.")
-                tx['gas'] = 200000
+                # Nonce, sampled EIP-1559 fees and cached gas limit
+                signer = self._arc_signer(transaction_id or seller_address, contract_address)
+                tx = self._build_settlement_tx(
+                    contract.functions.refund(seller_address, self._refund_reason(verdict)), signer)
 
             # Sign and send
-            signed_tx = self.web3.eth.account.sign_transaction(tx, self.oracle_private_key)
-            tx_hash = self.web3.eth.send_raw_transaction(signed_tx.rawTransaction)
+            with STAGE_LATENCY.time(stage='arc_sign'):
+                signed_tx = self.web3.eth.account.sign_transaction(tx, signer.private_key)
+                raw_tx = self._raw_transaction(signed_tx)
+            self._journal_prepared(transaction_id, 'refund', raw_tx)
+            with STAGE_LATENCY.time(stage='arc_send'):
+                tx_hash = self.web3.eth.send_raw_transaction(raw_tx)
             
-            print(f"[Blockchain] Refund Transaction submitted! Hash: {self.web3.to_hex(tx_hash)}")
-            print("[Blockchain] Waiting for receipt...")
+            arc_log.info("Refund transaction submitted", tx_hash=self.web3.to_hex(tx_hash))
+            arc_log.debug("Waiting for receipt")
             
-            receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            with STAGE_LATENCY.time(stage='arc_receipt_wait'):
+                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
             if receipt.status == 1:
-                print(f"[Blockchain] Refund Confirmed in block {receipt.blockNumber}")
+                arc_log.info("Refund confirmed", block=receipt.blockNumber)
+                SETTLEMENTS.inc(action='refund', outcome='confirmed')
                 return True
             else:
-                print("[Blockchain] Refund Failed on-chain")
+                arc_log.error("Refund failed on-chain", tx_hash=self.web3.to_hex(tx_hash))
+                self.fee_estimator.invalidate(contract_address, 'refund')
+                SETTLEMENTS.inc(action='refund', outcome='reverted')
                 return False
                 
         except Exception as e:
-            print(f"[Blockchain] Transaction Error: {e}")
+            if isinstance(e, SimulatedRevert):
+                arc_log.error("Not sending refund: simulation reverted", reason=str(e))
+                SETTLEMENTS.inc(action='refund', outcome='simulated_revert')
+                return False
+            if signer is not None:
+                # The nonce may never have reached the node
+                signer.resync()
+            arc_log.error("Refund transaction error", error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation='refund')
+            SETTLEMENTS.inc(action='refund', outcome='error')
+            return False
+    
+    
+    def _build_settlement_tx(self, call, signer: ArcSigner) -> Dict[str, Any]:
+        """
+        Settlement transaction for an escrow call. Fees come from the background
+        fee sampler and the gas limit from the per-(contract, method) cache, so
+        build_transaction makes no gas price or estimate calls of its own. The
+        result is simulated against the pending block (HALE_PREFLIGHT) and
+        SimulatedRevert is raised instead of returning a doomed transaction; a
+        simulation that only ran out of gas is re-estimated and built once more.
+        The nonce is taken from the signer's local sequence last, so a doomed
+        transaction never holds one.
+        """
+        sender = signer.address
+        fees = self.fee_estimator.fee_params()
+        for can_retry in (True, False):
+            try:
+                gas = self.fee_estimator.gas_limit(call.address, call.fn_name,
+                                                   lambda: call.estimate_gas({'from': sender}))
+            except Exception as e:
+                self._estimate_failed(call, e)
+            tx = call.build_transaction({'from': sender, 'gas': gas, **fees})
+            if not preflight_enabled() or not self._check_simulation(
+                    call, simulate(self.web3, tx, self.escrow_abi, call.fn_name), can_retry):
+                break
+        tx['nonce'] = signer.next_nonce(lambda: self.web3.eth.get_transaction_count(sender, 'pending'))
+        return tx
+    
+    def _arc_signer(self, shard_key: str, escrow: str) -> ArcSigner:
+        """Key that settles against escrow: its registered oracle, else the rendezvous choice for shard_key."""
+        def read_oracle(address):
+            return self.web3.eth.contract(address=address, abi=self.escrow_abi).functions.oracle().call()
+        return self.signers.arc_for(shard_key, escrow, read_oracle)
+    
+    def _estimate_failed(self, call, error: Exception):
+        """Raise SimulatedRevert when gas estimation hit a revert, else re-raise."""
+        sim = classify_error(error, self.escrow_abi)
+        arc_log.warning("Gas estimation failed; not sending", method=call.fn_name, reason=sim.reason or sim.error)
+        RPC_ERRORS.inc(chain='arc', operation='estimate_gas')
+        if sim.reverted:
+            raise SimulatedRevert(sim) from error
+        raise error
+    
+    def _check_simulation(self, call, sim, can_retry: bool = False) -> bool:
+        """
+        Raise SimulatedRevert for a doomed transaction. Out of gas drops the
+        cached gas limit; with can_retry it returns True instead of raising,
+        so the caller estimates afresh and builds the transaction again.
+        """
+        if not sim.reverted:
+            return False
+        if sim.out_of_gas:
+            self.fee_estimator.invalidate(call.address, call.fn_name)
+            if can_retry:
+                arc_log.warning("Simulation ran out of gas; re-estimating", method=call.fn_name)
+                return True
+        raise SimulatedRevert(sim)
+    
+    def _journal_prepared(self, transaction_id: Optional[str], action: str, raw_tx: bytes):
+        """Durably record a signed settlement before it is broadcast (journaled deliveries only)."""
+        journal = self.journal
+        if journal and transaction_id and journal.state(transaction_id):
+            journal.record(transaction_id, 'arc_prepared', action=action,
+                           arc_tx_hash=self._tx_hash_hex(raw_tx), arc_raw_tx='0x' + bytes(raw_tx).hex())
+    
+    def _tx_hash_hex(self, raw_tx: bytes) -> str:
+        from eth_utils import keccak
+        return '0x' + keccak(bytes(raw_tx)).hex()
+    
+    @staticmethod
+    def _raw_sender_nonce(raw_tx) -> tuple:
+        """(sender, nonce) of a signed raw transaction, typed or legacy."""
+        from eth_account import Account
+        from hexbytes import HexBytes
+        raw = HexBytes(raw_tx)
+        if raw[0] <= 0x7f:
+            from eth_account.typed_transactions import TypedTransaction
+            nonce = TypedTransaction.from_bytes(raw).as_dict()['nonce']
+        else:
+            from eth_account._utils.legacy_transactions import Transaction as LegacyTransaction
+            nonce = LegacyTransaction.from_bytes(raw).nonce
+        return Account.recover_transaction(raw), nonce
+    
+    def _superseded(self, state: Dict[str, Any], nonce_count: int) -> bool:
+        """
+        Whether the journaled transaction can never land: nonce_count (the
+        sender's mined transaction count) is past its nonce, yet it has no receipt.
+        """
+        _, nonce = self._raw_sender_nonce(state['arc_raw_tx'])
+        if nonce_count <= nonce:
+            return False
+        arc_log.warning("Journaled settlement was superseded by another transaction with its nonce; signing it again",
+                        action=state.get('action'), tx_hash=state['arc_tx_hash'], nonce=nonce)
+        return True
+    
+    def _resume_settlement(self, state: Dict[str, Any]) -> Optional[bool]:
+        """
+        Finish a journaled settlement that was signed before a restart: wait for
+        its receipt, re-broadcasting the same signed bytes if the node never saw it.
+        
+        Returns:
+            The settlement outcome, or None when the transaction was never mined
+            and its nonce has since been used, so it must be signed again
+        """
+        tx_hash = state['arc_tx_hash']
+        arc_log.info("Resuming journaled settlement", action=state.get('action'), tx_hash=tx_hash)
+        try:
+            try:
+                receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+            except Exception:
+                receipt = None
+            if receipt is None and state.get('arc_raw_tx'):
+                sender, _ = self._raw_sender_nonce(state['arc_raw_tx'])
+                nonce_count = self.web3.eth.get_transaction_count(sender, 'latest')
+                # Checked again after the count: it may have been mined in between
+                try:
+                    receipt = self.web3.eth.get_transaction_receipt(tx_hash)
+                except Exception:
+                    receipt = None
+                if receipt is None and self._superseded(state, nonce_count):
+                    return None
+            if receipt is None and state.get('arc_raw_tx'):
+                try:
+                    self.web3.eth.send_raw_transaction(state['arc_raw_tx'])
+                except Exception as e:
+                    # 'already known' / 'nonce too low' mean it is (or was) in the pool
+                    arc_log.debug("Re-broadcast not accepted", error=str(e))
+            if receipt is None:
+                if os.getenv('VERCEL') == '1' or os.getenv('SKIP_TX_WAIT') == '1':
+                    return tx_hash
+                receipt = self.web3.eth.wait_for_transaction_receipt(tx_hash, timeout=60)
+            return receipt['status'] == 1
+        except Exception as e:
+            arc_log.error("Could not resume journaled settlement", tx_hash=tx_hash, error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation='resume_settlement')
             return False
     
+    def _resolve_escrow_address(self, contract_address: Optional[str]) -> Optional[str]:
+        """Escrow to settle against: the given address, else ESCROW_CONTRACT_ADDRESS."""
+        if not contract_address:
+            # Fallback to env
+            contract_address = os.getenv('ESCROW_CONTRACT_ADDRESS')
+            
+        if not contract_address:
+            arc_log.error("No ESCROW_CONTRACT_ADDRESS provided")
+        return contract_address
+    
+    def _refund_reason(self, verdict: Dict[str, Any]) -> str:
+        reason = f"VERIFICATION_FAILED: {verdict.get('reasoning', 'No reason provided')}"
+        # Truncate reason if too long
+        if len(reason) > 200:
+            reason = reason[:200] + "..."
+        return reason
+    
+    def _raw_transaction(self, signed_tx) -> bytes:
+        """Raw bytes of a signed transaction across eth-account versions."""
+        # Handle Web3.py v6/v7 differences
+        if hasattr(signed_tx, 'rawTransaction'):
+            return signed_tx.rawTransaction
+        if hasattr(signed_tx, 'raw_transaction'):
+            return signed_tx.raw_transaction
+        arc_log.debug("Unexpected signed transaction type", attributes=dir(signed_tx))
+        return signed_tx['rawTransaction'] # Try dict access
     
     # --- SOLANA ATTESTATION METHODS ---
     
-    def _get_attestation_pda(self, intent_hash: bytes) -> Pubkey:
-        """Derive the PDA for an attestation."""
-        seeds = [b"attestation", bytes(self.solana_keypair.pubkey()), intent_hash]
-        pda, _ = Pubkey.find_program_address(seeds, self.solana_program_id)
+    def attestation_authority(self, transaction_id: str) -> Pubkey:
+        """Keypair (of the signer pool) that owns transaction_id's attestation."""
+        return self.signers.solana_for(transaction_id).pubkey()
+
+    def _get_attestation_pda(self, intent_hash: bytes, authority: Optional[Pubkey] = None) -> Pubkey:
+        """Derive the PDA for an attestation (cached with its bump, see hale_pda_cache)."""
+        pda, _ = self.pda_cache.derive(authority or self.solana_keypair.pubkey(), intent_hash)
         return pda
 
     def _get_discriminator(self, name: str) -> bytes:
-        return hashlib.sha256(f"global:{name}".encode()).digest()[:8]
+        return discriminator(name)
 
+    def attestation_pdas(self, transaction_ids: List[str]) -> Dict[str, Pubkey]:
+        """
+        Derive the attestation PDAs for many transactions at once, warming the
+        PDA cache ahead of a batch of inits and seals.
+        
+        Returns:
+            {transaction_id: pda}; empty without a Solana keypair
+        """
+        if not self.solana_keypair:
+            return {}
+        # Grouped by authority: each signer's attestations share a seed prefix
+        by_authority: Dict[Pubkey, List[str]] = {}
+        for tx in transaction_ids:
+            by_authority.setdefault(self.attestation_authority(tx), []).append(tx)
+        pdas = {}
+        for authority, txs in by_authority.items():
+            derived = self.pda_cache.derive_many(authority, [attestation_intent_hash(tx) for tx in txs])
+            pdas.update((tx, pda) for tx, (pda, _) in zip(txs, derived))
+        return {tx: pdas[tx] for tx in transaction_ids}
+
+    def _build_initialize_instruction(self, transaction_id: str) -> Instruction:
+        """initialize_attestation(intent_hash, metadata_uri) for transaction_id."""
+        intent_hash = attestation_intent_hash(transaction_id)
+        authority = self.attestation_authority(transaction_id)
+        pda = self._get_attestation_pda(intent_hash, authority)
+        
+        # Discriminator
+        data = self._get_discriminator("initialize_attestation")
+        # Args: intent_hash (32 bytes)
+        data += intent_hash
+        # Args: metadata_uri (String: 4 bytes len + bytes)
+        metadata = INITIAL_METADATA_URI
+        data += struct.pack("<I", len(metadata))
+        data += metadata.encode()
+        
+        return Instruction(
+            program_id=self.solana_program_id,
+            data=data,
+            accounts=[
+                AccountMeta(pubkey=pda, is_signer=False, is_writable=True),
+                AccountMeta(pubkey=authority, is_signer=True, is_writable=True),
+                AccountMeta(pubkey=SYS_PROGRAM_ID, is_signer=False, is_writable=False),
+            ]
+        )
+    
+    def _build_audit_instruction(self, transaction_id: str, is_valid: bool, report_hash: bytes) -> Instruction:
+        """audit_attestation(report_hash, is_valid) for transaction_id."""
+        intent_hash = attestation_intent_hash(transaction_id)
+        authority = self.attestation_authority(transaction_id)
+        pda = self._get_attestation_pda(intent_hash, authority)
+        
+        # Discriminator
+        data = self._get_discriminator("audit_attestation")
+        # Args: report_hash (32 bytes)
+        data += report_hash
+        # Args: is_valid (bool: 1 byte)
+        data += struct.pack("?", is_valid)
+        
+        return Instruction(
+            program_id=self.solana_program_id,
+            data=data,
+            accounts=[
+                AccountMeta(pubkey=pda, is_signer=False, is_writable=True),
+                AccountMeta(pubkey=authority, is_signer=True, is_writable=False),
+            ]
+        )
+    
+    def _build_solana_transaction(self, ix, recent_blockhash,
+                                  budget: Optional[List[Instruction]] = None) -> Transaction:
+        """
+        Transaction of one instruction (or a list sharing an authority) after
+        any ComputeBudget instructions, paid for and signed by the pool keypair
+        the instructions name as signer.
+        """
+        ixs = ix if isinstance(ix, list) else [ix]
+        authority = next(meta.pubkey for meta in ixs[0].accounts if meta.is_signer)
+        keypair = self.signers.solana_keypair(authority) or self.solana_keypair
+        msg = Message((budget or []) + ixs, keypair.pubkey())
+        return Transaction([keypair], msg, recent_blockhash)
+    
+    def _simulation_transaction(self, ix: Instruction) -> Transaction:
+        """ix under the maximum CU limit, for measuring what it consumes (the node replaces the blockhash)."""
+        from solders.hash import Hash
+        return self._build_solana_transaction(
+            ix, Hash.default(), ComputeBudgetTuner.instructions(MAX_TRANSACTION_UNITS, 0))
+    
+    def _simulate_units(self, ix: Instruction, kind: str) -> Optional[int]:
+        """
+        Compute units ix consumes, or None if the simulation fails. Sent as a
+        raw simulateTransaction: replaceRecentBlockhash is not a keyword every
+        supported solana-py accepts, and the placeholder blockhash needs it.
+        """
+        encoded = base64.b64encode(bytes(self._simulation_transaction(ix))).decode()
+        try:
+            response = self.solana_client.request('simulateTransaction', [encoded, {
+                'encoding': 'base64', 'replaceRecentBlockhash': True, 'sigVerify': False,
+                'commitment': 'processed'}])
+            if 'error' in response:
+                raise RuntimeError(response['error'])
+            value = response['result']['value']
+        except Exception as e:
+            solana_log.warning("Compute unit simulation failed", kind=kind, error=str(e))
+            return None
+        if value.get('err') is not None:
+            solana_log.warning("Compute unit simulation failed", kind=kind, error=str(value['err']))
+            return None
+        return value.get('unitsConsumed')
+    
+    def _compute_budget_instructions(self, kind: str, ix: Instruction, count: int = 1) -> List[Instruction]:
+        """
+        SetComputeUnitLimit/SetComputeUnitPrice for count instructions like ix;
+        the per-instruction limit is simulated once per kind.
+        """
+        if not compute_budget_enabled():
+            return []
+        tuner = self.compute_budget
+        units = min(MAX_TRANSACTION_UNITS, tuner.unit_limit(kind, lambda: self._simulate_units(ix, kind)) * count)
+        return tuner.instructions(units, tuner.unit_price())
+    
     def initialize_solana_attestation(self, transaction_id: str) -> Optional[str]:
         """Initialize an attestation draft on Solana using raw instructions."""
         if not self.solana_keypair:
             return None
         
-        print(f"[Solana] Initializing attestation: {transaction_id}")
+        solana_log.info("Initializing attestation", transaction_id=transaction_id)
+        started = time.perf_counter()
         try:
-            intent_hash = hashlib.sha256(transaction_id.encode()).digest()
-            pda = self._get_attestation_pda(intent_hash)
+            ix = self._build_initialize_instruction(transaction_id)
+            budget = self._compute_budget_instructions('initialize_attestation', ix)
             
-            # Discriminator
-            data = self._get_discriminator("initialize_attestation")
-            # Args: intent_hash (32 bytes)
-            data += intent_hash
-            # Args: metadata_uri (String: 4 bytes len + bytes)
-            metadata = "initial_metadata"
-            data += struct.pack("<I", len(metadata))
-            data += metadata.encode()
-            
-            ix = Instruction(
-                program_id=self.solana_program_id,
-                data=data,
-                accounts=[
-                    AccountMeta(pubkey=pda, is_signer=False, is_writable=True),
-                    AccountMeta(pubkey=self.solana_keypair.pubkey(), is_signer=True, is_writable=True),
-                    AccountMeta(pubkey=SYS_PROGRAM_ID, is_signer=False, is_writable=False),
-                ]
-            )
-            
-            # Use synchronous client for simplicity in this flow
             # Get latest blockhash
-            recent_blockhash_resp = self.solana_client.get_latest_blockhash()
-            recent_blockhash = recent_blockhash_resp.value.blockhash
-            
-            # Create message
-            msg = Message([ix], self.solana_keypair.pubkey())
-            
-            # Create transaction
-            txn = Transaction([self.solana_keypair], msg, recent_blockhash)
+            blockhash = self.solana_client.get_latest_blockhash().value
+            txn = self._build_solana_transaction(ix, blockhash.blockhash, budget)
             
             # Send
             resp = self.solana_client.send_transaction(txn)
             tx_sig = resp.value
             
-            print(f"[Solana] Init txn sent: {tx_sig}. Waiting for confirmation...")
-            # Wait for confirmation
-            self.solana_client.confirm_transaction(tx_sig)
+            solana_log.debug("Init transaction sent; waiting for confirmation", signature=str(tx_sig))
+            # Confirmed together with every other in-flight signature; re-sent until the blockhash expires
+            self.solana_confirmer.wait(tx_sig, bytes(txn), blockhash.last_valid_block_height)
             
-            print(f"[Solana] Init Success: {tx_sig}")
+            solana_log.info("Attestation initialized", signature=str(tx_sig))
             return str(tx_sig)
         except Exception as e:
-            print(f"[Solana] Manual init failed: {e}")
+            solana_log.error("Attestation init failed", error=str(e))
+            RPC_ERRORS.inc(chain='solana', operation='initialize_attestation')
             return "MOCK_SOL_INIT_" + hashlib.md5(transaction_id.encode()).hexdigest()[:8]
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage='solana_init')
 
-    def seal_solana_attestation(self, transaction_id: str, is_valid: bool) -> Optional[str]:
-        """Finalize the attestation on Solana using raw instructions."""
+    def seal_solana_attestation(self, transaction_id: str, is_valid: bool,
+                                verdict: Optional[Dict[str, Any]] = None) -> Optional[str]:
+        """
+        Finalize the attestation on Solana. The verdict is anchored with the
+        rest of its window: the attestation's report_hash is the window's
+        Merkle root, and the inclusion proof is kept in the proof store.
+        This call blocks, so the window is the short sync one.
+        """
         if not self.solana_keypair:
             return None
             
-        print(f"[Solana] Sealing attestation: {transaction_id} (Valid={is_valid})")
+        solana_log.info("Sealing attestation", transaction_id=transaction_id, is_valid=is_valid)
+        started = time.perf_counter()
         try:
-            intent_hash = hashlib.sha256(transaction_id.encode()).digest()
-            report_hash = hashlib.sha256(b"verified_by_gemini").digest()
-            pda = self._get_attestation_pda(intent_hash)
-            
-            # Discriminator
-            data = self._get_discriminator("audit_attestation")
-            # Args: report_hash (32 bytes)
-            data += report_hash
-            # Args: is_valid (bool: 1 byte)
-            data += struct.pack("?", is_valid)
-            
-            ix = Instruction(
-                program_id=self.solana_program_id,
-                data=data,
-                accounts=[
-                    AccountMeta(pubkey=pda, is_signer=False, is_writable=True),
-                    AccountMeta(pubkey=self.solana_keypair.pubkey(), is_signer=True, is_writable=False),
-                ]
-            )
-            
-            recent_blockhash_resp = self.solana_client.get_latest_blockhash()
-            recent_blockhash = recent_blockhash_resp.value.blockhash
-            
-            msg = Message([ix], self.solana_keypair.pubkey())
-            txn = Transaction([self.solana_keypair], msg, recent_blockhash)
-            
-            resp = self.solana_client.send_transaction(txn)
-            tx_sig = resp.value
-            
-            print(f"[Solana] Success: {tx_sig}")
-            return str(tx_sig)
+            anchor = self.report_anchor
+            tx_sig = anchor.submit(transaction_id, verdict or {'is_valid': is_valid}, is_valid,
+                                   wait=anchor.sync_window_seconds).result()
+            solana_log.info("Attestation sealed", signature=tx_sig)
+            return tx_sig
         except Exception as e:
-            print(f"[Solana] Manual seal failed: {e}")
+            solana_log.error("Attestation seal failed", error=str(e))
+            RPC_ERRORS.inc(chain='solana', operation='audit_attestation')
             return "MOCK_SOL_SEAL_" + hashlib.md5(transaction_id.encode()).hexdigest()[:8]
+        finally:
+            STAGE_LATENCY.observe(time.perf_counter() - started, stage='solana_seal')
+
+    def seal_solana_reports(self, reports: List[tuple], report_hash: bytes) -> Dict[str, str]:
+        """
+        audit_attestation for every (transaction_id, is_valid) with one shared
+        report_hash, packed per authority into as few transactions as fit the
+        packet size and compute limit. Seals are confirmed (and re-sent) in the
+        background; nothing downstream waits on them.
+        
+        Returns:
+            {transaction_id: signature} for the seals that were sent
+        """
+        by_authority: Dict[Pubkey, List[Instruction]] = {}
+        ids: Dict[Pubkey, List[str]] = {}
+        for transaction_id, is_valid in reports:
+            authority = self.attestation_authority(transaction_id)
+            by_authority.setdefault(authority, []).append(
+                self._build_audit_instruction(transaction_id, is_valid, report_hash))
+            ids.setdefault(authority, []).append(transaction_id)
+        
+        blockhash = self.solana_client.get_latest_blockhash().value
+        signatures = {}
+        for authority, ixs in by_authority.items():
+            start = 0
+            while start < len(ixs):
+                txn, count = self._pack_audits(ixs[start:], blockhash.blockhash)
+                try:
+                    tx_sig = self.solana_client.send_transaction(txn).value
+                    self.solana_confirmer.track(tx_sig, bytes(txn), blockhash.last_valid_block_height)
+                    signatures.update((tx, str(tx_sig)) for tx in ids[authority][start:start + count])
+                except Exception as e:
+                    solana_log.error("Audit transaction failed", audits=count, error=str(e))
+                    RPC_ERRORS.inc(chain='solana', operation='audit_attestation')
+                start += count
+        return signatures
+
+    def _pack_audits(self, ixs: List[Instruction], recent_blockhash) -> tuple:
+        """The largest leading run of ixs that fits one transaction: (transaction, count)."""
+        best = None
+        for count in range(1, len(ixs) + 1):
+            budget = self._compute_budget_instructions('audit_attestation', ixs[0], count)
+            txn = self._build_solana_transaction(ixs[:count], recent_blockhash, budget)
+            if count > 1 and len(bytes(txn)) > PACKET_DATA_SIZE:
+                break
+            best = (txn, count)
+            # Compute is the other limit (once the first build has sized the instruction)
+            if count >= self.compute_budget.max_instructions('audit_attestation'):
+                break
+        return best
 
     def process_delivery(self, contract_data: Dict[str, Any], 
                        seller_address: str,
-                       contract_address: Optional[str] = None) -> Dict[str, Any]:
+                       contract_address: Optional[str] = None,
+                       body_hash: Optional[str] = None) -> Dict[str, Any]:
         """
         Complete workflow: verify delivery and trigger smart contract.
         
+        Deliveries carrying a transaction_id are journaled step by step
+        (hale_journal): calling again with the same id returns the recorded
+        result, or resumes an interrupted run without re-verifying or
+        re-settling. The journal holds the delivery body as a blob store
+        hash (hale_blob_store), released once the delivery completes.
+        
         Args:
             contract_data: Dictionary containing transaction_id, Contract_Terms,
                           Acceptance_Criteria, and Delivery_Content
             seller_address: The seller's wallet address
             contract_address: Optional specific contract address to trigger
+            body_hash: Blob store hash of a delivery body the oracle stored
+                          itself (upload route, journal replays), read when
+                          contract_data has no Delivery_Content. A delivery_hash
+                          inside contract_data is ignored.
                           
         Returns:
             Complete result dictionary with verdict and transaction status
         """
-        # Step 0: Anchor to Solana (Initialize)
-        transaction_id = contract_data.get('transaction_id', f"tx_{int(time.time())}")
-        solana_init_tx = self.initialize_solana_attestation(transaction_id)
+        # Never read a body by a caller-named hash: it could be another seller's delivery
+        contract_data = {k: v for k, v in contract_data.items() if k != 'delivery_hash'}
+        if body_hash and 'Delivery_Content' not in contract_data:
+            contract_data = hydrate_delivery({**contract_data, 'delivery_hash': body_hash})
+        transaction_id = contract_data.get('transaction_id') or f"tx_{uuid.uuid4().hex}"
+        content_digest = delivery_hash(contract_data.get('Delivery_Content', ''))
+        # Every log record for this delivery carries its transaction id
+        correlation_token = set_correlation_id(transaction_id)
+        QUEUE_DEPTH.inc(queue='in_flight_deliveries')
+        started = time.perf_counter()
+        # Deliveries with a caller-supplied id are journaled and resumable
+        journal = self.journal if contract_data.get('transaction_id') else None
+        claimed = False
+        try:
+            if journal:
+                # One run per transaction_id at a time; a concurrent retry gets DeliveryInProgress
+                journal.claim(transaction_id)
+                claimed = True
+            state = journal.state(transaction_id) if journal else None
+            if state:
+                # Only the same seller re-sending the same delivery may replay it
+                check_replay(state, seller_address, content_digest)
+            if state and 'result' in state:
+                log.info("Delivery already completed; returning journaled result")
+                CACHE_HITS.inc(cache='settlement_journal')
+                return state['result']
+            state = state or {}
+            if journal and not state:
+                state['contract_data'] = self.blobs.externalize(contract_data)
+                journal.record(transaction_id, 'received', contract_data=state['contract_data'],
+                               seller_address=seller_address, contract_address=contract_address,
+                               delivery_hash=content_digest)
         
-        # Step 1: Verify delivery
-        verdict = self.verify_delivery(contract_data)
+            # Step 0: Anchor to Solana (Initialize)
+            solana_init_tx = state.get('solana_init_tx')
+            if 'solana_init_tx' not in state:
+                solana_init_tx = self.initialize_solana_attestation(transaction_id)
+                if journal:
+                    journal.record(transaction_id, 'solana_init', solana_init_tx=solana_init_tx)
         
-        # Step 1.5: Anchor outcome to Solana (Seal/Audit)
-        is_valid = verdict.get('verdict') == 'PASS'
-        solana_seal_tx = self.seal_solana_attestation(transaction_id, is_valid)
+            # Step 1: Verify delivery
+            verdict = state.get('verdict')
+            if verdict is None:
+                verdict = self.verify_delivery(contract_data)
+                if journal:
+                    journal.record(transaction_id, 'verdict', verdict=verdict)
         
-        # Determine contract address (param > data > env default)
-        target_contract = contract_address or contract_data.get('escrow_address')
+            # Determine contract address (param > data > env default)
+            target_contract = contract_address or contract_data.get('escrow_address')
+            if verdict.get('review_id'):
+                # The reviewer's decision settles against the same seller and escrow
+                self.review_queue.set_parties(verdict['review_id'], seller_address, target_contract)
         
-        # Step 2: Trigger smart contract if passed
-        transaction_success = False
-        if verdict.get('release_funds', False):
-            transaction_success = self.trigger_smart_contract(
-                verdict, 
-                seller_address,
-                transaction_id=contract_data.get('transaction_id', 'unknown'),
-                contract_address=target_contract
-            )
-        elif verdict.get('verdict') == 'FAIL':
-             # Also handle refunds/rejections on the specific contract
-             transaction_success = self.trigger_smart_contract(
-                verdict,
-                seller_address,
-                transaction_id=contract_data.get('transaction_id', 'unknown'),
-                contract_address=target_contract
-             )
+            # Step 1.5: Anchor outcome to Solana (Seal/Audit)
+            is_valid = verdict.get('verdict') == 'PASS'
+            solana_seal_tx = state.get('solana_seal_tx')
+            if 'solana_seal_tx' not in state:
+                solana_seal_tx = self.seal_solana_attestation(transaction_id, is_valid, verdict)
+                if journal:
+                    journal.record(transaction_id, 'solana_seal', solana_seal_tx=solana_seal_tx)
         
-        return {
-            **verdict,
-            "transaction_success": transaction_success,
-            "seller_address": seller_address,
-            "contract_address": target_contract,
-            "solana_init_tx": solana_init_tx,
-            "solana_seal_tx": solana_seal_tx
-        }
+            # Step 2: Trigger smart contract if passed (or finish a settlement signed before a restart)
+            transaction_success = None
+            if 'transaction_success' in state:
+                transaction_success = state['transaction_success']
+            elif state.get('arc_tx_hash'):
+                # None: that transaction can never land, so the settlement is signed again below
+                transaction_success = self._resume_settlement(state)
+            if transaction_success is None and (verdict.get('release_funds', False) or verdict.get('verdict') == 'FAIL'):
+                # Release on PASS; also handle refunds/rejections on the specific contract
+                transaction_success = self.trigger_smart_contract(
+                    verdict,
+                    seller_address,
+                    transaction_id=contract_data.get('transaction_id', 'unknown'),
+                    contract_address=target_contract
+                )
+            if transaction_success is None:
+                transaction_success = False
+            if journal and 'transaction_success' not in state:
+                journal.record(transaction_id, 'arc_result', transaction_success=transaction_success)
+        
+            result = {
+                **verdict,
+                "transaction_success": transaction_success,
+                "seller_address": seller_address,
+                "contract_address": target_contract,
+                "solana_init_tx": solana_init_tx,
+                "solana_seal_tx": solana_seal_tx,
+                "delivery_hash": content_digest
+            }
+            if journal:
+                journal.record(transaction_id, 'completed', result=result)
+                self.blobs.release_ref(state.get('contract_data'))
+            return result
+        finally:
+            if claimed:
+                journal.release_claim(transaction_id)
+            QUEUE_DEPTH.dec(queue='in_flight_deliveries')
+            DELIVERY_LATENCY.observe(time.perf_counter() - started)
+            reset_correlation_id(correlation_token)
+
+    def recover_incomplete(self) -> List[Dict[str, Any]]:
+        """
+        Replay every delivery the settlement journal holds as incomplete (e.g.
+        after a crash). Each resumes after its last durable step, so nothing is
+        verified or settled twice.
+
+        Returns:
+            The results of the replayed deliveries
+        """
+        journal = self.journal
+        if not journal:
+            return []
+        results = []
+        for state in journal.incomplete():
+            if not state.get('contract_data'):
+                continue
+            log.info("Recovering incomplete delivery", transaction_id=state['transaction_id'])
+            try:
+                results.append(self.process_delivery(state['contract_data'], state.get('seller_address', ''),
+                                                     state.get('contract_address'),
+                                                     body_hash=state['contract_data'].get('delivery_hash')))
+            except DeliveryInProgress:
+                log.info("Delivery already being resumed by a retry", transaction_id=state['transaction_id'])
+            except Exception as e:
+                log.error("Recovery failed", transaction_id=state['transaction_id'], error=str(e))
+        return results
 
 
 def main():
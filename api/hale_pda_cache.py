@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+HALE Attestation PDA Cache
+Precomputed Anchor discriminators and cached attestation PDA derivation.
+
+Anchor instruction discriminators are the first 8 bytes of
+sha256("global:<name>"); they are fixed per instruction, so the program's
+are computed once at import.
+
+An attestation's address is the PDA of
+[b"attestation", authority, intent_hash]. find_program_address searches
+bumps from 255 down, hashing once per attempt, and every init and seal of
+the same delivery re-derives the same address. PdaCache keeps a bounded LRU
+of (authority, intent_hash) -> (pda, bump), plus a larger map of bumps
+alone: an address that has fallen out of the LRU is rebuilt with a single
+create_program_address call using its known bump instead of a new search.
+
+Environment:
+    HALE_PDA_CACHE_SIZE    Derived addresses kept (default 4096)
+    HALE_PDA_BUMP_CACHE    Bumps kept for cheap re-derivation (default 65536)
+"""
+
+import os
+import hashlib
+import threading
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Dict, Tuple, List, Iterable, Optional
+
+from solders.pubkey import Pubkey
+
+from hale_metrics import CACHE_HITS, CACHE_MISSES
+
+ATTESTATION_SEED = b"attestation"
+
+# metadata_uri every oracle-initialized attestation carries; its fixed length
+# keeps the offsets of the fields after it stable (see hale_attestation_scanner)
+INITIAL_METADATA_URI = "initial_metadata"
+# 8 + Attestation::INIT_SPACE: both strings are max_len(256)
+ATTESTATION_ACCOUNT_SIZE = 8 + 32 + 32 + (4 + 256) + 1 + 33 + 33 + (1 + 4 + 256) + 1
+
+# hale_solana program instructions
+INSTRUCTIONS = ('initialize_attestation', 'seal_attestation', 'audit_attestation', 'challenge_attestation')
+
+
+def _sighash(namespace: str, name: str) -> bytes:
+    return hashlib.sha256(f"{namespace}:{name}".encode()).digest()[:8]
+
+
+DISCRIMINATORS: Dict[str, bytes] = {name: _sighash('global', name) for name in INSTRUCTIONS}
+# Prefix of every Attestation account's data
+ATTESTATION_ACCOUNT_DISCRIMINATOR = _sighash('account', 'Attestation')
+
+
+def discriminator(name: str) -> bytes:
+    """8-byte Anchor instruction discriminator for name."""
+    value = DISCRIMINATORS.get(name)
+    if value is None:
+        value = DISCRIMINATORS[name] = _sighash('global', name)
+    return value
+
+
+@lru_cache(maxsize=4096)
+def intent_hash(transaction_id: str) -> bytes:
+    """Attestation intent hash for a transaction id: sha256 of its UTF-8 bytes."""
+    return hashlib.sha256(transaction_id.encode()).digest()
+
+
+class PdaCache:
+    """Bounded LRU of attestation PDAs with a bump memory for cheap re-derivation."""
+
+    def __init__(self, program_id: Pubkey, maxsize: Optional[int] = None, bump_maxsize: Optional[int] = None):
+        self.program_id = program_id
+        self.maxsize = int(maxsize or os.getenv('HALE_PDA_CACHE_SIZE', '4096'))
+        self.bump_maxsize = int(bump_maxsize or os.getenv('HALE_PDA_BUMP_CACHE', '65536'))
+        self._lock = threading.Lock()
+        self._pdas: "OrderedDict[Tuple[bytes, bytes], Tuple[Pubkey, int]]" = OrderedDict()
+        self._bumps: "OrderedDict[Tuple[bytes, bytes], int]" = OrderedDict()
+
+    def _remember(self, key: Tuple[bytes, bytes], bump: int):
+        """Record a bump (caller holds the lock)."""
+        self._bumps[key] = bump
+        self._bumps.move_to_end(key)
+        if len(self._bumps) > self.bump_maxsize:
+            self._bumps.popitem(last=False)
+
+    def _store(self, key: Tuple[bytes, bytes], pda: Pubkey, bump: int):
+        with self._lock:
+            self._pdas[key] = (pda, bump)
+            self._pdas.move_to_end(key)
+            if len(self._pdas) > self.maxsize:
+                self._pdas.popitem(last=False)
+            self._remember(key, bump)
+
+    def derive(self, authority: Pubkey, intent: bytes) -> Tuple[Pubkey, int]:
+        """(pda, bump) of the attestation for authority and intent hash."""
+        authority_bytes = bytes(authority)
+        key = (authority_bytes, intent)
+        with self._lock:
+            entry = self._pdas.get(key)
+            if entry is not None:
+                self._pdas.move_to_end(key)
+            bump = self._bumps.get(key)
+        if entry is not None:
+            CACHE_HITS.inc(cache='attestation_pda')
+            return entry
+        CACHE_MISSES.inc(cache='attestation_pda')
+        seeds = [ATTESTATION_SEED, authority_bytes, intent]
+        if bump is not None:
+            pda = Pubkey.create_program_address(seeds + [bytes([bump])], self.program_id)
+        else:
+            pda, bump = Pubkey.find_program_address(seeds, self.program_id)
+        self._store(key, pda, bump)
+        return pda, bump
+
+    def derive_many(self, authority: Pubkey, intents: Iterable[bytes]) -> List[Tuple[Pubkey, int]]:
+        """derive() for a batch of intent hashes (e.g. a backfill chunk), in order."""
+        return [self.derive(authority, intent) for intent in intents]
+
+    def remember_bump(self, authority: Pubkey, intent: bytes, bump: int):
+        """Record a bump read from on-chain account data, so deriving that PDA skips the search."""
+        with self._lock:
+            self._remember((bytes(authority), intent), bump)
+
+    def status(self) -> Dict[str, int]:
+        with self._lock:
+            return {'pdas': len(self._pdas), 'bumps': len(self._bumps)}
+
+
+_caches: Dict[str, PdaCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_pda_cache(program_id: Pubkey) -> PdaCache:
+    """Process-wide PDA cache for a program."""
+    key = str(program_id)
+    with _caches_lock:
+        cache = _caches.get(key)
+        if cache is None:
+            cache = _caches[key] = PdaCache(program_id)
+    return cache
@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+"""
+HALE Pre-flight Simulation
+Dry-runs escrow settlements with eth_call against the pending block before
+they are signed and broadcast.
+
+The simulated call carries the exact calldata, sender, value and gas limit of
+the transaction about to be sent, so a revert here (a bad escrow address, an
+already-settled seller, a caller that is not the escrow oracle, a gas limit
+that is too low) means the broadcast would revert too. Such settlements are
+skipped instead of paying gas for a failed transaction or waiting on its
+receipt.
+
+Revert data is decoded into a readable reason:
+
+    Error(string)   0x08c379a0  require/revert messages
+    Panic(uint256)  0x4e487b71  assert, overflow, division by zero...
+    custom errors               any 'error' entry in the supplied ABI
+
+Environment:
+    HALE_PREFLIGHT    Set to 0 to broadcast without simulating first
+"""
+
+import os
+import asyncio
+from dataclasses import dataclass
+from typing import Dict, Any, Optional, List, Sequence
+
+from hale_logging import get_logger
+from hale_metrics import SIMULATIONS
+
+log = get_logger('preflight')
+
+ERROR_SELECTOR = bytes.fromhex('08c379a0')
+PANIC_SELECTOR = bytes.fromhex('4e487b71')
+
+PANIC_CODES = {
+    0x00: 'generic compiler panic',
+    0x01: 'assertion failed',
+    0x11: 'arithmetic overflow or underflow',
+    0x12: 'division or modulo by zero',
+    0x21: 'invalid enum value',
+    0x22: 'corrupted storage byte array',
+    0x31: 'pop on empty array',
+    0x32: 'array index out of bounds',
+    0x41: 'out of memory',
+    0x51: 'call to uninitialized function',
+}
+
+# Node messages that mean the transaction cannot succeed as built
+_OUT_OF_GAS_MARKERS = ('out of gas', 'gas required exceeds', 'intrinsic gas too low')
+_DOOMED_MARKERS = ('revert', 'invalid opcode') + _OUT_OF_GAS_MARKERS
+
+
+@dataclass
+class Simulation:
+    """Outcome of one eth_call dry run."""
+    reverted: bool
+    reason: Optional[str] = None
+    data: Optional[str] = None
+    # Set when the simulation itself failed (RPC error): the result is inconclusive
+    error: Optional[str] = None
+
+    @property
+    def ok(self) -> bool:
+        return not self.reverted
+
+    @property
+    def out_of_gas(self) -> bool:
+        reason = (self.reason or '').lower()
+        return self.reverted and any(m in reason for m in _OUT_OF_GAS_MARKERS)
+
+
+class SimulatedRevert(Exception):
+    """Raised instead of broadcasting a transaction whose simulation reverted."""
+
+    def __init__(self, simulation: Simulation):
+        super().__init__(simulation.reason or 'execution reverted')
+        self.simulation = simulation
+
+
+def preflight_enabled() -> bool:
+    return os.getenv('HALE_PREFLIGHT', '1') != '0'
+
+
+def _custom_errors(abi: Sequence[Dict[str, Any]]) -> Dict[bytes, Dict[str, Any]]:
+    from eth_utils import keccak
+    errors = {}
+    for entry in abi or []:
+        if entry.get('type') == 'error':
+            types = ','.join(i['type'] for i in entry.get('inputs', []))
+            errors[keccak(text=f"{entry['name']}({types})")[:4]] = entry
+    return errors
+
+
+def decode_revert(data: Any, abi: Sequence[Dict[str, Any]] = ()) -> str:
+    """Readable reason for revert data (hex string or bytes)."""
+    if isinstance(data, str):
+        try:
+            data = bytes.fromhex(data[2:] if data.startswith('0x') else data)
+        except ValueError:
+            return data
+    if not data:
+        return 'reverted without a reason'
+    from eth_abi import decode as abi_decode
+    selector, payload = data[:4], data[4:]
+    try:
+        if selector == ERROR_SELECTOR:
+            return abi_decode(['string'], payload)[0]
+        if selector == PANIC_SELECTOR:
+            code = abi_decode(['uint256'], payload)[0]
+            return f"panic 0x{code:02x}: {PANIC_CODES.get(code, 'unknown panic code')}"
+        entry = _custom_errors(abi).get(selector)
+        if entry:
+            inputs = entry.get('inputs', [])
+            values = abi_decode([i['type'] for i in inputs], payload)
+            args = ', '.join(f"{i.get('name') or idx}={v!r}" for idx, (i, v) in enumerate(zip(inputs, values)))
+            return f"{entry['name']}({args})"
+    except Exception:
+        pass
+    return f"unknown revert 0x{data.hex()}"
+
+
+def _revert_data(exc: Exception) -> Optional[str]:
+    """Revert data carried by a web3 or raw JSON-RPC error, if any."""
+    candidates = [getattr(exc, 'data', None)]
+    candidates.extend(arg for arg in getattr(exc, 'args', ()) if isinstance(arg, dict))
+    for value in candidates:
+        # Nodes nest it differently: '0x..', {'data': '0x..'}, {'error': {'data': ...}}
+        for _ in range(3):
+            if isinstance(value, dict):
+                value = value.get('data', value.get('error'))
+        if isinstance(value, str) and value.startswith('0x'):
+            return value
+    return None
+
+
+def classify_error(exc: Exception, abi: Sequence[Dict[str, Any]] = ()) -> Simulation:
+    """Turn an eth_call/estimate_gas exception into a Simulation."""
+    data = _revert_data(exc)
+    message = str(exc)
+    if data is not None:
+        return Simulation(reverted=True, reason=decode_revert(data, abi), data=data)
+    if type(exc).__name__.startswith('Contract') or any(m in message.lower() for m in _DOOMED_MARKERS):
+        return Simulation(reverted=True, reason=message)
+    return Simulation(reverted=False, error=message)
+
+
+def _call_params(tx: Dict[str, Any]) -> Dict[str, Any]:
+    """The parts of a built transaction that affect execution."""
+    return {k: tx[k] for k in ('from', 'to', 'data', 'value', 'gas') if k in tx}
+
+
+def _record(sim: Simulation, action: str) -> Simulation:
+    outcome = 'reverted' if sim.reverted else ('inconclusive' if sim.error else 'ok')
+    SIMULATIONS.inc(action=action, outcome=outcome)
+    if sim.reverted:
+        log.warning("Pre-flight simulation reverted", action=action, reason=sim.reason)
+    elif sim.error:
+        log.warning("Pre-flight simulation inconclusive; sending anyway", action=action, error=sim.error)
+    return sim
+
+
+def simulate(w3, tx: Dict[str, Any], abi: Sequence[Dict[str, Any]] = (), action: str = 'call') -> Simulation:
+    """eth_call tx against the pending block (sync Web3)."""
+    try:
+        w3.eth.call(_call_params(tx), 'pending')
+        sim = Simulation(reverted=False)
+    except Exception as e:
+        sim = classify_error(e, abi)
+    return _record(sim, action)
+
+
+async def asimulate(w3, tx: Dict[str, Any], abi: Sequence[Dict[str, Any]] = (), action: str = 'call') -> Simulation:
+    """eth_call tx against the pending block (AsyncWeb3)."""
+    try:
+        await w3.eth.call(_call_params(tx), 'pending')
+        sim = Simulation(reverted=False)
+    except Exception as e:
+        sim = classify_error(e, abi)
+    return _record(sim, action)
+
+
+async def asimulate_many(w3, txs: List[Dict[str, Any]], abi: Sequence[Dict[str, Any]] = (),
+                         actions: Optional[List[str]] = None) -> List[Simulation]:
+    """Simulate a batch concurrently (the Arc RPC pool sends them as one JSON-RPC batch)."""
+    actions = actions or ['call'] * len(txs)
+    return list(await asyncio.gather(*(asimulate(w3, tx, abi, action) for tx, action in zip(txs, actions))))
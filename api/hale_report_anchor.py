@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+HALE Report Anchoring
+Binds each attestation's on-chain report_hash to the verdict it was sealed
+with, and amortizes the seals over a window of deliveries.
+
+Every verdict is hashed in a canonical form (sorted-key compact JSON of the
+transaction id and verdict) into a Merkle leaf. Verdicts sealed close
+together are collected into a window of up to HALE_REPORT_WINDOW entries or
+HALE_REPORT_WINDOW_SECONDS, a Merkle tree is built over the window and its
+root is written as the report_hash of every attestation in it. The
+audit_attestation instructions of a window are packed into as few Solana
+transactions as fit (per authority, within the packet size and compute
+limit), so a window costs a handful of transactions instead of one per
+delivery.
+
+Before anything is sent, each verdict's canonical report, leaf, window root
+and inclusion proof are written to a local SQLite proof store. Anyone can
+then check a single verdict: recompute the leaf from the report, fold it up
+the proof and compare with the report_hash stored in the attestation. When
+the store cannot be opened or written (e.g. a read-only deployment
+filesystem) windows are still sealed, without proofs, and an error is logged.
+
+    leaf = sha256(0x00 || report)
+    node = sha256(0x01 || left || right)
+
+The prefixes keep a leaf from being passed off as an inner node; an odd
+node at the end of a level is carried up unchanged. A window of one
+verdict has root == leaf.
+
+A caller that blocks on its seal (the synchronous oracle, one delivery per
+request thread) should not sit out the whole window: it submits with the
+shorter HALE_REPORT_SYNC_WINDOW_SECONDS, and a window closes at the
+earliest deadline among its verdicts. The verdicts already queued by other
+threads still share its root.
+
+Environment:
+    HALE_REPORT_WINDOW                Most verdicts anchored under one root (default 64)
+    HALE_REPORT_WINDOW_SECONDS        Longest a verdict waits for its window to fill (default 0.25)
+    HALE_REPORT_SYNC_WINDOW_SECONDS   The same for blocking callers (default 0: anchor what is queued)
+    HALE_PROOF_DB                     Proof store path (default api/report_proofs.db)
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from concurrent.futures import Future
+from typing import Dict, Any, List, Optional, Tuple
+
+from hale_logging import get_logger
+from hale_metrics import QUEUE_DEPTH, REPORT_WINDOW_SIZE
+
+log = get_logger('solana.reports')
+
+LEAF_PREFIX = b'\x00'
+NODE_PREFIX = b'\x01'
+
+
+def canonical_report(transaction_id: str, verdict: Dict[str, Any]) -> bytes:
+    """The bytes a verdict's leaf is hashed from."""
+    return json.dumps({'transaction_id': transaction_id, 'verdict': verdict}, sort_keys=True,
+                      separators=(',', ':'), ensure_ascii=False, default=str).encode()
+
+
+def leaf_hash(report: bytes) -> bytes:
+    return hashlib.sha256(LEAF_PREFIX + report).digest()
+
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(NODE_PREFIX + left + right).digest()
+
+
+def merkle_levels(leaves: List[bytes]) -> List[List[bytes]]:
+    """Every level of the tree over leaves, from the leaves up to [root]."""
+    if not leaves:
+        raise ValueError("Merkle tree needs at least one leaf")
+    levels = [list(leaves)]
+    while len(levels[-1]) > 1:
+        level = levels[-1]
+        parents = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            parents.append(level[-1])
+        levels.append(parents)
+    return levels
+
+
+def merkle_root(leaves: List[bytes]) -> bytes:
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_proof(levels: List[List[bytes]], index: int) -> List[Tuple[str, bytes]]:
+    """Siblings from leaf index to the root, each tagged with the side it sits on."""
+    proof = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append(('left' if sibling < index else 'right', level[sibling]))
+        index //= 2
+    return proof
+
+
+def verify_proof(leaf: bytes, proof: List[Tuple[str, bytes]], root: bytes) -> bool:
+    node = leaf
+    for side, sibling in proof:
+        node = _node(sibling, node) if side == 'left' else _node(node, sibling)
+    return node == root
+
+
+class ProofStore:
+    """SQLite store of anchored windows and each verdict's inclusion proof."""
+
+    _SCHEMA = """
+    CREATE TABLE IF NOT EXISTS windows (
+        root        TEXT PRIMARY KEY,
+        created_at  REAL NOT NULL,
+        size        INTEGER NOT NULL,
+        signatures  TEXT
+    );
+    CREATE TABLE IF NOT EXISTS proofs (
+        transaction_id  TEXT PRIMARY KEY,
+        root            TEXT NOT NULL,
+        leaf_index      INTEGER NOT NULL,
+        leaf            TEXT NOT NULL,
+        proof           TEXT NOT NULL,
+        report          TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS proofs_root ON proofs (root);
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv('HALE_PROOF_DB') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'report_proofs.db')
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.executescript(self._SCHEMA)
+
+    def record_window(self, root: bytes, entries: List[Tuple[str, bytes, bytes, List[Tuple[str, bytes]]]]):
+        """Store a window's root and every (transaction_id, report, leaf, proof) in one transaction."""
+        rows = [(tx, root.hex(), index, leaf.hex(),
+                 json.dumps([[side, sibling.hex()] for side, sibling in proof]), report.decode())
+                for index, (tx, report, leaf, proof) in enumerate(entries)]
+        with self._lock:
+            self._db.execute('BEGIN')
+            try:
+                self._db.execute('INSERT OR REPLACE INTO windows (root, created_at, size) VALUES (?, ?, ?)',
+                                 (root.hex(), time.time(), len(entries)))
+                # A verdict re-sealed after a crash points at its latest window
+                self._db.executemany('INSERT OR REPLACE INTO proofs VALUES (?, ?, ?, ?, ?, ?)', rows)
+                self._db.execute('COMMIT')
+            except Exception:
+                self._db.execute('ROLLBACK')
+                raise
+
+    def set_signatures(self, root: bytes, signatures: List[str]):
+        with self._lock:
+            self._db.execute('UPDATE windows SET signatures = ? WHERE root = ?',
+                             (json.dumps(signatures), root.hex()))
+
+    def get(self, transaction_id: str) -> Optional[Dict[str, Any]]:
+        """The inclusion proof for transaction_id's verdict, checked against its root."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT p.*, w.created_at, w.size, w.signatures FROM proofs p '
+                'JOIN windows w ON w.root = p.root WHERE p.transaction_id = ?', (transaction_id,)).fetchone()
+        if row is None:
+            return None
+        proof = [(side, bytes.fromhex(sibling)) for side, sibling in json.loads(row['proof'])]
+        leaf = leaf_hash(row['report'].encode())
+        return {
+            'transaction_id': transaction_id,
+            # Exact bytes the leaf was hashed from (sha256(0x00 || report))
+            'report': row['report'],
+            'leaf': row['leaf'],
+            'leaf_index': row['leaf_index'],
+            'proof': [{'side': side, 'hash': sibling.hex()} for side, sibling in proof],
+            'root': row['root'],
+            'window_size': row['size'],
+            'anchored_at': row['created_at'],
+            'signatures': json.loads(row['signatures']) if row['signatures'] else [],
+            'valid': leaf.hex() == row['leaf'] and verify_proof(leaf, proof, bytes.fromhex(row['root'])),
+        }
+
+    def count(self) -> int:
+        with self._lock:
+            return self._db.execute('SELECT COUNT(*) FROM windows').fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+class _PendingReport:
+    __slots__ = ('transaction_id', 'is_valid', 'report', 'leaf', 'future', 'deadline')
+
+    def __init__(self, transaction_id: str, verdict: Dict[str, Any], is_valid: bool, wait: float):
+        self.transaction_id = transaction_id
+        self.is_valid = is_valid
+        self.report = canonical_report(transaction_id, verdict)
+        self.leaf = leaf_hash(self.report)
+        self.future: Future = Future()
+        self.deadline = time.time() + wait
+
+
+class ReportAnchor:
+    """Collects verdicts into windows and seals each window under its Merkle root."""
+
+    def __init__(self, oracle, store: Optional[ProofStore] = None, window: Optional[int] = None,
+                 window_seconds: Optional[float] = None, sync_window_seconds: Optional[float] = None):
+        # Sends the packed audit instructions (HaleOracle.seal_solana_reports)
+        self.oracle = oracle
+        # None: windows are sealed without proofs
+        self.store = store or get_proof_store()
+        self.window = max(1, int(window or os.getenv('HALE_REPORT_WINDOW', '64')))
+        self.window_seconds = float(window_seconds if window_seconds is not None
+                                    else os.getenv('HALE_REPORT_WINDOW_SECONDS', '0.25'))
+        self.sync_window_seconds = float(sync_window_seconds if sync_window_seconds is not None
+                                         else os.getenv('HALE_REPORT_SYNC_WINDOW_SECONDS', '0'))
+        self._cond = threading.Condition()
+        self._pending: List[_PendingReport] = []
+        self._thread: Optional[threading.Thread] = None
+        QUEUE_DEPTH.set_function(lambda: len(self._pending), queue='report_anchor')
+
+    def submit(self, transaction_id: str, verdict: Dict[str, Any], is_valid: bool,
+               wait: Optional[float] = None) -> Future:
+        """
+        Queue a verdict; the future resolves to the signature of the transaction
+        that sealed it. wait caps how long the verdict's window stays open
+        (default window_seconds).
+        """
+        entry = _PendingReport(transaction_id, verdict, is_valid,
+                               self.window_seconds if wait is None else wait)
+        with self._cond:
+            self._pending.append(entry)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='hale-report-anchor', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry.future
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._pending:
+                    self._cond.wait()
+                # Wait for the window to fill, but never past the earliest verdict's deadline
+                while len(self._pending) < self.window:
+                    remaining = min(entry.deadline for entry in self._pending) - time.time()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                batch, self._pending = self._pending[:self.window], self._pending[self.window:]
+            try:
+                self._anchor(batch)
+            except Exception as e:
+                log.error("Report window failed", size=len(batch), error=str(e))
+                for entry in batch:
+                    if not entry.future.done():
+                        entry.future.set_exception(e)
+
+    def _anchor(self, batch: List[_PendingReport]):
+        levels = merkle_levels([entry.leaf for entry in batch])
+        root = levels[-1][0]
+        # Proofs are durable before the root they prove against is on chain
+        stored = self._store_call('record_window', root, [
+            (entry.transaction_id, entry.report, entry.leaf, merkle_proof(levels, i))
+            for i, entry in enumerate(batch)])
+        REPORT_WINDOW_SIZE.observe(len(batch))
+
+        signatures = self.oracle.seal_solana_reports(
+            [(entry.transaction_id, entry.is_valid) for entry in batch], root)
+        if stored:
+            self._store_call('set_signatures', root, sorted(set(signatures.values())))
+        log.info("Report window anchored", root=root.hex(), size=len(batch),
+                 transactions=len(set(signatures.values())))
+        for entry in batch:
+            signature = signatures.get(entry.transaction_id)
+            if signature is not None:
+                entry.future.set_result(signature)
+            else:
+                entry.future.set_exception(RuntimeError("Audit transaction was not sent"))
+
+    def _store_call(self, method: str, root: bytes, *args) -> bool:
+        """
+        Write to the proof store; a failure is logged, never raised, since the
+        verdicts must still be sealed (their proofs are then missing).
+        """
+        if self.store is None:
+            log.error("Proof store unavailable; sealing window without inclusion proofs", root=root.hex())
+            return False
+        try:
+            getattr(self.store, method)(root, *args)
+            return True
+        except Exception as e:
+            log.error("Proof store write failed; sealing window without inclusion proofs",
+                      root=root.hex(), operation=method, error=str(e))
+            return False
+
+
+_store: Optional[ProofStore] = None
+_store_failed = False
+_store_lock = threading.Lock()
+
+
+def get_proof_store() -> Optional[ProofStore]:
+    """Process-wide proof store (HALE_PROOF_DB), or None when it cannot be opened."""
+    global _store, _store_failed
+    if _store is None and not _store_failed:
+        with _store_lock:
+            if _store is None and not _store_failed:
+                try:
+                    _store = ProofStore()
+                except (OSError, sqlite3.Error) as e:
+                    # e.g. a read-only deployment filesystem
+                    log.error("Proof store unavailable", error=str(e))
+                    _store_failed = True
+    return _store
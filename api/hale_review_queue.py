@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+HALE Human Review Queue
+SQLite-backed queue of borderline verdicts awaiting a human decision,
+replacing one pretty-printed pending_reviews/review_<transaction_id>.json
+per review.
+
+Each review gets a unique id (a repeated transaction id no longer
+overwrites an earlier review) and one row carrying what triage needs:
+status, age, confidence and seller, each indexed, so listing the oldest or
+least confident pending reviews, or one seller's, reads the index instead
+of parsing every file. The contract data is stored zlib-compressed and
+only decoded when a single review is opened; its delivery body is kept once
+in the blob store (hale_blob_store) and the row holds the body's hash.
+
+Reviews move pending -> claimed -> resolved. A claim is a lease: a review
+claimed but not resolved within HALE_REVIEW_LEASE seconds can be claimed
+by someone else. Resolving records the decision; the oracle then settles
+the escrow and re-seals the attestation with it (HaleOracle.resolve_review),
+and the settlement result is stored on the review.
+
+Listings are keyset-paginated: each page returns a cursor for the next.
+
+A legacy pending_reviews/ directory next to the database is imported the
+first time the database is opened empty, then renamed to
+pending_reviews.migrated.
+
+Environment:
+    HALE_REVIEW_DB      Database path (default api/review_queue.db)
+    HALE_REVIEW_LEASE   Seconds a claim is held before it can be taken over (default 1800)
+"""
+
+import os
+import json
+import time
+import uuid
+import zlib
+import base64
+import sqlite3
+import threading
+from typing import Dict, Any, Optional, List, Tuple
+
+from hale_logging import get_logger
+from hale_metrics import QUEUE_DEPTH
+
+log = get_logger('reviews')
+
+STATUSES = ('pending', 'claimed', 'resolved')
+DECISIONS = ('PASS', 'FAIL')
+
+# Legacy store, imported once into an empty database
+LEGACY_REVIEWS_DIR = 'pending_reviews'
+
+# Sort orders for list(): column plus direction
+_ORDERS = {
+    'age': ('created_at', 'ASC'),
+    'newest': ('created_at', 'DESC'),
+    'confidence': ('confidence', 'ASC'),
+}
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS reviews (
+    id                TEXT PRIMARY KEY,
+    transaction_id    TEXT,
+    seller_address    TEXT,
+    contract_address  TEXT,
+    status            TEXT NOT NULL DEFAULT 'pending',
+    confidence        INTEGER,
+    created_at        REAL NOT NULL,
+    ai_verdict        TEXT NOT NULL,
+    contract_data     BLOB NOT NULL,
+    claimed_by        TEXT,
+    claimed_at        REAL,
+    decision          TEXT,
+    notes             TEXT,
+    resolved_by       TEXT,
+    resolved_at       REAL,
+    settlement        TEXT
+);
+CREATE INDEX IF NOT EXISTS reviews_age ON reviews (status, created_at);
+CREATE INDEX IF NOT EXISTS reviews_confidence ON reviews (status, confidence);
+CREATE INDEX IF NOT EXISTS reviews_seller ON reviews (seller_address, status, created_at);
+CREATE INDEX IF NOT EXISTS reviews_transaction ON reviews (transaction_id);
+"""
+
+# Everything but the compressed contract data
+_SUMMARY_COLUMNS = ('id, transaction_id, seller_address, contract_address, status, confidence, created_at, '
+                    'ai_verdict, claimed_by, claimed_at, decision, notes, resolved_by, resolved_at, settlement')
+
+
+class ReviewError(Exception):
+    """A review is missing or not in a state that allows the operation."""
+
+
+def _compress(contract_data: Dict[str, Any]) -> bytes:
+    return zlib.compress(json.dumps(contract_data, separators=(',', ':'), default=str).encode(), 6)
+
+
+def _encode_cursor(sort_value, review_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([sort_value, review_id]).encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[Any, str]:
+    sort_value, review_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    return sort_value, review_id
+
+
+class ReviewQueue:
+    """Indexed review store; safe to share between request threads."""
+
+    def __init__(self, path: Optional[str] = None, legacy_dir: Optional[str] = None,
+                 lease: Optional[float] = None):
+        self.path = path or os.getenv('HALE_REVIEW_DB') or os.path.join(
+            os.path.dirname(os.path.abspath(__file__)), 'review_queue.db')
+        self.lease = float(lease or os.getenv('HALE_REVIEW_LEASE', '1800'))
+        self._lock = threading.Lock()
+        # Autocommit: every statement outside an explicit BEGIN is its own transaction
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.row_factory = sqlite3.Row
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(_SCHEMA)
+        self._migrate_legacy(legacy_dir or os.path.join(os.path.dirname(self.path), LEGACY_REVIEWS_DIR))
+        QUEUE_DEPTH.set_function(lambda: self.count('pending'), queue='human_review')
+
+    def _migrate_legacy(self, legacy_dir: str):
+        if not os.path.isdir(legacy_dir) or self.count():
+            return
+        imported = 0
+        for name in sorted(os.listdir(legacy_dir)):
+            if not name.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(legacy_dir, name), 'r') as f:
+                    legacy = json.load(f)
+                contract_data = legacy.get('contract_data') or {}
+                self.enqueue(contract_data, legacy.get('ai_verdict') or {},
+                             created_at=legacy.get('timestamp'))
+                imported += 1
+            except Exception as e:
+                log.error("Error importing legacy review", file=name, error=str(e))
+        os.replace(legacy_dir, legacy_dir + '.migrated')
+        log.info("Imported legacy review files", count=imported)
+
+    # --- WRITES ---
+
+    def enqueue(self, contract_data: Dict[str, Any], verdict: Dict[str, Any],
+                seller_address: Optional[str] = None, contract_address: Optional[str] = None,
+                created_at: Optional[float] = None) -> str:
+        """Queue a verdict for review; returns the new review id."""
+        from hale_blob_store import get_blob_store
+        review_id = f"review_{uuid.uuid4().hex}"
+        contract_data = get_blob_store().externalize(contract_data)
+        confidence = verdict.get('confidence_score')
+        with self._lock:
+            self._db.execute(
+                'INSERT INTO reviews (id, transaction_id, seller_address, contract_address, status, confidence, '
+                'created_at, ai_verdict, contract_data) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                (review_id, contract_data.get('transaction_id'),
+                 seller_address.lower() if seller_address else None, contract_address, 'pending',
+                 int(confidence) if isinstance(confidence, (int, float)) else None,
+                 created_at or time.time(), json.dumps(verdict, default=str), _compress(contract_data)))
+        return review_id
+
+    def set_parties(self, review_id: str, seller_address: Optional[str], contract_address: Optional[str]):
+        """Seller and escrow the review's decision settles against (known once the delivery is routed)."""
+        with self._lock:
+            self._db.execute('UPDATE reviews SET seller_address = ?, contract_address = ? WHERE id = ?',
+                             (seller_address.lower() if seller_address else None, contract_address, review_id))
+
+    def claim(self, reviewer: str, review_id: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Claim review_id, or the oldest claimable review. Pending reviews and
+        claims whose lease has expired are claimable. Returns the full review,
+        or None when there is nothing to claim.
+        """
+        now = time.time()
+        expired = now - self.lease
+        with self._lock:
+            if review_id is None:
+                row = self._db.execute(
+                    "SELECT id FROM reviews WHERE status = 'pending' ORDER BY created_at LIMIT 1").fetchone()
+                if row is None:
+                    row = self._db.execute(
+                        "SELECT id FROM reviews WHERE status = 'claimed' AND claimed_at < ? "
+                        "ORDER BY created_at LIMIT 1", (expired,)).fetchone()
+                if row is None:
+                    return None
+                review_id = row['id']
+            # The status check makes the claim atomic against a concurrent claimer
+            claimed = self._db.execute(
+                "UPDATE reviews SET status = 'claimed', claimed_by = ?, claimed_at = ? WHERE id = ? AND "
+                "(status = 'pending' OR (status = 'claimed' AND (claimed_at < ? OR claimed_by = ?)))",
+                (reviewer, now, review_id, expired, reviewer)).rowcount
+        if not claimed:
+            raise ReviewError(f"Review {review_id} is not claimable")
+        log.info("Review claimed", review_id=review_id, reviewer=reviewer)
+        return self.get(review_id)
+
+    def resolve(self, review_id: str, reviewer: str, decision: str, notes: str = '') -> Dict[str, Any]:
+        """Record reviewer's PASS/FAIL decision on a review they hold (or a pending one)."""
+        decision = decision.upper()
+        if decision not in DECISIONS:
+            raise ReviewError(f"Decision must be one of {', '.join(DECISIONS)}")
+        with self._lock:
+            resolved = self._db.execute(
+                "UPDATE reviews SET status = 'resolved', decision = ?, notes = ?, resolved_by = ?, resolved_at = ? "
+                "WHERE id = ? AND (status = 'pending' OR (status = 'claimed' AND (claimed_by = ? OR claimed_at < ?)))",
+                (decision, notes, reviewer, time.time(), review_id, reviewer, time.time() - self.lease)).rowcount
+        if not resolved:
+            raise ReviewError(f"Review {review_id} is not open or is claimed by someone else")
+        log.info("Review resolved", review_id=review_id, reviewer=reviewer, decision=decision)
+        return self.get(review_id)
+
+    def record_settlement(self, review_id: str, settlement: Dict[str, Any]):
+        with self._lock:
+            self._db.execute('UPDATE reviews SET settlement = ? WHERE id = ?',
+                             (json.dumps(settlement, default=str), review_id))
+
+    # --- READS ---
+
+    def _summary(self, row: sqlite3.Row) -> Dict[str, Any]:
+        review = dict(row)
+        review.pop('contract_data', None)
+        review['ai_verdict'] = json.loads(review['ai_verdict'])
+        review['settlement'] = json.loads(review['settlement']) if review['settlement'] else None
+        return review
+
+    def get(self, review_id: str) -> Optional[Dict[str, Any]]:
+        """The full review, contract data decompressed."""
+        with self._lock:
+            row = self._db.execute('SELECT * FROM reviews WHERE id = ?', (review_id,)).fetchone()
+        if row is None:
+            return None
+        from hale_blob_store import hydrate
+        review = self._summary(row)
+        review['contract_data'] = hydrate(json.loads(zlib.decompress(row['contract_data'])))
+        return review
+
+    def list(self, status: Optional[str] = 'pending', order: str = 'age', seller: Optional[str] = None,
+             limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
+        """
+        One page of review summaries (no contract data).
+
+        Returns:
+            {'reviews': [...], 'next_cursor': str or None}
+        """
+        column, direction = _ORDERS.get(order, _ORDERS['age'])
+        limit = max(1, min(int(limit), 500))
+        clauses, params = [], []
+        if status:
+            clauses.append('status = ?')
+            params.append(status)
+        if seller:
+            clauses.append('seller_address = ?')
+            params.append(seller.lower())
+        if cursor:
+            # Keyset: strictly after the last row of the previous page, ties broken by id
+            value, last_id = _decode_cursor(cursor)
+            op = '>' if direction == 'ASC' else '<'
+            clauses.append(f'(COALESCE({column}, -1) {op} ? OR (COALESCE({column}, -1) = ? AND id {op} ?))')
+            params += [value, value, last_id]
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ''
+        query = (f'SELECT {_SUMMARY_COLUMNS} FROM reviews {where} '
+                 f'ORDER BY COALESCE({column}, -1) {direction}, id {direction} LIMIT ?')
+        with self._lock:
+            rows = self._db.execute(query, params + [limit + 1]).fetchall()
+        page = [self._summary(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = page[-1]
+            value = last[column] if last[column] is not None else -1
+            next_cursor = _encode_cursor(value, last['id'])
+        return {'reviews': page, 'next_cursor': next_cursor}
+
+    def unsettled(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Resolved reviews whose settlement was never recorded (e.g. after a crash)."""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT id FROM reviews WHERE status = 'resolved' AND settlement IS NULL "
+                "ORDER BY resolved_at LIMIT ?", (limit,)).fetchall()
+        return [self.get(row['id']) for row in rows]
+
+    def count(self, status: Optional[str] = None) -> int:
+        with self._lock:
+            if status is None:
+                return self._db.execute('SELECT COUNT(*) FROM reviews').fetchone()[0]
+            return self._db.execute('SELECT COUNT(*) FROM reviews WHERE status = ?', (status,)).fetchone()[0]
+
+    def close(self):
+        with self._lock:
+            self._db.close()
+
+
+_queue: Optional[ReviewQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_review_queue() -> ReviewQueue:
+    """Process-wide review queue (HALE_REVIEW_DB)."""
+    global _queue
+    if _queue is None:
+        with _queue_lock:
+            if _queue is None:
+                _queue = ReviewQueue()
+    return _queue
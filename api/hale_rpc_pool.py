@@ -0,0 +1,657 @@
+#!/usr/bin/env python3
+"""
+HALE RPC Pools
+Process-wide, keep-alive connection pools for Arc (EVM JSON-RPC) and Solana.
+
+Each chain gets one pool per set of RPC URLs. A pool keeps persistent HTTP
+sessions (so requests skip TCP/TLS setup), orders its endpoints by health and
+observed latency, and fails over to the next endpoint on transport errors,
+timeouts, HTTP 429 and 5xx. JSON-RPC errors are returned to the caller
+unchanged, since another endpoint would give the same answer. The exception
+is eth_sendRawTransaction: a send that timed out may still have reached the
+first node, so when the retry is answered 'already known' (or 'nonce too low'
+and the node has the transaction) it succeeds with the transaction's hash.
+
+    Web3(ArcPoolProvider(get_arc_pool(url)))          # sync web3
+    AsyncWeb3(AsyncArcPoolProvider(get_arc_pool(url))) # async web3
+    get_solana_pool(url).get_latest_blockhash()        # solana-py Client API
+    get_solana_pool(url).request(method, params)       # raw JSON-RPC (methods Client lacks)
+    await get_solana_pool(url).aio.get_account_info(pk) # solana-py AsyncClient API
+
+Arc requests additionally pass through a small JSON-RPC middleware: values
+that rarely change (chain id, gas price, block number...) are cached for a
+few seconds, identical reads already in flight are shared, and requests
+issued concurrently are packed into one JSON-RPC batch payload.
+
+Environment:
+    ARC_RPC_URLS              Extra Arc RPC URLs, comma-separated (failover order)
+    SOLANA_RPC_URLS           Extra Solana RPC URLs, comma-separated
+    HALE_RPC_POOL_SIZE        Keep-alive connections per endpoint (default 10)
+    HALE_RPC_TIMEOUT          Per-request timeout in seconds (default 10)
+    HALE_RPC_FAILURE_COOLDOWN Seconds an endpoint is skipped after failing (default 30)
+    HALE_RPC_MAX_BATCH        Most Arc requests per JSON-RPC batch; 1 disables batching (default 50)
+    HALE_RPC_CACHE            Set to 0 to disable the Arc read cache and coalescing
+"""
+
+import os
+import json
+import time
+import queue
+import asyncio
+import itertools
+import threading
+import weakref
+from concurrent.futures import Future
+from urllib.parse import urlsplit
+from typing import Dict, Any, List, Optional, Tuple
+
+import aiohttp
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from web3.providers.base import JSONBaseProvider
+from web3.providers.async_base import AsyncJSONBaseProvider
+from web3._utils.encoding import Web3JsonEncoder
+from web3.exceptions import ProviderConnectionError
+from eth_utils import keccak
+from hexbytes import HexBytes
+
+from hale_logging import get_logger
+from hale_metrics import RPC_ENDPOINT_UP, RPC_LATENCY, RPC_BATCH_SIZE, CACHE_HITS, CACHE_MISSES
+
+log = get_logger('rpc')
+
+# Weight of the newest sample in the endpoint latency moving average
+LATENCY_EWMA_ALPHA = 0.2
+
+# Consecutive failures before an endpoint is put on cooldown
+FAILURE_THRESHOLD = 3
+
+# HTTP statuses worth retrying on another endpoint
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+# Arc reads cached briefly (seconds); anything else always goes to the node
+ARC_CACHE_TTLS = {
+    'eth_chainId': 3600.0,
+    'net_version': 3600.0,
+    'web3_clientVersion': 30.0,
+    'eth_gasPrice': 2.0,
+    'eth_maxPriorityFeePerGas': 2.0,
+    'eth_blockNumber': 1.0,
+}
+
+# Arc reads that may share one in-flight request when issued identically
+ARC_COALESCE_METHODS = frozenset(ARC_CACHE_TTLS) | {
+    'eth_call', 'eth_estimateGas', 'eth_feeHistory', 'eth_getBalance', 'eth_getBlockByNumber',
+    'eth_getCode', 'eth_getTransactionCount', 'eth_getTransactionReceipt', 'eth_getTransactionByHash',
+}
+
+# eth_sendRawTransaction errors for a transaction the node already has (geth, erigon, nethermind wording)
+SEND_KNOWN_MARKERS = ('already known', 'known transaction', 'alreadyknown')
+# ...or that a transaction with its nonce was already accepted, possibly this one
+SEND_NONCE_USED_MARKERS = ('nonce too low',)
+
+
+def _endpoint_label(url: str) -> str:
+    """scheme://host of an RPC URL (paths and query strings often carry API keys)."""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}" if parts.netloc else url
+
+
+def _env_urls(name: str) -> List[str]:
+    return [u.strip() for u in os.getenv(name, '').split(',') if u.strip()]
+
+
+class RpcUnavailable(ProviderConnectionError):
+    """
+    Every endpoint in a pool failed for one request. A ProviderConnectionError,
+    so web3's is_connected() reports False instead of raising.
+    """
+
+
+class Endpoint:
+    """One RPC URL with its health and latency statistics."""
+
+    def __init__(self, chain: str, url: str):
+        self.chain = chain
+        self.url = url
+        self.label = _endpoint_label(url)
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.latency_ms: Optional[float] = None
+        self.down_until = 0.0
+        self.last_error: Optional[str] = None
+        RPC_ENDPOINT_UP.set_function(lambda: 0 if self.down_until > time.time() else 1,
+                                     chain=chain, endpoint=self.label)
+
+    @property
+    def healthy(self) -> bool:
+        return self.down_until <= time.time()
+
+    def record_success(self, seconds: float):
+        self.requests += 1
+        self.consecutive_failures = 0
+        self.down_until = 0.0
+        sample_ms = seconds * 1000
+        self.latency_ms = sample_ms if self.latency_ms is None else (
+            self.latency_ms + LATENCY_EWMA_ALPHA * (sample_ms - self.latency_ms))
+        RPC_LATENCY.observe(seconds, chain=self.chain, endpoint=self.label)
+
+    def record_failure(self, error: Exception, cooldown: float):
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        # solana-py wraps transport errors in an exception with an empty message
+        self.last_error = (str(error) or repr(error.__cause__ or error))[:200]
+        if self.consecutive_failures >= FAILURE_THRESHOLD:
+            self.down_until = time.time() + cooldown
+            log.warning("RPC endpoint marked down", chain=self.chain, endpoint=self.label,
+                        cooldown_s=cooldown, error=self.last_error)
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'endpoint': self.label,
+            'healthy': self.healthy,
+            'requests': self.requests,
+            'failures': self.failures,
+            'latency_ms': round(self.latency_ms, 1) if self.latency_ms is not None else None,
+            'last_error': self.last_error
+        }
+
+
+class _EndpointPool:
+    """Ordered, health-tracked endpoints shared by the Arc and Solana pools."""
+
+    def __init__(self, chain: str, urls: List[str], pool_size: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        if not urls:
+            raise ValueError(f"No {chain} RPC URL configured")
+        self.chain = chain
+        self.endpoints = [Endpoint(chain, url) for url in urls]
+        self.pool_size = int(pool_size or os.getenv('HALE_RPC_POOL_SIZE', '10'))
+        self.timeout = float(timeout or os.getenv('HALE_RPC_TIMEOUT', '10'))
+        self.cooldown = float(os.getenv('HALE_RPC_FAILURE_COOLDOWN', '30'))
+
+    def ordered(self) -> List[Endpoint]:
+        """
+        Healthy endpoints (recently failing ones last, then fastest first),
+        followed by the ones on cooldown as a last resort.
+        """
+        healthy = [e for e in self.endpoints if e.healthy]
+        healthy.sort(key=lambda e: (e.consecutive_failures, e.latency_ms if e.latency_ms is not None else 0.0))
+        return healthy + [e for e in self.endpoints if not e.healthy]
+
+    def status(self) -> List[Dict[str, Any]]:
+        return [e.status() for e in self.endpoints]
+
+
+class ArcRpcPool(_EndpointPool):
+    """Keep-alive JSON-RPC sessions over one or more Arc endpoints."""
+
+    def __init__(self, urls: List[str], pool_size: Optional[int] = None, timeout: Optional[float] = None):
+        super().__init__('arc', urls, pool_size, timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=len(self.endpoints), pool_maxsize=self.pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        # aiohttp sessions are bound to the loop that creates them
+        self._async_sessions: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, aiohttp.ClientSession]' = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+
+        # JSON-RPC middleware state
+        self.max_batch = max(1, int(os.getenv('HALE_RPC_MAX_BATCH', '50')))
+        self.cache_enabled = os.getenv('HALE_RPC_CACHE', '1') != '0'
+        self._ids = itertools.count(1)
+        self._cache: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._in_flight: Dict[str, Future] = {}
+        self._async_in_flight: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, asyncio.Future]]' = \
+            weakref.WeakKeyDictionary()
+        self._async_pending: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, List]' = weakref.WeakKeyDictionary()
+        # Sync batching: dispatcher threads drain whatever has queued up while they were busy
+        self._queue: 'queue.SimpleQueue' = queue.SimpleQueue()
+        self._dispatchers_started = False
+
+    def post(self, payload: bytes) -> bytes:
+        """POST a JSON-RPC payload, failing over across endpoints."""
+        last_error: Optional[Exception] = None
+        for endpoint in self.ordered():
+            started = time.perf_counter()
+            try:
+                resp = self.session.post(endpoint.url, data=payload, timeout=self.timeout,
+                                         headers={'Content-Type': 'application/json'})
+                if resp.status_code in RETRYABLE_STATUS:
+                    raise requests.HTTPError(f"HTTP {resp.status_code}", response=resp)
+            except requests.RequestException as e:
+                endpoint.record_failure(e, self.cooldown)
+                last_error = e
+                continue
+            endpoint.record_success(time.perf_counter() - started)
+            return resp.content
+        raise RpcUnavailable(f"All Arc RPC endpoints failed: {last_error}")
+
+    def _async_session(self) -> aiohttp.ClientSession:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            session = self._async_sessions.get(loop)
+            if session is None or session.closed:
+                connector = aiohttp.TCPConnector(limit=self.pool_size * len(self.endpoints),
+                                                 limit_per_host=self.pool_size)
+                session = self._async_sessions[loop] = aiohttp.ClientSession(
+                    connector=connector, timeout=aiohttp.ClientTimeout(total=self.timeout))
+        return session
+
+    async def apost(self, payload: bytes) -> bytes:
+        """Async POST of a JSON-RPC payload, failing over across endpoints."""
+        session = self._async_session()
+        last_error: Optional[Exception] = None
+        for endpoint in self.ordered():
+            started = time.perf_counter()
+            try:
+                async with session.post(endpoint.url, data=payload,
+                                        headers={'Content-Type': 'application/json'}) as resp:
+                    if resp.status in RETRYABLE_STATUS:
+                        raise aiohttp.ClientResponseError(resp.request_info, resp.history, status=resp.status)
+                    content = await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                endpoint.record_failure(e, self.cooldown)
+                last_error = e
+                continue
+            endpoint.record_success(time.perf_counter() - started)
+            return content
+        raise RpcUnavailable(f"All Arc RPC endpoints failed: {last_error}")
+
+
+    # --- JSON-RPC middleware ---
+
+    def _key(self, method: str, params: Any) -> Optional[str]:
+        if not self.cache_enabled or method not in ARC_COALESCE_METHODS:
+            return None
+        return method + json.dumps(params, cls=Web3JsonEncoder, sort_keys=True)
+
+    def _cached(self, method: str, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        if key is None or method not in ARC_CACHE_TTLS:
+            return None
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            CACHE_HITS.inc(cache='arc_rpc')
+            return entry[1]
+        CACHE_MISSES.inc(cache='arc_rpc')
+        return None
+
+    def _store(self, method: str, key: Optional[str], response: Dict[str, Any]):
+        if key is not None and method in ARC_CACHE_TTLS and 'error' not in response:
+            self._cache[key] = (time.monotonic() + ARC_CACHE_TTLS[method], response)
+
+    def _encode(self, requests_: List[Dict[str, Any]]) -> bytes:
+        body = requests_[0] if len(requests_) == 1 else requests_
+        return json.dumps(body, cls=Web3JsonEncoder).encode()
+
+    def _split_batch(self, requests_: List[Dict[str, Any]], raw: bytes) -> List[Dict[str, Any]]:
+        """Match a (batch) response to its requests by id."""
+        decoded = json.loads(raw)
+        if len(requests_) == 1:
+            return [decoded]
+        if not isinstance(decoded, list):
+            # Node rejected the batch as a whole: fall back to single requests from now on
+            log.warning("Arc RPC endpoint rejected a batch; disabling batching", error=str(decoded)[:200])
+            self.max_batch = 1
+            raise _BatchRejected()
+        by_id = {r.get('id'): r for r in decoded}
+        missing = {'jsonrpc': '2.0', 'error': {'code': -32603, 'message': 'Missing response in batch'}}
+        return [by_id.get(r['id'], dict(missing, id=r['id'])) for r in requests_]
+
+    def _duplicate_send(self, method: str, params: Any, response: Dict[str, Any]) -> Optional[Tuple[str, bool]]:
+        """
+        (tx_hash, lookup) when a failed eth_sendRawTransaction may only mean the
+        node already has this exact transaction. lookup: the error is also what
+        another transaction with the same nonce causes, so check the hash first.
+        """
+        if method != 'eth_sendRawTransaction' or 'error' not in response:
+            return None
+        message = str((response['error'] or {}).get('message', '')).lower()
+        if any(marker in message for marker in SEND_KNOWN_MARKERS):
+            lookup = False
+        elif any(marker in message for marker in SEND_NONCE_USED_MARKERS):
+            lookup = True
+        else:
+            return None
+        return '0x' + keccak(HexBytes(params[0])).hex(), lookup
+
+    def _sent(self, response: Dict[str, Any], tx_hash: str) -> Dict[str, Any]:
+        log.info("Transaction already known to the node; treating the send as accepted", tx_hash=tx_hash,
+                 error=response['error'].get('message'))
+        return {'jsonrpc': '2.0', 'id': response.get('id'), 'result': tx_hash}
+
+    def _new_request(self, method: str, params: Any) -> Dict[str, Any]:
+        return {'jsonrpc': '2.0', 'method': method, 'params': params, 'id': next(self._ids)}
+
+    def _start_dispatchers(self):
+        with self._lock:
+            if self._dispatchers_started:
+                return
+            self._dispatchers_started = True
+        for i in range(self.pool_size):
+            threading.Thread(target=self._dispatch_loop, name=f'hale-arc-rpc-{i}', daemon=True).start()
+
+    def _dispatch_loop(self):
+        while True:
+            items = [self._queue.get()]
+            while len(items) < self.max_batch:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            self._send_items(items)
+
+    def _send_items(self, items: List[Tuple[Dict[str, Any], Future]]):
+        requests_ = [request for request, _ in items]
+        RPC_BATCH_SIZE.observe(len(requests_), chain='arc')
+        try:
+            responses = self._split_batch(requests_, self.post(self._encode(requests_)))
+        except _BatchRejected:
+            for item in items:
+                self._send_items([item])
+            return
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        for (_, future), response in zip(items, responses):
+            future.set_result(response)
+
+    def request(self, method: str, params: Any) -> Dict[str, Any]:
+        """Send one JSON-RPC request through the cache, coalescing and batching layers."""
+        key = self._key(method, params)
+        cached = self._cached(method, key)
+        if cached is not None:
+            return cached
+
+        owner = True
+        if key is not None:
+            with self._lock:
+                future = self._in_flight.get(key)
+                if future is None:
+                    future = self._in_flight[key] = Future()
+                else:
+                    owner = False
+                    CACHE_HITS.inc(cache='arc_rpc_coalesced')
+        else:
+            future = Future()
+        if not owner:
+            return future.result()
+
+        try:
+            if self.max_batch > 1:
+                self._start_dispatchers()
+                queued = Future()
+                self._queue.put((self._new_request(method, params), queued))
+                response = queued.result()
+            else:
+                request = self._new_request(method, params)
+                response = self._split_batch([request], self.post(self._encode([request])))[0]
+            duplicate = self._duplicate_send(method, params, response)
+            if duplicate and (not duplicate[1] or
+                              self.request('eth_getTransactionByHash', [duplicate[0]]).get('result')):
+                response = self._sent(response, duplicate[0])
+            self._store(method, key, response)
+            future.set_result(response)
+            return response
+        except Exception as e:
+            future.set_exception(e)
+            raise
+        finally:
+            if key is not None:
+                with self._lock:
+                    self._in_flight.pop(key, None)
+
+    async def _flush_async(self, loop: asyncio.AbstractEventLoop):
+        """Send everything queued on this loop during the current tick as one batch."""
+        pending = self._async_pending.pop(loop, [])
+        while pending:
+            items, pending = pending[:self.max_batch], pending[self.max_batch:]
+            requests_ = [request for request, _ in items]
+            RPC_BATCH_SIZE.observe(len(requests_), chain='arc')
+            try:
+                responses = self._split_batch(requests_, await self.apost(self._encode(requests_)))
+            except _BatchRejected:
+                for item in items:
+                    self._async_pending.setdefault(loop, []).append(item)
+                await self._flush_async(loop)
+                continue
+            except Exception as e:
+                for _, future in items:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), response in zip(items, responses):
+                if not future.done():
+                    future.set_result(response)
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop):
+        task = loop.create_task(self._flush_async(loop))
+        # The loop only keeps weak references to tasks
+        _flush_tasks.add(task)
+        task.add_done_callback(_flush_tasks.discard)
+
+    async def arequest(self, method: str, params: Any) -> Dict[str, Any]:
+        """Async request through the cache, coalescing and batching layers."""
+        key = self._key(method, params)
+        cached = self._cached(method, key)
+        if cached is not None:
+            return cached
+
+        loop = asyncio.get_running_loop()
+        in_flight = self._async_in_flight.setdefault(loop, {})
+        if key is not None and key in in_flight:
+            CACHE_HITS.inc(cache='arc_rpc_coalesced')
+            return await asyncio.shield(in_flight[key])
+
+        future = loop.create_future()
+        if key is not None:
+            in_flight[key] = future
+        try:
+            pending = self._async_pending.get(loop)
+            if pending is None:
+                pending = self._async_pending[loop] = []
+                # Requests made by other tasks before this callback runs join the batch
+                loop.call_soon(self._schedule_flush, loop)
+            pending.append((self._new_request(method, params), future))
+            response = await asyncio.shield(future)
+            duplicate = self._duplicate_send(method, params, response)
+            if duplicate and (not duplicate[1] or
+                              (await self.arequest('eth_getTransactionByHash', [duplicate[0]])).get('result')):
+                response = self._sent(response, duplicate[0])
+            self._store(method, key, response)
+            return response
+        finally:
+            if key is not None:
+                in_flight.pop(key, None)
+
+
+_flush_tasks: set = set()
+
+
+class _BatchRejected(Exception):
+    """The endpoint answered a batch with a single error object."""
+
+
+class ArcPoolProvider(JSONBaseProvider):
+    """web3 provider sending every request through an ArcRpcPool."""
+
+    def __init__(self, pool: ArcRpcPool, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    def __str__(self) -> str:
+        return f"ArcPoolProvider({', '.join(e.label for e in self.pool.endpoints)})"
+
+    def make_request(self, method, params):
+        return self.pool.request(method, params)
+
+    def is_connected(self, show_traceback: bool = False) -> bool:
+        # The sync base class only treats OSError as "not connected"
+        try:
+            return super().is_connected(show_traceback)
+        except RpcUnavailable:
+            if show_traceback:
+                raise
+            return False
+
+
+class AsyncArcPoolProvider(AsyncJSONBaseProvider):
+    """AsyncWeb3 provider sending every request through an ArcRpcPool."""
+
+    def __init__(self, pool: ArcRpcPool, **kwargs):
+        super().__init__(**kwargs)
+        self.pool = pool
+
+    def __str__(self) -> str:
+        return f"AsyncArcPoolProvider({', '.join(e.label for e in self.pool.endpoints)})"
+
+    async def make_request(self, method, params):
+        return await self.pool.arequest(method, params)
+
+    async def disconnect(self) -> None:
+        # Sessions belong to the process-wide pool
+        return None
+
+
+class _AsyncSolanaFailover:
+    """AsyncClient-shaped view of a SolanaRpcPool for the running event loop."""
+
+    def __init__(self, pool: 'SolanaRpcPool'):
+        self._pool = pool
+
+    def __getattr__(self, name: str):
+        async def call(*args, **kwargs):
+            from solana.exceptions import SolanaRpcException
+            clients = self._pool._async_clients()
+            last_error: Optional[Exception] = None
+            for endpoint in self._pool.ordered():
+                started = time.perf_counter()
+                try:
+                    result = await getattr(clients[endpoint.url], name)(*args, **kwargs)
+                except (SolanaRpcException, httpx.HTTPError, OSError) as e:
+                    endpoint.record_failure(e, self._pool.cooldown)
+                    last_error = e
+                    continue
+                endpoint.record_success(time.perf_counter() - started)
+                return result
+            raise RpcUnavailable(f"All Solana RPC endpoints failed: {last_error}")
+        return call
+
+
+class SolanaRpcPool(_EndpointPool):
+    """
+    solana-py clients (one per endpoint, keep-alive) behind a failover proxy.
+    Any Client method can be called on the pool; AsyncClient methods on .aio.
+    """
+
+    def __init__(self, urls: List[str], pool_size: Optional[int] = None, timeout: Optional[float] = None):
+        super().__init__('solana', urls, pool_size, timeout)
+        from solana.rpc.api import Client
+        self._limits = httpx.Limits(max_connections=self.pool_size, max_keepalive_connections=self.pool_size)
+        self._clients = {}
+        for endpoint in self.endpoints:
+            client = Client(endpoint.url, timeout=self.timeout)
+            client._provider.session = httpx.Client(timeout=self.timeout, limits=self._limits)
+            self._clients[endpoint.url] = client
+        self._loop_clients: 'weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, Any]]' = \
+            weakref.WeakKeyDictionary()
+        self._lock = threading.Lock()
+        self.aio = _AsyncSolanaFailover(self)
+
+    def _async_clients(self) -> Dict[str, Any]:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._loop_clients.get(loop)
+            if clients is None:
+                from solana.rpc.async_api import AsyncClient
+                clients = {}
+                for endpoint in self.endpoints:
+                    client = AsyncClient(endpoint.url, timeout=self.timeout)
+                    client._provider.session = httpx.AsyncClient(timeout=self.timeout, limits=self._limits)
+                    clients[endpoint.url] = client
+                self._loop_clients[loop] = clients
+        return clients
+
+    def request(self, method: str, params: List[Any]) -> Dict[str, Any]:
+        """
+        Raw JSON-RPC call with failover, for methods solana-py's Client does not
+        wrap (e.g. getRecentPrioritizationFees). Returns the response dict.
+        """
+        payload = {'jsonrpc': '2.0', 'id': 1, 'method': method, 'params': params}
+        last_error: Optional[Exception] = None
+        for endpoint in self.ordered():
+            started = time.perf_counter()
+            try:
+                resp = self._clients[endpoint.url]._provider.session.post(endpoint.url, json=payload)
+                if resp.status_code in RETRYABLE_STATUS:
+                    raise httpx.HTTPStatusError(f"HTTP {resp.status_code}", request=resp.request, response=resp)
+                body = resp.json()
+            except (httpx.HTTPError, ValueError) as e:
+                endpoint.record_failure(e, self.cooldown)
+                last_error = e
+                continue
+            endpoint.record_success(time.perf_counter() - started)
+            return body
+        raise RpcUnavailable(f"All Solana RPC endpoints failed: {last_error}")
+
+    def __getattr__(self, name: str):
+        if name.startswith('_'):
+            raise AttributeError(name)
+
+        def call(*args, **kwargs):
+            from solana.exceptions import SolanaRpcException
+            last_error: Optional[Exception] = None
+            for endpoint in self.ordered():
+                started = time.perf_counter()
+                try:
+                    result = getattr(self._clients[endpoint.url], name)(*args, **kwargs)
+                except (SolanaRpcException, httpx.HTTPError, OSError) as e:
+                    endpoint.record_failure(e, self.cooldown)
+                    last_error = e
+                    continue
+                endpoint.record_success(time.perf_counter() - started)
+                return result
+            raise RpcUnavailable(f"All Solana RPC endpoints failed: {last_error}")
+        return call
+
+
+_pools: Dict[Tuple[str, Tuple[str, ...]], _EndpointPool] = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool(cls, chain: str, primary_url: Optional[str], env_name: str):
+    urls = [u for u in [primary_url] + _env_urls(env_name) if u]
+    urls = list(dict.fromkeys(urls))
+    key = (chain, tuple(urls))
+    pool = _pools.get(key)
+    if pool is None:
+        with _pools_lock:
+            pool = _pools.get(key)
+            if pool is None:
+                pool = _pools[key] = cls(urls)
+                log.info("RPC pool created", chain=chain, endpoints=[_endpoint_label(u) for u in urls],
+                         pool_size=pool.pool_size)
+    return pool
+
+
+def get_arc_pool(primary_url: Optional[str] = None) -> ArcRpcPool:
+    """Process-wide Arc pool for primary_url plus ARC_RPC_URLS."""
+    return _get_pool(ArcRpcPool, 'arc', primary_url, 'ARC_RPC_URLS')
+
+
+def get_solana_pool(primary_url: Optional[str] = None) -> SolanaRpcPool:
+    """Process-wide Solana pool for primary_url plus SOLANA_RPC_URLS."""
+    return _get_pool(SolanaRpcPool, 'solana', primary_url, 'SOLANA_RPC_URLS')
+
+
+def pool_status() -> Dict[str, List[Dict[str, Any]]]:
+    """Per-endpoint health and latency of every pool created so far."""
+    status: Dict[str, List[Dict[str, Any]]] = {}
+    for (chain, _), pool in list(_pools.items()):
+        status.setdefault(chain, []).extend(pool.status())
+    return status
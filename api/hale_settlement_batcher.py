@@ -0,0 +1,518 @@
+#!/usr/bin/env python3
+"""
+HALE Settlement Batcher
+Collects escrow settlements (release on PASS, refund on FAIL) over a short
+window and submits them together instead of one oracle transaction at a time.
+
+Two submission modes:
+
+    pipeline   (default) every settlement stays its own release/refund call
+               from the oracle key that settles its escrow (hale_signer_pool),
+               but the whole window is signed with consecutive nonces from
+               each key's local sequence and broadcast at once (the
+               Arc RPC pool packs the sends, and later the receipt polls, into
+               JSON-RPC batches). Many settlements land in the same block
+               instead of one per block.
+    multicall  (SETTLEMENT_MULTICALL_ADDRESS set) the window goes out as one
+               Multicall3-style aggregate3 transaction. Escrow release/refund
+               are oracle-only, so this address must be a forwarder the escrow
+               accepts as its oracle; a plain public Multicall3 would be
+               rejected by the onlyOracle check. The aggregate is signed by
+               the pool key chosen for the forwarder address. Each window is
+               dry-run with eth_call first and only the sub-calls that succeed
+               are sent.
+
+The factory ABI has no batch settlement entrypoint, so there is no factory
+mode. Every item gets its own outcome. Items whose broadcast fails, or that
+fail inside the aggregate call, are retried as single transactions. Unless
+HALE_PREFLIGHT=0, every transaction is first dry-run against the pending block
+(hale_preflight) and items that would revert are reported as
+'simulated_revert' with the decoded reason instead of being sent. Items
+whose dry run only ran out of gas are re-estimated and dry-run once more.
+
+Windows are numbered, signed and broadcast one at a time so locally assigned
+nonces never overlap, but receipts are awaited after that, so the next
+window goes out while the previous one is still being mined.
+
+Usage:
+    batcher = SettlementBatcher(async_oracle)
+    outcome = await batcher.settle(verdict, seller, transaction_id, escrow)
+    outcome['status']  # confirmed | submitted | reverted | simulated_revert | error | skipped
+
+Environment:
+    HALE_SETTLEMENT_WINDOW          Seconds to collect settlements (default 0.25)
+    HALE_SETTLEMENT_MAX_BATCH       Most settlements per window (default 50)
+    SETTLEMENT_MULTICALL_ADDRESS    aggregate3 forwarder; enables multicall mode
+"""
+
+import os
+import asyncio
+from dataclasses import dataclass, field
+from typing import Dict, Any, Optional, List, Tuple
+
+from hale_oracle_backend import arc_log
+from hale_fee_estimator import GAS_LIMIT_BUFFER
+from hale_preflight import (
+    SimulatedRevert,
+    asimulate,
+    asimulate_many,
+    classify_error,
+    decode_revert,
+    preflight_enabled
+)
+from hale_metrics import STAGE_LATENCY, RPC_ERRORS, SETTLEMENTS, SETTLEMENT_BATCH_SIZE, QUEUE_DEPTH
+
+# Multicall3 aggregate3((address target, bool allowFailure, bytes callData)[])
+MULTICALL3_ABI = [{
+    "inputs": [{"components": [
+        {"internalType": "address", "name": "target", "type": "address"},
+        {"internalType": "bool", "name": "allowFailure", "type": "bool"},
+        {"internalType": "bytes", "name": "callData", "type": "bytes"}],
+        "internalType": "struct Multicall3.Call3[]", "name": "calls", "type": "tuple[]"}],
+    "name": "aggregate3",
+    "outputs": [{"components": [
+        {"internalType": "bool", "name": "success", "type": "bool"},
+        {"internalType": "bytes", "name": "returnData", "type": "bytes"}],
+        "internalType": "struct Multicall3.Result[]", "name": "returnData", "type": "tuple[]"}],
+    "stateMutability": "payable",
+    "type": "function"
+}]
+
+
+@dataclass
+class _Settlement:
+    """One queued release/refund and the future its caller awaits."""
+    action: str
+    seller: str
+    transaction_id: str
+    contract_address: str
+    verdict: Dict[str, Any]
+    future: asyncio.Future
+    call: Any = None
+    signer: Any = None
+    nonce: Optional[int] = None
+    outcome: Dict[str, Any] = field(default_factory=dict)
+
+
+# A broadcast transaction still to be confirmed: the items it settles, its hash and the mode
+_Broadcast = Tuple[List[_Settlement], Any, str]
+
+
+class SettlementBatcher:
+    """Window-based batcher for Arc escrow settlements on top of AsyncHaleOracle."""
+
+    def __init__(self, oracle, window: Optional[float] = None, max_batch: Optional[int] = None,
+                 multicall_address: Optional[str] = None):
+        """
+        Args:
+            oracle: AsyncHaleOracle providing async_web3, signers and the escrow ABI
+            window: Seconds to collect settlements before submitting
+            max_batch: Most settlements per submission
+            multicall_address: aggregate3 forwarder (see module docstring)
+        """
+        self.oracle = oracle
+        self.window = float(window if window is not None else os.getenv('HALE_SETTLEMENT_WINDOW', '0.25'))
+        self.max_batch = max(1, int(max_batch or os.getenv('HALE_SETTLEMENT_MAX_BATCH', '50')))
+        self.multicall_address = multicall_address or os.getenv('SETTLEMENT_MULTICALL_ADDRESS')
+        self._pending: List[_Settlement] = []
+        self._window_task: Optional[asyncio.Task] = None
+        self._tasks = set()
+        # Windows are numbered and broadcast one at a time so locally assigned
+        # nonces never overlap; receipts are awaited outside it
+        self._submit_lock = asyncio.Lock()
+        QUEUE_DEPTH.set_function(lambda: len(self._pending), queue='settlements')
+
+    async def settle(self, verdict: Dict[str, Any], seller_address: str, transaction_id: str,
+                     contract_address: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Queue a settlement for the current window and wait for its outcome.
+
+        Returns:
+            Outcome dict: transaction_id, action, status, tx_hash, via
+            ('pipeline', 'multicall' or 'single') and error when it failed
+        """
+        if verdict.get('verdict') == 'FAIL':
+            action = 'refund'
+        elif verdict.get('release_funds', False):
+            action = 'release'
+        else:
+            arc_log.info("No automated action taken", verdict=verdict.get('verdict'))
+            return {'transaction_id': transaction_id, 'action': None, 'status': 'skipped'}
+
+        w3 = self.oracle.async_web3
+        if not w3:
+            arc_log.warning("No blockchain connection configured")
+            return self._failed(transaction_id, action, 'no blockchain connection')
+        if not self.oracle.signers.arc:
+            arc_log.error("No ORACLE_PRIVATE_KEY found in environment")
+            return self._failed(transaction_id, action, 'no oracle key')
+        contract_address = self.oracle._resolve_escrow_address(contract_address)
+        if not contract_address:
+            return self._failed(transaction_id, action, 'no escrow address')
+
+        item = _Settlement(action, seller_address, transaction_id, contract_address, verdict,
+                           asyncio.get_running_loop().create_future())
+        self._pending.append(item)
+        if len(self._pending) >= self.max_batch:
+            self._submit_pending()
+        elif self._window_task is None:
+            self._window_task = self._spawn(self._close_window())
+        return await item.future
+
+    async def flush(self):
+        """Submit whatever is queued now and wait for every batch in flight (e.g. on shutdown)."""
+        self._submit_pending()
+        while self._tasks:
+            await asyncio.gather(*list(self._tasks), return_exceptions=True)
+
+    def _spawn(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def _close_window(self):
+        await asyncio.sleep(self.window)
+        self._window_task = None
+        self._submit_pending()
+
+    def _submit_pending(self):
+        """Hand everything queued to submission tasks, max_batch items each."""
+        while self._pending:
+            batch, self._pending = self._pending[:self.max_batch], self._pending[self.max_batch:]
+            self._spawn(self._run(batch))
+
+    async def _run(self, batch: List[_Settlement]):
+        try:
+            async with self._submit_lock:
+                broadcast = await self._submit(batch)
+            await self._confirm(broadcast)
+        except Exception as e:
+            arc_log.error("Settlement batch failed", error=str(e), items=len(batch))
+            for item in batch:
+                if not item.outcome:
+                    item.outcome = self._failed(item.transaction_id, item.action, str(e))
+        for item in batch:
+            if not item.future.done():
+                item.future.set_result(item.outcome)
+
+    async def _submit(self, batch: List[_Settlement]) -> List[_Broadcast]:
+        """Number, sign and broadcast the batch; returns what is left to confirm."""
+        SETTLEMENT_BATCH_SIZE.observe(len(batch))
+        arc_log.info("Submitting settlement batch", items=len(batch),
+                     mode='multicall' if self.multicall_address else 'pipeline')
+        w3 = self.oracle.async_web3
+        signers = await asyncio.gather(*(
+            self.oracle.signers.aarc_for(item.transaction_id, item.contract_address, self.oracle._read_escrow_oracle)
+            for item in batch))
+        for item, signer in zip(batch, signers):
+            item.signer = signer
+            contract = w3.eth.contract(address=item.contract_address, abi=self.oracle.escrow_abi)
+            if item.action == 'release':
+                item.call = contract.functions.release(
+                    w3.to_checksum_address(item.seller), w3.keccak(text=item.transaction_id))
+            else:
+                item.call = contract.functions.refund(item.seller, self.oracle._refund_reason(item.verdict))
+
+        if self.multicall_address and len(batch) > 1:
+            retry, broadcast = await self._submit_multicall(batch)
+        else:
+            retry, broadcast = await self._submit_pipeline(batch)
+        return broadcast + await self._send_singles(retry)
+
+    async def _confirm(self, broadcast: List[_Broadcast]):
+        """Await the receipts of a submitted window (outside the submit lock)."""
+        await asyncio.gather(*(self._await_receipt(items, tx_hash, via) for items, tx_hash, via in broadcast))
+        # An aggregate that reverted as a whole settled none of its items
+        reverted = [item for items, _, via in broadcast if via == 'multicall'
+                    for item in items if item.outcome.get('status') == 'reverted']
+        if reverted:
+            async with self._submit_lock:
+                retried = await self._send_singles(reverted)
+            await self._confirm(retried)
+
+    # --- PIPELINE MODE ---
+
+    async def _submit_pipeline(self, batch: List[_Settlement]) -> Tuple[List[_Settlement], List[_Broadcast]]:
+        """Sign the batch with consecutive nonces per signer and broadcast it at once."""
+        fees = await self.oracle.fee_estimator.afee_params()
+        by_signer: Dict[str, List[_Settlement]] = {}
+        for item in batch:
+            by_signer.setdefault(item.signer.address, []).append(item)
+        windows = await asyncio.gather(*(self._submit_signer_window(items[0].signer, items, fees)
+                                         for items in by_signer.values()))
+        return [], [sent for window in windows for sent in window]
+
+    async def _submit_signer_window(self, signer, batch: List[_Settlement],
+                                    fees: Dict[str, int]) -> List[_Broadcast]:
+        """The pipeline for the items one key settles: build, dry-run, number, sign, broadcast."""
+        w3 = self.oracle.async_web3
+        sender = signer.address
+        with STAGE_LATENCY.time(stage='arc_build'):
+            built = await self._build_window(batch, sender, fees)
+            # Dry-run the whole window concurrently; doomed items take no nonce
+            if preflight_enabled() and built:
+                built = await self._preflight_window(built, sender, fees)
+
+        with STAGE_LATENCY.time(stage='arc_sign'):
+            raw_txs = []
+            for item, tx in built:
+                # The key's own sequence, shared with single settlements (see ArcSigner)
+                item.nonce = tx['nonce'] = await signer.anext_nonce(
+                    lambda: w3.eth.get_transaction_count(sender, 'pending'))
+                raw_txs.append(self.oracle._raw_transaction(w3.eth.account.sign_transaction(tx, signer.private_key)))
+        batch = [item for item, _ in built]
+
+        with STAGE_LATENCY.time(stage='arc_send'):
+            sent = await asyncio.gather(*(w3.eth.send_raw_transaction(raw) for raw in raw_txs),
+                                        return_exceptions=True)
+
+        retry, broadcast = [], []
+        for item, result in zip(batch, sent):
+            if isinstance(result, Exception):
+                arc_log.warning("Pipelined settlement not accepted", transaction_id=item.transaction_id,
+                                nonce=item.nonce, error=str(result))
+                RPC_ERRORS.inc(chain='arc', operation=item.action)
+                retry.append(item)
+            else:
+                broadcast.append(([item], result, 'pipeline'))
+
+        # A rejected send leaves a gap that holds back every later nonce: retry
+        # the settlement in its own slot, or plug the slot if that fails too
+        for item in retry:
+            tx_hash = await self._send_single(item, nonce=item.nonce, fees=fees)
+            if tx_hash is None:
+                await self._fill_nonce(signer, item.nonce, fees)
+            else:
+                broadcast.append(([item], tx_hash, 'single'))
+        return broadcast
+
+    async def _build_window(self, batch: List[_Settlement], sender: str, fees: Dict[str, int]) -> list:
+        """(item, tx) for each item whose gas limit could be set; the others are failed."""
+        gas_limits = await asyncio.gather(*(self._gas_limit(item, sender) for item in batch),
+                                          return_exceptions=True)
+        built = []
+        for item, gas in zip(batch, gas_limits):
+            if isinstance(gas, Exception):
+                self._fail(item, gas, via='pipeline')
+                continue
+            tx = await item.call.build_transaction({'from': sender, 'gas': gas, **fees})
+            built.append((item, tx))
+        return built
+
+    async def _preflight_window(self, built: list, sender: str, fees: Dict[str, int],
+                                can_retry: bool = True) -> list:
+        """The (item, tx) pairs whose dry run succeeds; out-of-gas items are rebuilt and tried once more."""
+        sims = await asimulate_many(self.oracle.async_web3, [tx for _, tx in built], self.oracle.escrow_abi,
+                                    [item.action for item, _ in built])
+        passed, rebuild = [], []
+        for (item, tx), sim in zip(built, sims):
+            if not sim.reverted:
+                passed.append((item, tx))
+            elif sim.out_of_gas and can_retry:
+                self.oracle.fee_estimator.invalidate(item.contract_address, item.action)
+                rebuild.append(item)
+            else:
+                self._fail(item, self._simulated_revert(item, sim), via='pipeline')
+        if rebuild:
+            arc_log.warning("Simulation ran out of gas; re-estimating", items=len(rebuild))
+            rebuilt = await self._build_window(rebuild, sender, fees)
+            if rebuilt:
+                passed += await self._preflight_window(rebuilt, sender, fees, can_retry=False)
+        return passed
+
+    async def _fill_nonce(self, signer, nonce: int, fees: Dict[str, int]):
+        """Consume one of signer's nonces with a zero-value self-transfer."""
+        w3 = self.oracle.async_web3
+        try:
+            tx = {'from': signer.address, 'to': signer.address, 'value': 0, 'nonce': nonce,
+                  'gas': 21000, 'chainId': await w3.eth.chain_id, **fees}
+            signed = w3.eth.account.sign_transaction(tx, signer.private_key)
+            await w3.eth.send_raw_transaction(self.oracle._raw_transaction(signed))
+            arc_log.warning("Filled nonce gap left by a failed settlement", signer=signer.address, nonce=nonce)
+        except Exception as e:
+            arc_log.error("Could not fill nonce gap", signer=signer.address, nonce=nonce, error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation='fill_nonce')
+            # The gap stays open; read the next nonce from the node rather than queue behind it
+            signer.resync()
+
+    # --- MULTICALL MODE ---
+
+    async def _submit_multicall(self, batch: List[_Settlement]) -> Tuple[List[_Settlement], List[_Broadcast]]:
+        """Send the batch as one aggregate3 call; returns items to retry singly and the broadcast."""
+        w3 = self.oracle.async_web3
+        signer = await self.oracle.signers.aarc_for(self.multicall_address)
+        sender = signer.address
+        multicall = w3.eth.contract(address=w3.to_checksum_address(self.multicall_address), abi=MULTICALL3_ABI)
+
+        def calls(items):
+            return [(w3.to_checksum_address(i.contract_address), True, i.call._encode_transaction_data())
+                    for i in items]
+
+        # Dry run: keep only sub-calls that would succeed
+        try:
+            results = await multicall.functions.aggregate3(calls(batch)).call({'from': sender})
+        except Exception as e:
+            arc_log.warning("Multicall dry run failed; settling singly", error=str(e))
+            return batch, []
+        included = [item for item, (success, _) in zip(batch, results) if success]
+        retry = []
+        for item, (success, return_data) in zip(batch, results):
+            if not success:
+                arc_log.warning("Settlement fails inside multicall", transaction_id=item.transaction_id,
+                                reason=decode_revert(return_data, self.oracle.escrow_abi))
+                retry.append(item)
+        if not included:
+            return retry, []
+
+        nonce = None
+        try:
+            call = multicall.functions.aggregate3(calls(included))
+            with STAGE_LATENCY.time(stage='arc_build'):
+                # Aggregate gas depends on the window, so it is estimated every time
+                fees, estimate = await asyncio.gather(
+                    self.oracle.fee_estimator.afee_params(),
+                    call.estimate_gas({'from': sender})
+                )
+                tx = await call.build_transaction({
+                    'from': sender, 'gas': int(estimate * GAS_LIMIT_BUFFER), **fees})
+                nonce = tx['nonce'] = await signer.anext_nonce(
+                    lambda: w3.eth.get_transaction_count(sender, 'pending'))
+            with STAGE_LATENCY.time(stage='arc_sign'):
+                raw_tx = self.oracle._raw_transaction(w3.eth.account.sign_transaction(tx, signer.private_key))
+            with STAGE_LATENCY.time(stage='arc_send'):
+                tx_hash = await w3.eth.send_raw_transaction(raw_tx)
+        except Exception as e:
+            if nonce is not None:
+                signer.resync()
+            arc_log.warning("Multicall settlement not accepted; settling singly", error=str(e))
+            RPC_ERRORS.inc(chain='arc', operation='multicall')
+            return batch, []
+
+        arc_log.info("Multicall settlement submitted", tx_hash=w3.to_hex(tx_hash), items=len(included))
+        return retry, [(included, tx_hash, 'multicall')]
+
+    # --- SHARED ---
+
+    async def _send_singles(self, items: List[_Settlement]) -> List[_Broadcast]:
+        """Single-transaction fallback, one at a time so each gets a fresh nonce."""
+        broadcast = []
+        for item in items:
+            tx_hash = await self._send_single(item)
+            if tx_hash is not None:
+                broadcast.append(([item], tx_hash, 'single'))
+        return broadcast
+
+    async def _send_single(self, item: _Settlement, nonce: Optional[int] = None,
+                           fees: Optional[Dict[str, int]] = None):
+        """
+        Broadcast one item from its signer; returns the tx hash, or None with
+        item.outcome set to the error. nonce reuses a slot already taken from
+        the signer's sequence; otherwise the next one is taken after the dry run.
+        """
+        w3 = self.oracle.async_web3
+        signer = item.signer
+        sender = signer.address
+        own_nonce = False
+        try:
+            with STAGE_LATENCY.time(stage='arc_build'):
+                if fees is None:
+                    fees = await self.oracle.fee_estimator.afee_params()
+                for can_retry in (True, False):
+                    gas = await self._gas_limit(item, sender)
+                    tx = await item.call.build_transaction({'from': sender, 'gas': gas, **fees})
+                    if not preflight_enabled():
+                        break
+                    sim = await asimulate(w3, tx, self.oracle.escrow_abi, item.action)
+                    if not sim.reverted:
+                        break
+                    if not (sim.out_of_gas and can_retry):
+                        raise self._simulated_revert(item, sim)
+                    # Ran out of gas: estimate afresh and build once more
+                    self.oracle.fee_estimator.invalidate(item.contract_address, item.action)
+                if nonce is None:
+                    own_nonce = True
+                    nonce = await signer.anext_nonce(lambda: w3.eth.get_transaction_count(sender, 'pending'))
+                tx['nonce'] = nonce
+            with STAGE_LATENCY.time(stage='arc_sign'):
+                raw_tx = self.oracle._raw_transaction(w3.eth.account.sign_transaction(tx, signer.private_key))
+            with STAGE_LATENCY.time(stage='arc_send'):
+                return await w3.eth.send_raw_transaction(raw_tx)
+        except Exception as e:
+            if own_nonce:
+                signer.resync()
+            self._fail(item, e, via='single')
+            return None
+
+    def _fail(self, item: _Settlement, error: Exception, via: str):
+        if isinstance(error, SimulatedRevert):
+            arc_log.error("Not sending settlement: simulation reverted", action=item.action,
+                          transaction_id=item.transaction_id, reason=str(error))
+            status = 'simulated_revert'
+        else:
+            arc_log.error("Transaction error", action=item.action, transaction_id=item.transaction_id, error=str(error))
+            RPC_ERRORS.inc(chain='arc', operation=item.action)
+            status = 'error'
+        SETTLEMENTS.inc(action=item.action, outcome=status)
+        item.outcome = self._failed(item.transaction_id, item.action, str(error), via=via, status=status)
+
+    def _simulated_revert(self, item: _Settlement, sim) -> SimulatedRevert:
+        if sim.out_of_gas:
+            self.oracle.fee_estimator.invalidate(item.contract_address, item.action)
+        return SimulatedRevert(sim)
+
+    async def _await_receipt(self, items: List[_Settlement], tx_hash, via: str):
+        timeout = 60 if via == 'multicall' or items[0].action == 'refund' else 30
+        status = await self._receipt_status(tx_hash, timeout)
+        for item in items:
+            self._record(item, status, tx_hash, via)
+
+    async def _receipt_status(self, tx_hash, timeout: int) -> str:
+        """confirmed, reverted or error; submitted when receipts are skipped (serverless)."""
+        if os.getenv('VERCEL') == '1' or os.getenv('SKIP_TX_WAIT') == '1':
+            return 'submitted'
+        try:
+            with STAGE_LATENCY.time(stage='arc_receipt_wait'):
+                receipt = await self.oracle.async_web3.eth.wait_for_transaction_receipt(tx_hash, timeout=timeout)
+        except Exception as e:
+            arc_log.error("Receipt wait failed", tx_hash=self.oracle.async_web3.to_hex(tx_hash), error=str(e))
+            return 'error'
+        return 'confirmed' if receipt['status'] == 1 else 'reverted'
+
+    def _record(self, item: _Settlement, status: str, tx_hash, via: str):
+        tx_hex = self.oracle.async_web3.to_hex(tx_hash)
+        if status == 'reverted':
+            arc_log.error("Transaction failed on-chain", action=item.action, tx_hash=tx_hex,
+                          transaction_id=item.transaction_id)
+            self.oracle.fee_estimator.invalidate(item.contract_address, item.action)
+        else:
+            arc_log.info("Settlement " + status, action=item.action, tx_hash=tx_hex,
+                         transaction_id=item.transaction_id, via=via)
+        SETTLEMENTS.inc(action=item.action, outcome=status)
+        item.outcome = {'transaction_id': item.transaction_id, 'action': item.action,
+                        'status': status, 'tx_hash': tx_hex, 'via': via}
+
+    async def _gas_limit(self, item: _Settlement, sender: str) -> int:
+        """Cached gas limit for the item's escrow method; raises SimulatedRevert if estimation reverts."""
+        try:
+            return await self.oracle.fee_estimator.agas_limit(
+                item.contract_address, item.action, lambda: item.call.estimate_gas({'from': sender}))
+        except Exception as e:
+            sim = classify_error(e, self.oracle.escrow_abi)
+            arc_log.warning("Gas estimation failed; not sending", action=item.action,
+                            transaction_id=item.transaction_id, reason=sim.reason or sim.error)
+            RPC_ERRORS.inc(chain='arc', operation='estimate_gas')
+            if sim.reverted:
+                raise SimulatedRevert(sim) from e
+            raise
+
+    @staticmethod
+    def _failed(transaction_id: str, action: str, error: str, via: Optional[str] = None,
+                status: str = 'error') -> Dict[str, Any]:
+        return {'transaction_id': transaction_id, 'action': action, 'status': status,
+                'tx_hash': None, 'via': via, 'error': error}
+
+
+def settlement_succeeded(outcome: Dict[str, Any]) -> bool:
+    """Whether an outcome counts as settled (or needing no settlement)."""
+    return outcome.get('status') in ('confirmed', 'submitted', 'skipped')
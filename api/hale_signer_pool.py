@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+HALE Signer Pool
+Several Solana keypairs and Arc oracle keys, with deliveries sharded across
+them instead of queueing on one authority and one nonce sequence.
+
+Each transaction_id maps to its signers by rendezvous hashing: every signer
+scores sha256(signer || transaction_id) and the highest score wins. The
+mapping is stable across processes, so an attestation's PDA (seeded by its
+authority) can always be found again, and adding a signer moves only the
+~1/N of transaction ids the new signer wins.
+
+Solana: the chosen keypair is the attestation authority and fee payer for
+both init and seal. The first keypair is the one the oracle has always
+loaded (solana-keypair.json / SOLANA_KEYPAIR), so with no extra keypairs
+nothing changes.
+
+Arc: an escrow only accepts the single oracle address it was created with,
+so when more than one key is configured the escrow's oracle() is read once
+and the matching key signs. Otherwise the rendezvous choice is used,
+passing over keys whose balance is below the alert threshold. Nonces are
+assigned locally per key (seeded from the pending count, resynced after a
+failure) so concurrent settlements from one key no longer race for the same
+nonce.
+
+Balances of every signer are read by refresh_balances() (one
+getMultipleAccounts for Solana), exported as hale_signer_balance and
+logged as a warning when below the thresholds.
+
+Environment:
+    HALE_SOLANA_KEYPAIRS          Comma-separated keypair JSON files added after the primary keypair
+    HALE_ORACLE_PRIVATE_KEYS      Comma-separated Arc private keys added after ORACLE_PRIVATE_KEY
+    HALE_SOLANA_MIN_BALANCE       Low-balance alert threshold in lamports (default 50000000)
+    HALE_ARC_MIN_BALANCE          Low-balance alert threshold in wei (default 100000000000000000)
+    HALE_SIGNER_BALANCE_INTERVAL  Seconds between balance checks by the monitor thread (default 60)
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+from typing import Dict, Any, List, Optional, Callable, Awaitable
+
+from solders.keypair import Keypair
+
+from hale_logging import get_logger
+from hale_metrics import RPC_ERRORS, SIGNER_BALANCE
+
+log = get_logger('signers')
+
+
+def _score(signer_id: bytes, transaction_id: str) -> bytes:
+    return hashlib.sha256(signer_id + transaction_id.encode()).digest()
+
+
+def _rank(signers: list, transaction_id: str) -> list:
+    """signers ordered by rendezvous score for transaction_id, best first."""
+    if len(signers) < 2:
+        return list(signers)
+    return sorted(signers, key=lambda s: _score(s.id, transaction_id), reverse=True)
+
+
+def _split(value: Optional[str]) -> List[str]:
+    return [part.strip() for part in (value or '').split(',') if part.strip()]
+
+
+class SolanaSigner:
+    __slots__ = ('keypair', 'pubkey', 'id', 'balance')
+
+    def __init__(self, keypair: Keypair):
+        self.keypair = keypair
+        self.pubkey = keypair.pubkey()
+        self.id = bytes(self.pubkey)
+        self.balance: Optional[int] = None
+
+
+class ArcSigner:
+    """An Arc oracle key with a locally assigned nonce sequence."""
+
+    __slots__ = ('private_key', 'address', 'id', 'balance', '_nonce', '_lock')
+
+    def __init__(self, private_key: str):
+        from eth_account import Account
+        self.private_key = private_key
+        self.address = Account.from_key(private_key).address
+        self.id = bytes.fromhex(self.address[2:])
+        self.balance: Optional[int] = None
+        self._nonce: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _take(self) -> Optional[int]:
+        with self._lock:
+            if self._nonce is None:
+                return None
+            nonce = self._nonce
+            self._nonce += 1
+            return nonce
+
+    def _seed(self, chain_nonce: int) -> int:
+        with self._lock:
+            # Another caller may have seeded while this one was fetching
+            if self._nonce is None or chain_nonce > self._nonce:
+                self._nonce = chain_nonce
+            nonce = self._nonce
+            self._nonce += 1
+            return nonce
+
+    def next_nonce(self, fetch: Callable[[], int]) -> int:
+        """Next nonce for this key; fetch() returns the pending transaction count."""
+        nonce = self._take()
+        return nonce if nonce is not None else self._seed(fetch())
+
+    async def anext_nonce(self, fetch: Callable[[], Awaitable[int]]) -> int:
+        """next_nonce with an async fetch."""
+        nonce = self._take()
+        return nonce if nonce is not None else self._seed(await fetch())
+
+    def resync(self):
+        """Forget the local sequence (after a failed send) so the next nonce is read from the node."""
+        with self._lock:
+            self._nonce = None
+
+
+class SignerPool:
+    """Rendezvous-sharded Solana and Arc signers with balance tracking."""
+
+    def __init__(self, solana_keypairs: List[Keypair], arc_keys: List[str],
+                 solana_min_balance: Optional[int] = None, arc_min_balance: Optional[int] = None):
+        self.solana = [SolanaSigner(kp) for kp in solana_keypairs]
+        self._arc_keys = list(arc_keys)
+        self._arc: Optional[List[ArcSigner]] = None
+        self._solana_by_pubkey = {s.pubkey: s for s in self.solana}
+        self._arc_by_address: Dict[str, ArcSigner] = {}
+        self.solana_min_balance = int(solana_min_balance if solana_min_balance is not None
+                                      else os.getenv('HALE_SOLANA_MIN_BALANCE', '50000000'))
+        self.arc_min_balance = int(arc_min_balance if arc_min_balance is not None
+                                   else os.getenv('HALE_ARC_MIN_BALANCE', '100000000000000000'))
+        # escrow address -> its oracle() (lowercased), read once per escrow
+        self._escrow_oracles: Dict[str, Optional[str]] = {}
+        self._monitor: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+    @property
+    def arc(self) -> List[ArcSigner]:
+        """Arc signers, built on first use (eth_account is only imported when settling)."""
+        if self._arc is None:
+            with self._lock:
+                # One ArcSigner per key, or two would hand out the same nonces
+                if self._arc is None:
+                    signers = [ArcSigner(key) for key in self._arc_keys]
+                    self._arc_by_address = {s.address.lower(): s for s in signers}
+                    self._arc = signers
+        return self._arc
+
+    @classmethod
+    def from_env(cls, primary_keypair: Optional[Keypair], primary_arc_key: Optional[str]) -> 'SignerPool':
+        """The oracle's primary keys followed by HALE_SOLANA_KEYPAIRS / HALE_ORACLE_PRIVATE_KEYS."""
+        keypairs = [primary_keypair] if primary_keypair else []
+        for path in _split(os.getenv('HALE_SOLANA_KEYPAIRS')):
+            try:
+                with open(path, 'r') as f:
+                    keypair = Keypair.from_bytes(bytes(json.load(f)))
+            except Exception as e:
+                log.error("Error loading signer keypair", path=path, error=str(e))
+                continue
+            if all(keypair.pubkey() != kp.pubkey() for kp in keypairs):
+                keypairs.append(keypair)
+
+        arc_keys = [primary_arc_key] if primary_arc_key else []
+        for key in _split(os.getenv('HALE_ORACLE_PRIVATE_KEYS')):
+            if key not in arc_keys:
+                arc_keys.append(key)
+
+        pool = cls(keypairs, arc_keys)
+        if len(keypairs) > 1 or len(arc_keys) > 1:
+            log.info("Signer pool loaded", solana=len(keypairs), arc=len(arc_keys))
+        return pool
+
+    # --- SOLANA ---
+
+    def solana_for(self, transaction_id: str) -> Optional[Keypair]:
+        """The keypair that authorizes (and pays for) transaction_id's attestation."""
+        ranked = _rank(self.solana, transaction_id)
+        return ranked[0].keypair if ranked else None
+
+    def solana_keypair(self, pubkey) -> Optional[Keypair]:
+        signer = self._solana_by_pubkey.get(pubkey)
+        return signer.keypair if signer else None
+
+    # --- ARC ---
+
+    def _arc_choice(self, transaction_id: str, escrow_oracle: Optional[str]) -> Optional[ArcSigner]:
+        if escrow_oracle:
+            signer = self._arc_by_address.get(escrow_oracle)
+            if signer is not None:
+                return signer
+        ranked = _rank(self.arc, transaction_id)
+        for signer in ranked:
+            if signer.balance is None or signer.balance >= self.arc_min_balance:
+                return signer
+        # Every key is low: the best-ranked one still gets to try
+        return ranked[0] if ranked else None
+
+    def arc_for(self, transaction_id: str, escrow: Optional[str] = None,
+                read_oracle: Optional[Callable[[str], str]] = None) -> Optional[ArcSigner]:
+        """
+        The key that settles transaction_id against escrow. read_oracle(escrow)
+        returns the escrow's oracle address; it is only called (once per
+        escrow) when more than one key is configured.
+        """
+        oracle = None
+        if len(self.arc) > 1 and escrow and read_oracle is not None:
+            key = escrow.lower()
+            if key not in self._escrow_oracles:
+                try:
+                    self._escrow_oracles[key] = read_oracle(escrow).lower()
+                except Exception as e:
+                    log.warning("Could not read escrow oracle", escrow=escrow, error=str(e))
+                    RPC_ERRORS.inc(chain='arc', operation='escrow_oracle')
+                    return self._arc_choice(transaction_id, None)
+            oracle = self._escrow_oracles[key]
+        return self._arc_choice(transaction_id, oracle)
+
+    async def aarc_for(self, transaction_id: str, escrow: Optional[str] = None,
+                       read_oracle: Optional[Callable[[str], Awaitable[str]]] = None) -> Optional[ArcSigner]:
+        """arc_for with an async read_oracle."""
+        oracle = None
+        if len(self.arc) > 1 and escrow and read_oracle is not None:
+            key = escrow.lower()
+            if key not in self._escrow_oracles:
+                try:
+                    self._escrow_oracles[key] = (await read_oracle(escrow)).lower()
+                except Exception as e:
+                    log.warning("Could not read escrow oracle", escrow=escrow, error=str(e))
+                    RPC_ERRORS.inc(chain='arc', operation='escrow_oracle')
+                    return self._arc_choice(transaction_id, None)
+            oracle = self._escrow_oracles[key]
+        return self._arc_choice(transaction_id, oracle)
+
+    # --- BALANCES ---
+
+    def _record_balance(self, chain: str, signer, name: str, balance: int, threshold: int):
+        was_low = signer.balance is not None and signer.balance < threshold
+        signer.balance = balance
+        SIGNER_BALANCE.set(balance, chain=chain, signer=name)
+        if balance < threshold:
+            # Warn on every check while low, so the alert keeps firing until topped up
+            log.warning("Signer balance low", chain=chain, signer=name, balance=balance, threshold=threshold)
+        elif was_low:
+            log.info("Signer balance restored", chain=chain, signer=name, balance=balance)
+
+    def refresh_balances(self, solana_client=None, web3=None) -> Dict[str, Any]:
+        """Read every signer's balance; returns status()."""
+        if solana_client is not None and self.solana:
+            try:
+                accounts = solana_client.get_multiple_accounts([s.pubkey for s in self.solana]).value
+                for signer, account in zip(self.solana, accounts):
+                    self._record_balance('solana', signer, str(signer.pubkey),
+                                         account.lamports if account is not None else 0,
+                                         self.solana_min_balance)
+            except Exception as e:
+                log.warning("Solana signer balance check failed", error=str(e))
+                RPC_ERRORS.inc(chain='solana', operation='signer_balances')
+        if web3 is not None:
+            for signer in self.arc:
+                try:
+                    self._record_balance('arc', signer, signer.address,
+                                         web3.eth.get_balance(signer.address), self.arc_min_balance)
+                except Exception as e:
+                    log.warning("Arc signer balance check failed", signer=signer.address, error=str(e))
+                    RPC_ERRORS.inc(chain='arc', operation='signer_balances')
+        return self.status()
+
+    def start_monitor(self, get_solana_client: Callable[[], Any], get_web3: Callable[[], Any],
+                      interval: Optional[float] = None):
+        """
+        Check balances on a daemon thread every HALE_SIGNER_BALANCE_INTERVAL
+        seconds. The clients are resolved on that thread, so starting the
+        monitor does not open RPC connections on the caller's (cold) path.
+        """
+        interval = float(interval or os.getenv('HALE_SIGNER_BALANCE_INTERVAL', '60'))
+        with self._lock:
+            if self._monitor is not None:
+                return
+
+            def run():
+                while True:
+                    try:
+                        self.refresh_balances(get_solana_client(), get_web3())
+                    except Exception as e:
+                        log.warning("Signer balance check failed", error=str(e))
+                    time.sleep(interval)
+
+            self._monitor = threading.Thread(target=run, name='hale-signer-balances', daemon=True)
+            self._monitor.start()
+
+    def status(self) -> Dict[str, Any]:
+        return {
+            'solana': [{'pubkey': str(s.pubkey), 'balance': s.balance,
+                        'low': s.balance is not None and s.balance < self.solana_min_balance}
+                       for s in self.solana],
+            'arc': [{'address': s.address, 'balance': s.balance,
+                     'low': s.balance is not None and s.balance < self.arc_min_balance}
+                    for s in self.arc],
+        }
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+HALE Solana Confirmation Service
+Confirms outstanding Solana transactions in batches instead of polling each
+signature from its own caller.
+
+Senders hand over the signature, the signed transaction and its blockhash's
+lastValidBlockHeight, and get a future. A single background thread wakes
+every tick, checks up to 256 signatures per getSignatureStatuses call (one
+call per 256 in flight, however many deliveries are running) and resolves
+each future once its transaction reaches the configured commitment, or
+fails it if the transaction errored.
+
+A transaction that is still unconfirmed after HALE_CONFIRM_RESEND_INTERVAL
+is re-sent (same signature, so at most one lands) until its blockhash
+expires; after that the future fails with TransactionExpired so the caller
+can rebuild it with a fresh blockhash. Entries past HALE_CONFIRM_TIMEOUT
+fail even while status calls keep failing, and waiters stop waiting shortly
+after it regardless of the poller.
+
+Environment:
+    HALE_SOLANA_COMMITMENT         processed, confirmed or finalized (default confirmed)
+    HALE_CONFIRM_TICK              Seconds between status checks (default 0.25)
+    HALE_CONFIRM_RESEND_INTERVAL   Seconds before an unconfirmed transaction is re-sent (default 2)
+    HALE_CONFIRM_TIMEOUT           Seconds a waiter gives up after (default 60)
+"""
+
+import os
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from typing import Dict, Optional, List
+
+from hale_logging import get_logger
+from hale_metrics import QUEUE_DEPTH, RPC_ERRORS, SOLANA_CONFIRMATIONS, SOLANA_RESENDS
+
+log = get_logger('solana.confirm')
+
+# getSignatureStatuses accepts at most this many signatures per call
+MAX_SIGNATURES_PER_CALL = 256
+
+COMMITMENT_LEVELS = {'processed': 0, 'confirmed': 1, 'finalized': 2}
+
+
+class ConfirmationError(Exception):
+    """The transaction landed with an error, or could not be confirmed."""
+
+
+class TransactionExpired(ConfirmationError):
+    """The transaction's blockhash expired before it was confirmed."""
+
+
+class _Outstanding:
+    __slots__ = ('signature', 'raw_tx', 'last_valid_block_height', 'future', 'sent_at', 'deadline', 'resends')
+
+    def __init__(self, signature, raw_tx: bytes, last_valid_block_height: Optional[int], timeout: float):
+        self.signature = signature
+        self.raw_tx = raw_tx
+        self.last_valid_block_height = last_valid_block_height
+        self.future: Future = Future()
+        self.sent_at = time.time()
+        self.deadline = self.sent_at + timeout
+        self.resends = 0
+
+
+def _level(status) -> int:
+    """Commitment level a TransactionStatus has reached."""
+    confirmation = getattr(status, 'confirmation_status', None)
+    if confirmation is None:
+        # Nodes that omit confirmationStatus report confirmations=None once rooted
+        return COMMITMENT_LEVELS['finalized'] if status.confirmations is None else COMMITMENT_LEVELS['confirmed']
+    return COMMITMENT_LEVELS.get(str(confirmation).rsplit('.', 1)[-1].lower(), 0)
+
+
+class SignatureConfirmer:
+    """Batched getSignatureStatuses poller with blockhash-aware re-sending."""
+
+    def __init__(self, client, commitment: Optional[str] = None, tick: Optional[float] = None,
+                 resend_interval: Optional[float] = None, timeout: Optional[float] = None):
+        # A SolanaRpcPool (or any solana-py Client)
+        self.client = client
+        self.commitment = (commitment or os.getenv('HALE_SOLANA_COMMITMENT', 'confirmed')).lower()
+        self.required_level = COMMITMENT_LEVELS.get(self.commitment, COMMITMENT_LEVELS['confirmed'])
+        self.tick = float(tick or os.getenv('HALE_CONFIRM_TICK', '0.25'))
+        self.resend_interval = float(resend_interval or os.getenv('HALE_CONFIRM_RESEND_INTERVAL', '2'))
+        self.timeout = float(timeout or os.getenv('HALE_CONFIRM_TIMEOUT', '60'))
+        self._cond = threading.Condition()
+        self._outstanding: Dict[str, _Outstanding] = {}
+        self._thread: Optional[threading.Thread] = None
+        QUEUE_DEPTH.set_function(lambda: len(self._outstanding), queue='solana_confirmations')
+
+    # --- WAITERS ---
+
+    def submit(self, signature, raw_tx: bytes, last_valid_block_height: Optional[int] = None) -> Future:
+        """Track a sent transaction; the future resolves to the slot it was confirmed in."""
+        key = str(signature)
+        with self._cond:
+            entry = self._outstanding.get(key)
+            if entry is None:
+                entry = self._outstanding[key] = _Outstanding(
+                    signature, raw_tx, last_valid_block_height, self.timeout)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='hale-solana-confirm', daemon=True)
+                self._thread.start()
+            self._cond.notify()
+        return entry.future
+
+    def _wait_timeout(self) -> float:
+        # A few ticks past the poller's own deadline, so it normally reports first
+        return self.timeout + 4 * self.tick
+
+    def wait(self, signature, raw_tx: bytes, last_valid_block_height: Optional[int] = None) -> int:
+        """Block until the transaction is confirmed; raises ConfirmationError otherwise."""
+        future = self.submit(signature, raw_tx, last_valid_block_height)
+        try:
+            return future.result(timeout=self._wait_timeout())
+        except FutureTimeout:
+            raise ConfirmationError(f"Not confirmed within {self.timeout:.0f}s") from None
+
+    async def await_confirmation(self, signature, raw_tx: bytes,
+                                 last_valid_block_height: Optional[int] = None) -> int:
+        """wait() for event loops."""
+        future = asyncio.wrap_future(self.submit(signature, raw_tx, last_valid_block_height))
+        try:
+            # Shielded: a timed-out waiter must not cancel the poller's future
+            return await asyncio.wait_for(asyncio.shield(future), self._wait_timeout())
+        except asyncio.TimeoutError:
+            raise ConfirmationError(f"Not confirmed within {self.timeout:.0f}s") from None
+
+    def track(self, signature, raw_tx: bytes, last_valid_block_height: Optional[int] = None):
+        """Confirm (and re-send) in the background without a waiter; failures are logged."""
+        def done(future: Future):
+            error = future.exception()
+            if error is not None:
+                log.error("Unconfirmed Solana transaction", signature=str(signature), error=str(error))
+        self.submit(signature, raw_tx, last_valid_block_height).add_done_callback(done)
+
+    # --- POLLER ---
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._outstanding:
+                    self._cond.wait()
+            # Let signatures sent around the same time share the next status call
+            time.sleep(self.tick)
+            with self._cond:
+                entries = list(self._outstanding.values())
+            try:
+                self._check(entries)
+            except Exception as e:
+                log.warning("Signature status check failed", error=str(e), outstanding=len(entries))
+                RPC_ERRORS.inc(chain='solana', operation='get_signature_statuses')
+                # _check never reached its deadline test; an unreachable RPC must not hold waiters forever
+                self._expire_overdue(entries)
+
+    def _expire_overdue(self, entries: List[_Outstanding]):
+        now = time.time()
+        for entry in entries:
+            if now >= entry.deadline and not entry.future.done():
+                self._finish(entry, 'timeout', error=ConfirmationError(
+                    f"Not confirmed within {self.timeout:.0f}s"))
+
+    def _finish(self, entry: _Outstanding, outcome: str, slot: Optional[int] = None,
+                error: Optional[Exception] = None):
+        with self._cond:
+            self._outstanding.pop(str(entry.signature), None)
+        SOLANA_CONFIRMATIONS.inc(outcome=outcome)
+        if error is not None:
+            entry.future.set_exception(error)
+        else:
+            entry.future.set_result(slot)
+
+    def _check(self, entries: List[_Outstanding]):
+        unconfirmed = []
+        for start in range(0, len(entries), MAX_SIGNATURES_PER_CALL):
+            chunk = entries[start:start + MAX_SIGNATURES_PER_CALL]
+            statuses = self.client.get_signature_statuses([e.signature for e in chunk]).value
+            for entry, status in zip(chunk, statuses):
+                if status is not None and status.err is not None:
+                    self._finish(entry, 'failed', error=ConfirmationError(f"Transaction failed: {status.err}"))
+                elif status is not None and _level(status) >= self.required_level:
+                    self._finish(entry, 'confirmed', slot=status.slot)
+                else:
+                    unconfirmed.append(entry)
+        if not unconfirmed:
+            return
+
+        now = time.time()
+        due = [e for e in unconfirmed if now - e.sent_at >= self.resend_interval or now >= e.deadline]
+        if not due:
+            return
+        # One block height read decides expiry for every re-send candidate
+        height = self.client.get_block_height().value
+        for entry in due:
+            if entry.last_valid_block_height is not None and height > entry.last_valid_block_height:
+                self._finish(entry, 'expired', error=TransactionExpired(
+                    f"Blockhash expired at height {entry.last_valid_block_height} (now {height})"))
+            elif now >= entry.deadline:
+                self._finish(entry, 'timeout', error=ConfirmationError(
+                    f"Not confirmed within {self.timeout:.0f}s"))
+            else:
+                self._resend(entry, now)
+
+    def _resend(self, entry: _Outstanding, now: float):
+        from solana.rpc.types import TxOpts
+        try:
+            self.client.send_raw_transaction(entry.raw_tx, opts=TxOpts(skip_preflight=True))
+            entry.resends += 1
+            SOLANA_RESENDS.inc()
+            log.debug("Re-sent unconfirmed transaction", signature=str(entry.signature), resends=entry.resends)
+        except Exception as e:
+            log.warning("Re-send failed", signature=str(entry.signature), error=str(e))
+            RPC_ERRORS.inc(chain='solana', operation='resend_transaction')
+        entry.sent_at = now
+
+
+_confirmers: Dict[int, SignatureConfirmer] = {}
+_confirmers_lock = threading.Lock()
+
+
+def get_confirmer(client) -> SignatureConfirmer:
+    """Process-wide confirmer for a Solana client or pool."""
+    with _confirmers_lock:
+        confirmer = _confirmers.get(id(client))
+        if confirmer is None:
+            confirmer = _confirmers[id(client)] = SignatureConfirmer(client)
+    return confirmer
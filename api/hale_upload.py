@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+HALE Delivery Uploads
+Streaming, size-bounded receipt of delivery bodies for
+POST /api/deliveries/upload.
+
+submit-delivery and verify take the body inside a JSON document, so it is
+buffered as raw bytes, then as a str, then inside the parsed dict, with no
+size limit. Here the request stream is read in CHUNK_SIZE pieces and each
+piece is, in one pass:
+
+    decompressed    Content-Encoding gzip or deflate (optional)
+    demultiplexed   multipart/form-data: the 'delivery' file part; other parts are form fields
+    checked         running size against HALE_UPLOAD_MAX_BYTES, UTF-8 validity
+    hashed          SHA-256, the blob store key
+    spooled         into a SpooledTemporaryFile (memory up to HALE_UPLOAD_SPOOL_BYTES, then disk)
+
+A body of any other content type is the delivery itself, with its fields
+in the query string. A declared Content-Length over the limit is rejected
+before anything is read. Anything that grows past the limit while it is
+being read or decompressed is rejected as soon as it does, so a small
+compressed bomb never expands in memory.
+
+The finished upload is moved into the blob store (hale_blob_store) and the
+pipeline gets its hash as process_delivery(body_hash=...), not a string.
+
+Environment:
+    HALE_UPLOAD_MAX_BYTES     Largest delivery body accepted, after decompression (default 10485760)
+    HALE_UPLOAD_SPOOL_BYTES   Body size kept in memory before spooling to disk (default 1048576)
+"""
+
+import os
+import zlib
+import codecs
+import hashlib
+import tempfile
+from typing import Dict, Optional, BinaryIO
+
+from hale_logging import get_logger
+
+log = get_logger('uploads')
+
+CHUNK_SIZE = 64 * 1024
+DELIVERY_FIELD = 'delivery'
+# Multipart framing and form fields on top of the delivery body
+FORM_OVERHEAD_BYTES = 64 * 1024
+
+# zlib wbits: gzip container / zlib or raw deflate
+_WBITS = {'gzip': 31, 'x-gzip': 31, 'deflate': 15}
+
+
+class UploadError(Exception):
+    """The upload was rejected; status is the HTTP status to answer with."""
+    status = 400
+
+
+class UploadTooLarge(UploadError):
+    status = 413
+
+
+def max_upload_bytes() -> int:
+    return int(os.getenv('HALE_UPLOAD_MAX_BYTES', str(10 * 1024 * 1024)))
+
+
+class DeliveryUpload:
+    """A received delivery body: spooled file, size and SHA-256, plus any form fields."""
+
+    def __init__(self, max_bytes: Optional[int] = None, spool_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or max_upload_bytes()
+        self.file = tempfile.SpooledTemporaryFile(
+            max_size=int(spool_bytes or os.getenv('HALE_UPLOAD_SPOOL_BYTES', str(1024 * 1024))))
+        self.size = 0
+        self.fields: Dict[str, str] = {}
+        self._sha256 = hashlib.sha256()
+        self._utf8 = codecs.getincrementaldecoder('utf-8')()
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self.size > self.max_bytes:
+            raise UploadTooLarge(f"Delivery exceeds {self.max_bytes} bytes")
+        try:
+            # Validates only; the decoded text is dropped
+            self._utf8.decode(data)
+        except UnicodeDecodeError:
+            raise UploadError("Delivery must be UTF-8 text")
+        self._sha256.update(data)
+        self.file.write(data)
+
+    def finish(self) -> 'DeliveryUpload':
+        try:
+            self._utf8.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise UploadError("Delivery must be UTF-8 text")
+        if not self.size:
+            raise UploadError("Empty delivery")
+        self.file.seek(0)
+        return self
+
+    @property
+    def digest(self) -> str:
+        return self._sha256.hexdigest()
+
+    @property
+    def spooled_to_disk(self) -> bool:
+        return bool(getattr(self.file, '_rolled', False))
+
+    def store(self, blobs) -> str:
+        """Move the body into a BlobStore (one reference, the caller's to release); returns its hash."""
+        self.file.seek(0)
+        return blobs.put_file(self.file, self.digest)
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+        return False
+
+
+def _decoded_chunks(stream: BinaryIO, content_encoding: Optional[str], limit: int):
+    """Request body chunks, decompressed; raises once more than limit bytes have come out."""
+    encoding = (content_encoding or 'identity').strip().lower()
+    if encoding not in ('identity', '') and encoding not in _WBITS:
+        raise UploadError(f"Unsupported Content-Encoding: {content_encoding}")
+    decompressor = zlib.decompressobj(_WBITS[encoding]) if encoding in _WBITS else None
+    produced = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        if decompressor is None:
+            produced += len(chunk)
+            yield chunk
+        else:
+            data = chunk
+            while data:
+                try:
+                    # max_length caps what one compressed chunk may expand to
+                    out = decompressor.decompress(data, CHUNK_SIZE)
+                except zlib.error as e:
+                    raise UploadError(f"Corrupt {encoding} body: {e}")
+                data = decompressor.unconsumed_tail
+                produced += len(out)
+                if produced > limit:
+                    raise UploadTooLarge(f"Request body expands past {limit} bytes")
+                yield out
+        if produced > limit:
+            raise UploadTooLarge(f"Request body exceeds {limit} bytes")
+    if decompressor is not None:
+        out = decompressor.flush()
+        if produced + len(out) > limit:
+            raise UploadTooLarge(f"Request body expands past {limit} bytes")
+        if out:
+            yield out
+        if not decompressor.eof:
+            raise UploadError(f"Truncated {encoding} body")
+
+
+def receive_upload(stream: BinaryIO, content_type: Optional[str] = None,
+                   content_encoding: Optional[str] = None, content_length: Optional[int] = None,
+                   max_bytes: Optional[int] = None) -> DeliveryUpload:
+    """
+    Stream a request body into a DeliveryUpload.
+
+    Raises:
+        UploadTooLarge: Declared or actual size is over the limit
+        UploadError: Malformed body, missing delivery part or non-UTF-8 content
+    """
+    upload = DeliveryUpload(max_bytes)
+    mimetype = (content_type or '').split(';')[0].strip().lower()
+    multipart = mimetype == 'multipart/form-data'
+    limit = upload.max_bytes + (FORM_OVERHEAD_BYTES if multipart else 0)
+    # The declared length bounds the wire size; decompressed size is checked as it expands
+    if content_length is not None and content_length > limit:
+        upload.close()
+        raise UploadTooLarge(f"Delivery exceeds {upload.max_bytes} bytes")
+    try:
+        chunks = _decoded_chunks(stream, content_encoding, limit)
+        if multipart:
+            _receive_multipart(upload, chunks, content_type)
+        else:
+            for chunk in chunks:
+                upload.write(chunk)
+        upload.finish()
+    except Exception:
+        upload.close()
+        raise
+    log.info("Delivery received", bytes=upload.size, sha256=upload.digest, spooled=upload.spooled_to_disk)
+    return upload
+
+
+def _receive_multipart(upload: DeliveryUpload, chunks, content_type: str):
+    from werkzeug.http import parse_options_header
+    from werkzeug.sansio.multipart import MultipartDecoder, Field, File, Data, Epilogue, NeedData
+
+    boundary = parse_options_header(content_type)[1].get('boundary')
+    if not boundary:
+        raise UploadError("multipart/form-data without a boundary")
+    decoder = MultipartDecoder(boundary.encode(), max_form_memory_size=FORM_OVERHEAD_BYTES)
+    part = None
+    field = bytearray()
+    found = done = False
+    for chunk in _with_end(chunks):
+        decoder.receive_data(chunk)
+        event = decoder.next_event()
+        while not isinstance(event, NeedData):
+            if isinstance(event, (Field, File)):
+                part = event
+                found |= isinstance(event, File) and event.name == DELIVERY_FIELD
+                field.clear()
+            elif isinstance(event, Data) and part is not None:
+                if isinstance(part, File) and part.name == DELIVERY_FIELD:
+                    upload.write(event.data)
+                elif isinstance(part, Field):
+                    field += event.data
+                    if len(field) > FORM_OVERHEAD_BYTES:
+                        raise UploadTooLarge("Form field too large")
+                    if not event.more_data:
+                        upload.fields[part.name] = field.decode('utf-8', 'replace')
+            elif isinstance(event, Epilogue):
+                done = True
+                break
+            event = decoder.next_event()
+        if done:
+            break
+    if not found:
+        raise UploadError(f"multipart upload has no '{DELIVERY_FIELD}' file part")
+
+
+def _with_end(chunks):
+    yield from chunks
+    yield None
@@ -1,18 +1,22 @@
 import os
+import hmac
 import json
 import time
-import requests
 import random
 import string
-from flask import Flask, request, jsonify
+import threading
+import uuid
+
+# Cold start timing: everything below is measured against this
+_BOOT_STARTED = time.perf_counter()
+
+from flask import Flask, request, jsonify, Response
 from flask_cors import CORS
-from web3 import Web3
-from eth_account import Account
 
 # Use the unmocked backend logic
 import sys
 sys.path.append(os.path.dirname(__file__))
-from hale_oracle_backend import HaleOracle
+from hale_metrics import render_metrics, CONTENT_TYPE as METRICS_CONTENT_TYPE
 
 app = Flask(__name__)
 CORS(app)
@@ -28,23 +32,123 @@ otp_store = {} # {seller_address: {otp: str, timestamp: int, requirements: str,
 verdict_store = {} # {seller_address: verdict_data}
 recent_verifications = [] # Tracks last 10 successful verifications
 
-# Initialize Oracle
-oracle = HaleOracle(GEMINI_API_KEY, ARC_RPC_URL)
+# Startup report (ms), served on /api/health
+STARTUP = {}
+
+# The oracle (web3, Gemini, Solana) is built on the first request that needs it,
+# so health/OTP requests on a fresh serverless instance don't pay for it
+_oracle = None
+_oracle_lock = threading.Lock()
+
+def get_oracle():
+    global _oracle
+    if _oracle is None:
+        with _oracle_lock:
+            if _oracle is None:
+                started = time.perf_counter()
+                from hale_oracle_backend import HaleOracle
+                imported = time.perf_counter()
+                instance = HaleOracle(GEMINI_API_KEY, ARC_RPC_URL)
+                STARTUP['oracle_import_ms'] = round((imported - started) * 1000, 1)
+                STARTUP['oracle_init_ms'] = round((time.perf_counter() - imported) * 1000, 1)
+                _oracle = instance
+                instance.signers.start_monitor(lambda: instance.solana_client, lambda: instance.web3)
+                # Finish deliveries a previous instance journaled but never completed
+                journal = instance.journal
+                if journal and journal.incomplete():
+                    threading.Thread(target=instance.recover_incomplete, name='hale-recovery', daemon=True).start()
+    return _oracle
 
 def generate_otp():
     return ''.join(random.choices(string.digits, k=5))
 
+def check_otp(seller_address, otp):
+    """(requirements, None) for a valid OTP, else (None, error response)."""
+    # Master Bypass for Hackathon Demo/Judging
+    is_master_otp = str(otp) == "88888"
+    
+    stored = otp_store.get(seller_address)
+    
+    if not is_master_otp and not stored:
+        return None, (jsonify({'error': 'No OTP found for this address. Use Master OTP 88888 for demo.'}), 404)
+    
+    if not is_master_otp and str(stored['otp']) != str(otp):
+        return None, (jsonify({'error': 'Invalid OTP'}), 401)
+
+    # Verification Logic
+    requirements = stored.get('requirements', 'Standard code verification') if stored else "General Verification"
+    return requirements, None
+
+def reviewer_credentials():
+    """{token: reviewer name} from REVIEWER_API_KEYS ("name:token,...") and REVIEWER_API_KEY."""
+    credentials = {}
+    for entry in os.getenv('REVIEWER_API_KEYS', '').split(','):
+        name, _, token = entry.strip().partition(':')
+        if name and token:
+            credentials[token] = name
+    if os.getenv('REVIEWER_API_KEY'):
+        credentials[os.getenv('REVIEWER_API_KEY')] = 'reviewer'
+    return credentials
+
+def check_reviewer():
+    """(reviewer name, None) for a valid bearer token, else (None, error response). Closed when no keys are set."""
+    credentials = reviewer_credentials()
+    if not credentials:
+        return None, (jsonify({'error': 'Review API is disabled (no reviewer keys configured)'}), 503)
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    reviewer = None
+    if scheme.lower() == 'bearer' and token:
+        # Compare against every key so timing does not reveal which one matched
+        for key, name in credentials.items():
+            if hmac.compare_digest(key.encode(), token.strip().encode()):
+                reviewer = name
+    if reviewer is None:
+        return None, (jsonify({'error': 'Reviewer credential required'}), 401)
+    return reviewer, None
+
+def track_verdict(seller_address, result):
+    # Store verdict for polling
+    verdict_store[seller_address] = {
+        **result,
+        'status': 'complete',
+        'timestamp': int(time.time()),
+        'seller': seller_address # Store full address for dashboard
+    }
+    
+    # Track for dashboard monitor
+    recent_verifications.insert(0, verdict_store[seller_address])
+    if len(recent_verifications) > 10:
+        recent_verifications.pop()
+
 @app.route('/api/health', methods=['GET'])
 def health():
+    # Report on the oracle without forcing it to load
+    oracle = _oracle
+    if oracle is not None:
+        STARTUP.update(oracle.init_timings)
     return jsonify({
         'status': 'ok',
-        'oracle_mode': 'mock' if oracle.mock_mode else 'live',
-        'arc_connected': oracle.web3 is not None and oracle.web3.is_connected(),
+        'oracle_mode': ('mock' if oracle.mock_mode else 'live') if oracle else 'cold',
+        'arc_connected': oracle is not None and oracle._web3 is not None and oracle._web3.is_connected(),
+        'startup': STARTUP,
+        # Endpoint health, once the oracle has opened its RPC pools
+        'rpc': sys.modules['hale_rpc_pool'].pool_status() if 'hale_rpc_pool' in sys.modules else {},
+        'journal': oracle.journal.status() if oracle is not None and oracle.journal else None,
+        'signers': oracle.signers.status() if oracle is not None else None,
+        'pending_reviews': sys.modules['hale_review_queue'].get_review_queue().count('pending')
+        if 'hale_review_queue' in sys.modules else None,
+        'blobs': sys.modules['hale_blob_store'].get_blob_store().status()
+        if 'hale_blob_store' in sys.modules else None,
         'timestamp': int(time.time()),
         'active_otps': len(otp_store),
         'verifications_tracked': len(recent_verifications)
     })
 
+@app.route('/metrics', methods=['GET'])
+@app.route('/api/metrics', methods=['GET'])
+def metrics():
+    return Response(render_metrics(), content_type=METRICS_CONTENT_TYPE)
+
 @app.route('/api/generate-otp', methods=['POST'])
 def generate_otp_endpoint():
     data = request.json or {}
@@ -71,6 +175,7 @@ def generate_otp_endpoint():
 
 @app.route('/api/submit-delivery', methods=['POST'])
 def submit_delivery():
+    from hale_journal import DeliveryConflict
     data = request.json
     seller_address = data.get('seller_address', '').lower().strip()
     otp = data.get('otp', '').strip()
@@ -80,22 +185,12 @@ def submit_delivery():
     if not seller_address or not otp or not code:
         return jsonify({'error': 'Missing required fields'}), 400
 
-    # Master Bypass for Hackathon Demo/Judging
-    is_master_otp = str(otp) == "88888"
-    
-    stored = otp_store.get(seller_address)
-    
-    if not is_master_otp and not stored:
-        return jsonify({'error': 'No OTP found for this address. Use Master OTP 88888 for demo.'}), 404
-    
-    if not is_master_otp and str(stored['otp']) != str(otp):
-        return jsonify({'error': 'Invalid OTP'}), 401
-
-    # Verification Logic
-    requirements = stored.get('requirements', 'Standard code verification') if stored else "General Verification"
+    requirements, error = check_otp(seller_address, otp)
+    if error:
+        return error
     
     contract_data = {
-        'transaction_id': f"demo_{int(time.time())}",
+        'transaction_id': f"demo_{uuid.uuid4().hex}",
         'Contract_Terms': requirements,
         'Acceptance_Criteria': [requirements, "Code must be valid Python/Solidity"],
         'Delivery_Content': code,
@@ -103,30 +198,74 @@ def submit_delivery():
     }
     
     # Run Oracle (Unmocked)
-    result = oracle.process_delivery(
-        contract_data=contract_data,
-        seller_address=seller_address,
-        contract_address=target_contract
-    )
+    try:
+        result = get_oracle().process_delivery(
+            contract_data=contract_data,
+            seller_address=seller_address,
+            contract_address=target_contract
+        )
+    except DeliveryConflict as e:
+        return jsonify({'error': str(e)}), 409
     
-    # Store verdict for polling
-    verdict_store[seller_address] = {
-        **result,
-        'status': 'complete',
-        'timestamp': int(time.time()),
-        'seller': seller_address # Store full address for dashboard
-    }
-    
-    # Track for dashboard monitor
-    recent_verifications.insert(0, verdict_store[seller_address])
-    if len(recent_verifications) > 10:
-        recent_verifications.pop()
+    track_verdict(seller_address, result)
     
     return jsonify({
         'status': 'submitted',
         'message': 'Delivery processed successfully'
     })
 
+@app.route('/api/deliveries/upload', methods=['POST'])
+def upload_delivery():
+    # Streams the body (raw, or the 'delivery' part of multipart/form-data) into
+    # the blob store; fields come from the query string or the other form parts
+    from hale_upload import receive_upload, UploadError
+    from hale_journal import DeliveryConflict
+    try:
+        upload = receive_upload(request.stream, request.content_type,
+                                request.headers.get('Content-Encoding'), request.content_length)
+    except UploadError as e:
+        return jsonify({'error': str(e)}), e.status
+    
+    with upload:
+        fields = {**request.args.to_dict(), **upload.fields}
+        seller_address = fields.get('seller_address', '').lower().strip()
+        otp = fields.get('otp', '').strip()
+        target_contract = fields.get('escrow_address', ESCROW_ADDRESS)
+        if not seller_address or not otp:
+            return jsonify({'error': 'Missing required fields'}), 400
+        requirements, error = check_otp(seller_address, otp)
+        if error:
+            return error
+        oracle = get_oracle()
+        delivery_hash = upload.store(oracle.blobs)
+    
+    contract_data = {
+        'transaction_id': fields.get('transaction_id') or f"upload_{uuid.uuid4().hex}",
+        'Contract_Terms': requirements,
+        'Acceptance_Criteria': [requirements, "Code must be valid Python/Solidity"],
+        'escrow_address': target_contract
+    }
+    try:
+        # The pipeline reads the body from the blob store
+        result = oracle.process_delivery(
+            contract_data=contract_data,
+            seller_address=seller_address,
+            contract_address=target_contract,
+            body_hash=delivery_hash
+        )
+    except DeliveryConflict as e:
+        return jsonify({'error': str(e)}), 409
+    finally:
+        oracle.blobs.release(delivery_hash)
+    
+    track_verdict(seller_address, result)
+    return jsonify({
+        'status': 'submitted',
+        'message': 'Delivery processed successfully',
+        'delivery_hash': delivery_hash,
+        'bytes': upload.size
+    })
+
 @app.route('/api/delivery-status/<seller_address>', methods=['GET'])
 def delivery_status(seller_address):
     seller_address = seller_address.lower().strip()
@@ -139,6 +278,8 @@ def delivery_status(seller_address):
 
 @app.route('/api/monitor/<contract_address>', methods=['GET'])
 def monitor(contract_address):
+    from web3 import Web3
+    oracle = get_oracle()
     if not oracle.web3 or not oracle.web3.is_connected():
         return jsonify({"error": "RPC connection failed"}), 500
     
@@ -183,8 +324,94 @@ def monitor(contract_address):
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/reports/<transaction_id>/proof', methods=['GET'])
+def report_proof(transaction_id):
+    # Served from the local proof store; the oracle is not needed
+    from hale_report_anchor import get_proof_store
+    store = get_proof_store()
+    if store is None:
+        return jsonify({'error': 'Proof store unavailable'}), 503
+    proof = store.get(transaction_id)
+    if proof is None:
+        return jsonify({'error': 'No anchored report for this transaction'}), 404
+    return jsonify(proof)
+
+@app.route('/api/reviews', methods=['GET'])
+def list_reviews():
+    # Paginated summaries; pass next_cursor back as ?cursor= for the next page
+    from hale_review_queue import get_review_queue
+    reviewer, error = check_reviewer()
+    if error:
+        return error
+    try:
+        page = get_review_queue().list(
+            status=request.args.get('status', 'pending') or None,
+            order=request.args.get('order', 'age'),
+            seller=request.args.get('seller'),
+            limit=int(request.args.get('limit', 50)),
+            cursor=request.args.get('cursor'))
+    except ValueError:
+        return jsonify({'error': 'Invalid limit or cursor'}), 400
+    return jsonify(page)
+
+@app.route('/api/reviews/<review_id>', methods=['GET'])
+def get_review(review_id):
+    from hale_review_queue import get_review_queue
+    reviewer, error = check_reviewer()
+    if error:
+        return error
+    review = get_review_queue().get(review_id)
+    if review is None:
+        return jsonify({'error': 'Review not found'}), 404
+    return jsonify(review)
+
+@app.route('/api/reviews/claim', methods=['POST'])
+def claim_review():
+    # Claims review_id, or the oldest open review when none is given, for the authenticated reviewer
+    from hale_review_queue import get_review_queue, ReviewError
+    reviewer, error = check_reviewer()
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    try:
+        review = get_review_queue().claim(reviewer, data.get('review_id'))
+    except ReviewError as e:
+        return jsonify({'error': str(e)}), 409
+    if review is None:
+        return jsonify({'status': 'empty'}), 404
+    return jsonify(review)
+
+@app.route('/api/reviews/<review_id>/resolve', methods=['POST'])
+def resolve_review(review_id):
+    # The decision settles the escrow and re-seals the attestation
+    from hale_review_queue import ReviewError
+    reviewer, error = check_reviewer()
+    if error:
+        return error
+    data = request.get_json(silent=True) or {}
+    if not data.get('decision'):
+        return jsonify({'error': 'decision required'}), 400
+    try:
+        result = get_oracle().resolve_review(review_id, reviewer, data['decision'], data.get('notes', ''))
+    except ReviewError as e:
+        return jsonify({'error': str(e)}), 409
+    return jsonify(result)
+
+@app.route('/api/intents/batch', methods=['POST'])
+def intents_batch():
+    # Validate intents against the schema and return each one's canonical intent_hash
+    from hale_intents import process_batch
+    data = request.json or {}
+    intents = data.get('intents')
+    if not isinstance(intents, list):
+        return jsonify({'error': 'intents (a list) required'}), 400
+    # Threads: no process start-up cost on a request path
+    results = process_batch(intents, executor='thread')
+    return jsonify({'results': results, 'valid': sum(1 for r in results if r['valid'])})
+
 @app.route('/api/verify', methods=['POST'])
 def verify():
+    from hale_journal import DeliveryConflict
     data = request.json
     contract_data = data.get('contract_data', {})
     seller_address = data.get('seller_address')
@@ -193,11 +420,15 @@ def verify():
     if not seller_address:
         return jsonify({"error": "seller_address required"}), 400
 
-    result = oracle.process_delivery(
-        contract_data=contract_data,
-        seller_address=seller_address,
-        contract_address=target_contract
-    )
+    try:
+        result = get_oracle().process_delivery(
+            contract_data=contract_data,
+            seller_address=seller_address,
+            contract_address=target_contract
+        )
+    except DeliveryConflict as e:
+        # The transaction_id was journaled for another seller or delivery
+        return jsonify({'error': str(e)}), 409
     
     # Also track verify results for monitor
     event = {**result, 'seller': seller_address, 'timestamp': int(time.time())}
@@ -207,5 +438,7 @@ def verify():
 
     return jsonify(result)
 
+STARTUP['boot_ms'] = round((time.perf_counter() - _BOOT_STARTED) * 1000, 1)
+
 if __name__ == '__main__':
     app.run(port=5001)